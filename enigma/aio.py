@@ -0,0 +1,176 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains asyncio counterparts of EnigmaMachine.process_text.
+
+process_text is synchronous and processes its whole argument at once, which
+blocks an event loop for as long as a large payload takes. The coroutines in
+this module instead take their input a chunk at a time, from an
+asyncio.StreamReader or any async iterator of str or bytes chunks, and run each
+chunk through the machine in slices, yielding to the event loop between slices.
+Chunks of at least executor_threshold characters may instead be handed to an
+executor, so the loop is not held up at all.
+
+The machine keeps its rotor state from one chunk to the next, so the output is
+exactly that of a single process_text call on the whole input. As encryption and
+decryption are the same operation, the same functions do both:
+
+    async def handle(reader, writer):
+        machine = EnigmaMachine.from_key_sheet(**settings)
+        machine.set_display('WXC')
+        await process_to_writer(machine, reader, writer, groups=5)
+
+Input is read only as fast as output is consumed: process_stream() is an async
+generator that reads the next chunk only when the previous results have been
+taken, and process_to_writer() waits on writer.drain() after every write. A slow
+peer therefore slows the reading of the input rather than filling memory.
+
+The machine must not be used by anything else while a call is in progress. If a
+call is cancelled while a chunk is in an executor, that chunk still completes
+and advances the rotors.
+
+"""
+
+import asyncio
+import codecs
+
+from .text import GroupFormatter
+
+
+class AioError(Exception):
+    pass
+
+
+# The number of characters processed between yields to the event loop:
+DEFAULT_SLICE_SIZE = 4096
+
+# The number of bytes requested from a StreamReader at a time:
+DEFAULT_READ_SIZE = 65536
+
+
+async def _read_chunks(source, read_size, encoding):
+    """Generate the str chunks of a StreamReader or an async iterator of str
+    or bytes chunks. Bytes are decoded incrementally, so a character may be
+    split across chunks.
+
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    if isinstance(source, asyncio.StreamReader):
+        while True:
+            data = await source.read(read_size)
+            if not data:
+                break
+            chunk = decoder.decode(data)
+            if chunk:
+                yield chunk
+    elif hasattr(source, '__aiter__'):
+        async for chunk in source:
+            if isinstance(chunk, (bytes, bytearray, memoryview)):
+                chunk = decoder.decode(chunk)
+            if chunk:
+                yield chunk
+    else:
+        raise AioError('expecting a StreamReader or an async iterator, not %s'
+                       % type(source).__name__)
+    chunk = decoder.decode(b'', final=True)
+    if chunk:
+        yield chunk
+
+
+async def _process_chunk(machine, chunk, replace_char, slice_size, executor,
+                         executor_threshold):
+    """Generate the results of processing one chunk, in slices."""
+    if executor_threshold is not None and len(chunk) >= executor_threshold:
+        loop = asyncio.get_running_loop()
+        yield await loop.run_in_executor(executor, machine.process_text,
+                                         chunk, replace_char)
+        return
+
+    for i in range(0, len(chunk), slice_size):
+        result = machine.process_text(chunk[i:i + slice_size], replace_char)
+        if result:
+            yield result
+        await asyncio.sleep(0)
+
+
+async def process_stream(machine, source, replace_char='X',
+                         slice_size=DEFAULT_SLICE_SIZE, executor=None,
+                         executor_threshold=None, read_size=DEFAULT_READ_SIZE,
+                         encoding='utf-8'):
+    """Run a stream of text through the machine, generating the results as str
+    chunks. This is an async generator.
+
+    machine - an EnigmaMachine, set to its starting position; its rotors are
+    left at their final position
+
+    source - an asyncio.StreamReader, or an async iterator of str or bytes
+    chunks
+
+    replace_char - as for EnigmaMachine.process_text
+
+    slice_size - the most characters processed between yields to the event
+    loop
+
+    executor - the concurrent.futures executor for large chunks; None means the
+    loop's default executor
+
+    executor_threshold - chunks of at least this many characters are processed
+    in the executor; None processes every chunk on the event loop
+
+    read_size - the number of bytes read from a StreamReader at a time
+
+    encoding - the encoding of bytes input
+
+    """
+    if slice_size < 1:
+        raise AioError('slice_size must be at least 1')
+    async for chunk in _read_chunks(source, read_size, encoding):
+        async for result in _process_chunk(machine, chunk, replace_char,
+                                           slice_size, executor,
+                                           executor_threshold):
+            yield result
+
+
+async def process_text(machine, text, replace_char='X',
+                       slice_size=DEFAULT_SLICE_SIZE, executor=None,
+                       executor_threshold=None):
+    """Return the result of machine.process_text(text, replace_char), without
+    blocking the event loop; see process_stream() for the arguments.
+
+    """
+    if slice_size < 1:
+        raise AioError('slice_size must be at least 1')
+    results = [result async for result in _process_chunk(
+            machine, text, replace_char, slice_size, executor,
+            executor_threshold)]
+    return ''.join(results)
+
+
+async def process_to_writer(machine, source, writer, replace_char='X',
+                            groups=None, groups_per_line=None,
+                            encoding='utf-8', **kwargs):
+    """Run a stream of text through the machine and write the results to an
+    asyncio.StreamWriter, waiting on writer.drain() after each write. The
+    writer is not closed.
+
+    groups, groups_per_line - if groups is not None, the output is written in
+    groups of that many letters; see text.GroupFormatter
+
+    encoding - the encoding of both the input and the output
+
+    The remaining arguments are as for process_stream(). Returns the number of
+    characters written, not counting group separators.
+
+    """
+    formatter = (GroupFormatter(groups, groups_per_line) if groups is not None
+                 else None)
+    count = 0
+    async for result in process_stream(machine, source, replace_char,
+                                       encoding=encoding, **kwargs):
+        count += len(result)
+        if formatter is not None:
+            result = formatter.format(result)
+        writer.write(result.encode(encoding))
+        await writer.drain()
+    return count
@@ -0,0 +1,438 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Recovers a complete Enigma key from ciphertext alone by simulated annealing.
+
+Hill climbing one key component at a time (positions, then rings, then plugs)
+gets stuck as soon as no single change improves the score. anneal() instead
+perturbs the whole key at random, one small move per trial:
+
+    - connect or disconnect a plugboard cable (Plugboard.connect/disconnect;
+      a rejected move is undone with Plugboard.revert);
+    - move one rotor's start position;
+    - change the middle or right ring setting, keeping the rotor wirings in
+      place so that only the turnover points move;
+    - switch to another rotor order or reflector.
+
+Every trial decrypts the whole ciphertext with the table driven engine (see
+engine.run) and scores it with an n-gram model. Better keys are always kept;
+worse ones are kept with probability exp(delta / T), where delta is the change
+in score per n-gram and the temperature T falls geometrically from t_start to
+t_end over the run. The left ring setting is not searched, as it is equivalent
+to a change of start position.
+
+Annealing is random, so solve() runs many independent restarts, in a pool of
+worker processes if requested. The workers share the best score found so far:
+once any restart reaches the target score, or the time budget runs out, all of
+them stop. The result reports how many restarts converged on the best key and
+the number of trials per second. From the command line:
+
+    $ python -m enigma.anneal --model quadgrams.bin --restarts 64 \\
+          --processes 8 --time 600 CIPHERTEXT
+
+"""
+
+import argparse
+import collections
+import itertools
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+from .engine import compile_key, run
+from .ngram import NgramModel, text_to_indices, indices_to_text
+from .plugboard import Plugboard, MAX_PAIRS
+from .shared import SharedTables
+from .spec import MachineSpec
+from .text import LETTERS_TO_NUMBERS
+
+
+class AnnealError(Exception):
+    pass
+
+
+# Default temperatures, in score per n-gram:
+DEFAULT_T_START = 0.1
+DEFAULT_T_END = 0.002
+
+# Relative frequencies of the kinds of move:
+MOVES = (('plug', 6), ('position', 2), ('ring', 1), ('order', 1))
+
+# Trials between checks of the deadline and the shared best score:
+_CHECK_INTERVAL = 256
+
+
+Solution = collections.namedtuple('Solution',
+        ['score', 'spec', 'start', 'plaintext'])
+
+
+class SolveStats:
+    """Counters describing the work performed by solve()."""
+
+    def __init__(self):
+        self.restarts = 0
+        self.converged = 0
+        self.trials = 0
+        self.seconds = 0.0
+
+    @property
+    def convergence_rate(self):
+        """The fraction of restarts that found the best key."""
+        return self.converged / self.restarts if self.restarts else 0.0
+
+    @property
+    def trials_per_second(self):
+        return self.trials / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        """Return the counters as a dictionary."""
+        return {
+            'restarts': self.restarts,
+            'converged': self.converged,
+            'trials': self.trials,
+            'seconds': self.seconds,
+            'convergence_rate': self.convergence_rate,
+            'trials_per_second': self.trials_per_second,
+        }
+
+
+class _State:
+    """The current key of an annealing run: everything but the plugboard
+    comes from a compiled key without plugs; the plugboard is a Plugboard
+    so that moves can be undone.
+
+    """
+    def __init__(self, rotors, reflector, rings, positions, plugboard):
+        self.rotors = rotors
+        self.reflector = reflector
+        self.rings = rings
+        self.positions = positions
+        self.plugboard = plugboard
+        self.compile()
+
+    def compile(self):
+        self.key = compile_key(MachineSpec(self.rotors, self.rings,
+                                           self.reflector, ()))
+
+    def decrypt(self, data):
+        """Return the decryption of data as letter numbers."""
+        tables = self.key.tables(self.positions)
+        tables = tables[:7] + (bytes(self.plugboard.wiring_map), ) + tables[8:]
+        result = run(tables, *self.positions[-3:], data=data)[0]
+        return result.translate(LETTERS_TO_NUMBERS)
+
+    def solution(self, score, data):
+        spec = MachineSpec(self.rotors, self.rings, self.reflector,
+                           tuple(sorted(self.plugboard.get_pairs())))
+        return Solution(score, spec, self.key.display(self.positions),
+                        indices_to_text(self.decrypt(data)))
+
+
+def _random_state(rng, rotor_orders, reflectors):
+    # a random key with no plugboard cables
+    rotors = rng.choice(rotor_orders)
+    rings = (0, ) * (len(rotors) - 2) + (rng.randrange(26), rng.randrange(26))
+    positions = tuple(rng.randrange(26) for _ in rotors)
+    return _State(rotors, rng.choice(reflectors), rings, positions,
+                  Plugboard())
+
+
+def _state_from_spec(spec, start):
+    state = _State(spec.rotors, spec.reflector, spec.ring_settings, None,
+                   Plugboard(list(spec.plugboard)))
+    state.positions = state.key.positions(start)
+    return state
+
+
+def _move(rng, state, kind, rotor_orders, reflectors, max_pairs):
+    """Make a random change of the given kind to state. Returns a function
+    that undoes it.
+
+    """
+    if kind == 'plug':
+        plugboard = state.plugboard
+        x, y = rng.sample(range(26), 2)
+        if plugboard.is_connected(x, y):
+            token = plugboard.disconnect(x)
+        elif plugboard.is_free(x) and plugboard.is_free(y) and \
+                len(plugboard.get_pairs()) >= max_pairs:
+            # no cable left: move one end of a connected cable to x instead
+            wired = [n for n in range(26) if plugboard.is_wired(n)]
+            if not wired:
+                return lambda: None
+            token = plugboard.connect(rng.choice(wired), x)
+        else:
+            token = plugboard.connect(x, y)
+        return lambda: plugboard.revert(token)
+
+    if kind == 'position':
+        old = state.positions
+        i = rng.randrange(len(old))
+        state.positions = old[:i] + (rng.randrange(26), ) + old[i + 1:]
+        def undo():
+            state.positions = old
+        return undo
+
+    old = (state.rotors, state.reflector, state.rings)
+    if kind == 'ring':
+        i = rng.choice((-2, -1))
+        rings = list(state.rings)
+        rings[i] = rng.randrange(26)
+        state.rings = tuple(rings)
+    else:
+        if len(rotor_orders) > 1 and (len(reflectors) == 1 or
+                                      rng.random() < 0.8):
+            state.rotors = rng.choice(rotor_orders)
+        else:
+            state.reflector = rng.choice(reflectors)
+    state.compile()
+
+    def undo():
+        state.rotors, state.reflector, state.rings = old
+        state.compile()
+    return undo
+
+
+def anneal(ciphertext, model, rotor_orders, reflectors=('B', ), rng=None,
+           iterations=20000, t_start=DEFAULT_T_START, t_end=DEFAULT_T_END,
+           max_pairs=MAX_PAIRS, start_key=None, deadline=None, target=None,
+           shared_best=None):
+    """Run one simulated annealing restart.
+
+    ciphertext - the ciphertext; non-keyboard characters are dropped
+
+    model - the NgramModel used to score decryptions
+
+    rotor_orders - a list of rotor orders (tuples of rotor names) to choose
+    from; all must have the same number of rotors
+
+    reflectors - the reflector names to choose from
+
+    rng - a random.Random; the default is a new, randomly seeded one
+
+    iterations - the number of trials
+
+    t_start, t_end - the initial and final temperatures
+
+    max_pairs - the most plugboard cables used
+
+    start_key - an optional (MachineSpec, start position) to start from
+    instead of a random key
+
+    deadline - a time.time() value at which to stop early
+
+    target - stop early once this score is reached, here or (with
+    shared_best) in any other restart
+
+    shared_best - an optional multiprocessing.Value('d') holding the best score
+    of all restarts, updated by this run
+
+    Returns a tuple (Solution, trials), where Solution is the best key found.
+
+    """
+    rng = rng or random.Random()
+    rotor_orders = [tuple(order) for order in rotor_orders]
+    reflectors = list(reflectors)
+    if not rotor_orders or len({len(order) for order in rotor_orders}) != 1:
+        raise AnnealError('rotor orders must all have the same length')
+    if not 0 <= max_pairs <= MAX_PAIRS:
+        raise AnnealError('max_pairs must be between 0 and %d' % MAX_PAIRS)
+
+    data = text_to_indices(ciphertext)
+    ngrams = max(1, len(data) - model.n + 1)
+    if start_key is None:
+        state = _random_state(rng, rotor_orders, reflectors)
+    else:
+        state = _state_from_spec(*start_key)
+
+    score = model.score(state.decrypt(data))
+    best = state.solution(score, data)
+    kinds, weights = zip(*MOVES)
+    cooling = (t_end / t_start) ** (1.0 / max(1, iterations - 1))
+    temperature = t_start
+
+    trial = 0
+    for trial in range(1, iterations + 1):
+        undo = _move(rng, state, rng.choices(kinds, weights)[0],
+                     rotor_orders, reflectors, max_pairs)
+        new_score = model.score(state.decrypt(data))
+        delta = (new_score - score) / ngrams
+        if delta >= 0 or rng.random() < math.exp(delta / temperature):
+            score = new_score
+            if score > best.score:
+                best = state.solution(score, data)
+        else:
+            undo()
+        temperature *= cooling
+
+        if trial % _CHECK_INTERVAL == 0:
+            if deadline is not None and time.time() >= deadline:
+                break
+            if shared_best is not None:
+                with shared_best.get_lock():
+                    if best.score > shared_best.value:
+                        shared_best.value = best.score
+                    overall = shared_best.value
+                if target is not None and overall >= target:
+                    break
+        if target is not None and best.score >= target:
+            break
+
+    if shared_best is not None:
+        with shared_best.get_lock():
+            if best.score > shared_best.value:
+                shared_best.value = best.score
+    return best, trial
+
+
+# The state of a solve() worker process, set by _init_worker():
+_worker = {}
+
+
+def _init_worker(handle, ciphertext, shared_best, kwargs):
+    shared = SharedTables.attach(handle)
+    _worker.update(shared=shared, model=shared.ngram_model(),
+                   ciphertext=ciphertext, shared_best=shared_best,
+                   kwargs=kwargs)
+
+
+def _restart(seed):
+    return anneal(_worker['ciphertext'], _worker['model'],
+                  rng=random.Random(seed), shared_best=_worker['shared_best'],
+                  **_worker['kwargs'])
+
+
+def solve(ciphertext, model, rotor_orders=None, reflectors=('B', ),
+          restarts=16, iterations=20000, time_budget=None, processes=0,
+          seed=0, top_k=5, target=None, stats=None, **kwargs):
+    """Search for the full key of a ciphertext with many annealing restarts.
+
+    rotor_orders - the rotor orders to choose from; the default is every order
+    of 3 of rotors I to V
+
+    restarts - the number of independent restarts
+
+    iterations - the number of trials per restart
+
+    time_budget - stop all restarts after this many seconds
+
+    processes - the number of worker processes; 0 runs the restarts one after
+    another in this process and None means one per CPU
+
+    seed - restart n is seeded with (seed, n), so results are reproducible
+    (unless a time budget or target cuts them short)
+
+    top_k - the number of distinct keys returned
+
+    target - stop all restarts once any reaches this score
+
+    stats - an optional SolveStats object to update
+
+    Other keyword arguments are passed to anneal().
+
+    Returns a list of the best Solutions found, best first.
+
+    """
+    if rotor_orders is None:
+        rotor_orders = list(itertools.permutations(('I', 'II', 'III', 'IV',
+                                                    'V'), 3))
+    ciphertext = indices_to_text(text_to_indices(ciphertext))
+    deadline = None if time_budget is None else time.time() + time_budget
+    kwargs.update(rotor_orders=rotor_orders, reflectors=reflectors,
+                  iterations=iterations, deadline=deadline, target=target)
+    seeds = ['%s/%d' % (seed, n) for n in range(restarts)]
+    began = time.monotonic()
+    shared_best = multiprocessing.Value('d', float('-inf'))
+
+    solutions = []
+    trials = 0
+    if processes == 0:
+        for restart_seed in seeds:
+            if deadline is not None and time.time() >= deadline:
+                break
+            if target is not None and shared_best.value >= target:
+                break
+            solution, count = anneal(ciphertext, model,
+                                     rng=random.Random(restart_seed),
+                                     shared_best=shared_best, **kwargs)
+            solutions.append(solution)
+            trials += count
+    else:
+        with SharedTables.create(model=model) as shared:
+            with multiprocessing.Pool(processes, initializer=_init_worker,
+                    initargs=(shared.handle, ciphertext, shared_best,
+                              kwargs)) as pool:
+                for solution, count in pool.imap_unordered(_restart, seeds):
+                    solutions.append(solution)
+                    trials += count
+
+    solutions.sort(key=lambda s: s.score, reverse=True)
+    if stats is not None and solutions:
+        stats.restarts += len(solutions)
+        stats.converged += sum(1 for s in solutions
+                               if s.plaintext == solutions[0].plaintext)
+        stats.trials += trials
+        stats.seconds += time.monotonic() - began
+
+    distinct = []
+    seen = set()
+    for solution in solutions:
+        if (solution.spec, solution.start) not in seen:
+            seen.add((solution.spec, solution.start))
+            distinct.append(solution)
+    return distinct[:top_k]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('ciphertext', help='the ciphertext to attack')
+    parser.add_argument('-m', '--model', required=True,
+            help='n-gram model file (see ngram.NgramModel.save)')
+    parser.add_argument('--rotors', default='I II III IV V',
+            help='rotors to choose 3 from [default: %(default)s]')
+    parser.add_argument('--reflectors', default='B',
+            help='reflectors to choose from [default: %(default)s]')
+    parser.add_argument('--pairs', type=int, default=MAX_PAIRS,
+            help='most plugboard cables [default: %(default)s]')
+    parser.add_argument('-r', '--restarts', type=int, default=16,
+            help='number of restarts [default: %(default)s]')
+    parser.add_argument('-n', '--iterations', type=int, default=20000,
+            help='trials per restart [default: %(default)s]')
+    parser.add_argument('-t', '--time', type=float, default=None,
+            help='time budget in seconds [default: none]')
+    parser.add_argument('-j', '--processes', type=int, default=0,
+            help='worker processes; 0 runs in this process '
+                 '[default: %(default)s]')
+    parser.add_argument('--seed', default='0',
+            help='random seed [default: %(default)s]')
+    args = parser.parse_args(argv)
+
+    model = NgramModel.load(args.model)
+    stats = SolveStats()
+    try:
+        solutions = solve(args.ciphertext, model,
+                rotor_orders=list(itertools.permutations(args.rotors.split(),
+                                                         3)),
+                reflectors=args.reflectors.split(), restarts=args.restarts,
+                iterations=args.iterations, time_budget=args.time,
+                processes=args.processes, seed=args.seed, stats=stats,
+                max_pairs=args.pairs)
+    except AnnealError as ex:
+        parser.error(str(ex))
+    finally:
+        model.close()
+
+    for solution in solutions:
+        print('%10.2f  %s  %s  %s' % (solution.score, solution.spec.army_str(),
+                                     solution.start, solution.plaintext))
+    sys.stderr.write('%d restarts, %.0f%% converged, %d trials in %.1f s '
+                     '(%.0f trials/s)\n' % (stats.restarts,
+                     100 * stats.convergence_rate, stats.trials, stats.seconds,
+                     stats.trials_per_second))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains the ScramblerAtlas class, a persistent table of the scrambler
+permutation for every rotor order and rotor position.
+
+The scrambler is the part of the machine between the plugboard connections:
+the three rotors and the reflector. For a given rotor order and reflector, the
+permutation it performs depends only on the rotor positions (the internal
+Rotor.pos values, not the displayed letters). Ring settings merely shift which
+position a given display letter corresponds to, so an atlas built once serves
+every ring setting.
+
+An atlas stores one 26 byte permutation for each of the 26 ** 3 positions of
+every ordered choice of 3 rotors out of a set of rotor models. For the 5 rotors
+I-V, that is 60 rotor orders and about 27 MB per reflector. The entry for rotor
+order number o, left/middle/right positions (l, m, r) and input wire n is found
+at offset:
+
+    ((o * 26 ** 3) + (l * 26 + m) * 26 + r) * 26 + n
+
+Atlases are saved to a binary file consisting of a short header, the reflector
+name and rotor names, and the table data. Loading an atlas memory-maps the
+file read-only, so loading is instant and concurrent processes share the pages.
+
+"""
+
+import itertools
+import mmap
+import struct
+
+from .rotors import RotorError
+from .rotors.data import ROTORS, REFLECTORS
+from .rotors.tables import compose, make_table, entry_tables, exit_tables
+
+
+class AtlasError(Exception):
+    pass
+
+# By default we build atlases for the rotors issued to all Wehrmacht units:
+DEFAULT_ROTORS = ('I', 'II', 'III', 'IV', 'V')
+
+POSITIONS = 26 ** 3
+ENTRY_SIZE = 26
+ORDER_SIZE = POSITIONS * ENTRY_SIZE
+
+# Binary file header: magic, version, 3 pad bytes, length of the names string
+FILE_MAGIC = b'ENGA'
+FILE_VERSION = 1
+HEADER = struct.Struct('<4sB3xI')
+
+
+def _build_order(left, middle, right, reflector):
+    """Return a bytearray of the scrambler permutations at all positions for a
+    single rotor order. Arguments are wiring strings.
+
+    """
+    l_in, l_out = entry_tables(left), exit_tables(left)
+    m_in, m_out = entry_tables(middle), exit_tables(middle)
+    r_in, r_out = entry_tables(right), exit_tables(right)
+    refl = entry_tables(reflector)[0]
+
+    r_in = [t[:26] for t in r_in]
+    data = bytearray()
+    for l in range(26):
+        # the reflector and left rotor only change once every 676 positions
+        core = compose(l_in[l], refl, l_out[l])
+        for m in range(26):
+            inner = make_table(compose(m_in[m], core, m_out[m]))
+            for r in range(26):
+                data += r_in[r].translate(inner).translate(r_out[r])
+    return data
+
+
+class ScramblerAtlas:
+    """A table of scrambler permutations for all rotor orders and positions of
+    a set of rotor models and a given reflector.
+
+    Atlases are created with build() or load(), not by calling the constructor
+    directly.
+
+    """
+    def __init__(self, reflector, rotors, data):
+        self.reflector = reflector
+        self.rotors = tuple(rotors)
+        self.orders = list(itertools.permutations(self.rotors, 3))
+        self.data = data
+        self._order_index = {order: i for i, order in enumerate(self.orders)}
+        self._mmap = None
+
+        if len(data) != len(self.orders) * ORDER_SIZE:
+            raise AtlasError('atlas data has the wrong size')
+
+    @classmethod
+    def build(cls, reflector='B', rotors=DEFAULT_ROTORS, path=None):
+        """Compute the atlas for a reflector and set of rotor models.
+
+        reflector - a reflector name; see rotors.data.REFLECTORS
+
+        rotors - an iterable of at least 3 rotor names; see rotors.data.ROTORS.
+        Every ordered choice of 3 of these rotors is included in the atlas.
+
+        path - if not None, the atlas is also saved to this path
+
+        """
+        if reflector not in REFLECTORS:
+            raise RotorError("Unknown reflector type: %s" % reflector)
+        rotors = tuple(rotors)
+        for name in rotors:
+            if name not in ROTORS:
+                raise RotorError("Unknown rotor type: %s" % name)
+        if len(rotors) < 3 or len(set(rotors)) != len(rotors):
+            raise AtlasError('need 3 or more distinct rotors')
+
+        data = bytearray()
+        for left, middle, right in itertools.permutations(rotors, 3):
+            data += _build_order(ROTORS[left]['wiring'],
+                                 ROTORS[middle]['wiring'],
+                                 ROTORS[right]['wiring'],
+                                 REFLECTORS[reflector])
+
+        atlas = cls(reflector, rotors, bytes(data))
+        if path is not None:
+            atlas.save(path)
+        return atlas
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map an atlas previously written by save()."""
+
+        with open(path, 'rb') as fp:
+            header = fp.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise AtlasError('truncated atlas file: %s' % path)
+
+            magic, version, names_len = HEADER.unpack(header)
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                raise AtlasError('not an atlas file: %s' % path)
+
+            names = fp.read(names_len).decode('ascii').split()
+            if len(names) < 4:
+                raise AtlasError('corrupt atlas file: %s' % path)
+
+            orders = len(names[1:]) * (len(names) - 2) * (len(names) - 3)
+            start = HEADER.size + names_len
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(mm) != start + orders * ORDER_SIZE:
+            mm.close()
+            raise AtlasError('truncated atlas file: %s' % path)
+
+        view = memoryview(mm)
+        atlas = cls(names[0], names[1:], view[start:])
+        atlas._mmap = (mm, view)
+        return atlas
+
+    def save(self, path):
+        """Write the atlas to path in the format described in the module
+        documentation.
+
+        """
+        names = ' '.join((self.reflector,) + self.rotors).encode('ascii')
+        with open(path, 'wb') as fp:
+            fp.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, len(names)))
+            fp.write(names)
+            fp.write(self.data)
+
+    def close(self):
+        """Release the memory map backing a loaded atlas. The atlas may not be
+        used after calling close().
+
+        """
+        if self._mmap is not None:
+            mm, view = self._mmap
+            self.data.release()
+            view.release()
+            mm.close()
+            self._mmap = None
+            self.data = None
+
+    def offset(self, rotors, positions):
+        """Return the offset into data of the permutation for a rotor order and
+        internal rotor positions.
+
+        rotors - a sequence of 3 rotor names, left to right
+
+        positions - a sequence of 3 internal rotor positions (0-25), left to
+        right
+
+        """
+        try:
+            order = self._order_index[tuple(rotors)]
+        except KeyError:
+            raise AtlasError('rotor order not in atlas: %s' % ' '.join(rotors))
+
+        l, m, r = positions
+        return (order * POSITIONS + (l * 26 + m) * 26 + r) * ENTRY_SIZE
+
+    def scrambler(self, rotors, positions):
+        """Return the 26 byte scrambler permutation for a rotor order and
+        internal rotor positions (see offset()).
+
+        """
+        start = self.offset(rotors, positions)
+        return bytes(self.data[start:start + ENTRY_SIZE])
+
+    def scrambler_at(self, rotors, display, ring_settings=(0, 0, 0)):
+        """Return the 26 byte scrambler permutation for a rotor order when the
+        operator windows show display (e.g. 'ABC') with the given ring
+        settings (a sequence of 3 integers, 0-25).
+
+        """
+        if len(display) != 3 or len(ring_settings) != 3:
+            raise AtlasError('expecting 3 display values and ring settings')
+
+        positions = [(ord(d.upper()) - ord('A') - rs) % 26
+                     for d, rs in zip(display, ring_settings)]
+        return self.scrambler(rotors, positions)
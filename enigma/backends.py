@@ -0,0 +1,219 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains the interchangeable implementations ("backends") used by
+EnigmaMachine.process_text.
+
+    python - the reference implementation: key_press() for every character,
+    which steps the Rotor objects and runs the signal through them one by one.
+    This is the default.
+
+    tables - a pure Python loop over the precomputed per-position lookup tables
+    of rotors.tables, with all state in local variables. Several times faster
+    than python, and always available.
+
+    numba - the same loop compiled to machine code with Numba. This is only
+    available if the optional numba and numpy packages are installed
+    (pip install py-enigma[numba]).
+
+All backends produce the same output, leave the rotors in the same positions
+and update the rotor rotation counts in the same way. The fast backends do not
+call key_press(), so they are only used for plain EnigmaMachine objects:
+subclasses, machines instrumented with the metrics module (or with any other
+method replaced on the instance) and machines with custom rotor or plugboard
+classes fall back to the python backend automatically.
+
+The backend is a process wide setting:
+
+    from enigma.backends import set_backend
+    set_backend('tables')
+
+"""
+
+import warnings
+
+from . import machine as _machine
+from .engine import normalize, notch_mask
+from .rotors.tables import entry_tables, exit_tables
+
+try:
+    import numba
+    import numpy
+except ImportError:     # the numba backend is optional
+    numba = None
+
+
+class BackendError(Exception):
+    pass
+
+
+def _tables(machine):
+    """Return the tables argument for engine.run() for a machine at its
+    current position.
+
+    """
+    rotors = machine.rotors
+    if machine.rotor_count == 4:
+        reflector = machine._folded_reflector[rotors[0].pos]
+    else:
+        reflector = entry_tables(machine.reflector.wiring_str)[
+                machine.reflector.pos]
+
+    l, m, r = rotors[-3:]
+    return (entry_tables(l.wiring_str), exit_tables(l.wiring_str),
+            entry_tables(m.wiring_str), exit_tables(m.wiring_str),
+            entry_tables(r.wiring_str), exit_tables(r.wiring_str),
+            reflector, bytes(machine.plugboard.wiring_map),
+            notch_mask(m), notch_mask(r))
+
+
+def _update(machine, positions, rotations):
+    """Move the machine's 3 stepping rotors to the given internal positions and
+    add to their rotation counts.
+
+    """
+    for rotor, pos, count in zip(machine.rotors[-3:], positions, rotations):
+        rotor.pos = pos
+        rotor.display_val = rotor.pos_map[pos]
+        rotor.rotations += count
+
+
+def _run_tables(tables, pl, pm, pr, data):
+    """engine.run() with rotation counting for the left and middle rotors."""
+
+    l_in, l_out, m_in, m_out, r_in, r_out, refl, plug, mask_m, mask_r = tables
+
+    nl = nm = 0
+    result = bytearray(len(data))
+    for k, c in enumerate(data):
+        if (mask_m >> pm) & 1:
+            pl = (pl + 1) % 26
+            pm = (pm + 1) % 26
+            nl += 1
+            nm += 1
+        elif (mask_r >> pr) & 1:
+            pm = (pm + 1) % 26
+            nm += 1
+        pr = (pr + 1) % 26
+
+        c = plug[c]
+        c = l_in[pl][m_in[pm][r_in[pr][c]]]
+        c = refl[c]
+        c = r_out[pr][m_out[pm][l_out[pl][c]]]
+        result[k] = plug[c] + 65
+
+    return result, (pl, pm, pr), (nl, nm, len(data))
+
+
+def _tables_backend(machine, text, replace_char='X'):
+    data = normalize(text, replace_char)
+    positions = [r.pos for r in machine.rotors[-3:]]
+    result, positions, rotations = _run_tables(_tables(machine), *positions,
+                                               data=data)
+    _update(machine, positions, rotations)
+    return result.decode('ascii')
+
+
+if numba is not None:
+    @numba.njit(cache=True, nogil=True)
+    def _run_numba(rotor_in, rotor_out, refl, plug, mask_m, mask_r,
+                   pl, pm, pr, data):
+        # rotor_in, rotor_out: [3, 26, 26] arrays of the left, middle and
+        # right rotor tables; the rest as for _run_tables
+        result = numpy.empty(data.shape[0], numpy.uint8)
+        nl = 0
+        nm = 0
+        for k in range(data.shape[0]):
+            if (mask_m >> pm) & 1:
+                pl = (pl + 1) % 26
+                pm = (pm + 1) % 26
+                nl += 1
+                nm += 1
+            elif (mask_r >> pr) & 1:
+                pm = (pm + 1) % 26
+                nm += 1
+            pr = (pr + 1) % 26
+
+            c = plug[data[k]]
+            c = rotor_in[0, pl, rotor_in[1, pm, rotor_in[2, pr, c]]]
+            c = refl[c]
+            c = rotor_out[2, pr, rotor_out[1, pm, rotor_out[0, pl, c]]]
+            result[k] = plug[c] + 65
+        return result, pl, pm, pr, nl, nm
+
+    def _numba_backend(machine, text, replace_char='X'):
+        (l_in, l_out, m_in, m_out, r_in, r_out, refl, plug,
+         mask_m, mask_r) = _tables(machine)
+
+        def table_array(tables):
+            return numpy.frombuffer(b''.join(t[:26] for t in tables),
+                                    numpy.uint8).reshape(26, 26)
+
+        rotor_in = numpy.stack([table_array(t) for t in (l_in, m_in, r_in)])
+        rotor_out = numpy.stack([table_array(t) for t in (l_out, m_out, r_out)])
+        data = numpy.frombuffer(normalize(text, replace_char), numpy.uint8)
+        pl, pm, pr = [r.pos for r in machine.rotors[-3:]]
+
+        result, pl, pm, pr, nl, nm = _run_numba(
+                rotor_in, rotor_out,
+                numpy.frombuffer(refl[:26], numpy.uint8),
+                numpy.frombuffer(plug, numpy.uint8),
+                mask_m, mask_r, pl, pm, pr, data)
+        _update(machine, (pl, pm, pr), (nl, nm, len(data)))
+        return result.tobytes().decode('ascii')
+else:
+    _numba_backend = None
+
+
+# Backend name -> process_text replacement; None for the reference python
+# implementation built into EnigmaMachine:
+BACKENDS = {
+    'python': None,
+    'tables': _tables_backend,
+}
+if _numba_backend is not None:
+    BACKENDS['numba'] = _numba_backend
+
+# All backends, including those not available in this installation:
+BACKEND_NAMES = ('python', 'tables', 'numba')
+
+_current = 'python'
+
+
+def available_backends():
+    """Return a list of the names of the backends that can be used."""
+    return list(BACKENDS)
+
+
+def get_backend():
+    """Return the name of the backend in use."""
+    return _current
+
+
+def set_backend(name, strict=False):
+    """Choose the implementation used by EnigmaMachine.process_text.
+
+    name - 'python', 'tables' or 'numba'
+
+    strict - if the backend is not available (numba is not installed), raise
+    BackendError if strict is True; otherwise issue a warning and use the
+    python backend.
+
+    Returns the name of the backend now in use.
+
+    """
+    global _current
+
+    if name not in BACKEND_NAMES:
+        raise BackendError('unknown backend: %s' % name)
+    if name not in BACKENDS:
+        if strict:
+            raise BackendError('backend %s is not available' % name)
+        warnings.warn('backend %s is not available; using python' % name,
+                      RuntimeWarning, stacklevel=2)
+        name = 'python'
+
+    _machine._backend = BACKENDS[name]
+    _current = name
+    return name
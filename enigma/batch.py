@@ -0,0 +1,207 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains the MachineBatch class, which holds many independently keyed Enigma
+machines in a compact structure-of-arrays form.
+
+An EnigmaMachine is a graph of Python objects: a list of Rotor objects, each
+with several dictionaries, and a Plugboard. A MachineBatch instead keeps the
+state of every machine in a handful of flat arrays indexed by machine number:
+rotor positions, ring settings, rotor and reflector table numbers, notch masks
+and plugboard maps, under 60 bytes per machine. The rotor and reflector lookup
+tables themselves come from rotors.tables and are shared by all machines.
+
+Every machine is treated as having 4 rotor slots. Slot 0 holds the stationary
+leftmost rotor of an M4; it is folded into the reflector (see
+EnigmaMachine.__init__). For 3 rotor machines slot 0 is unused. Slots 1-3 hold
+the left, middle and right stepping rotors.
+
+Rotor rotation counts are not tracked.
+
+"""
+
+import array
+
+from .engine import normalize, notch_mask, run
+from .machine import EnigmaMachine, EnigmaError, KEYBOARD_CHARS, KEYBOARD_SET
+from .rotors.tables import entry_tables, exit_tables, folded_reflector_tables
+
+
+class MachineBatch:
+    """A batch of independently keyed Enigma machines that step and encrypt in
+    lockstep.
+
+    """
+    def __init__(self, machines):
+        """Build a batch from an iterable of EnigmaMachine objects. The machines'
+        current rotor positions become the batch's positions; the machines
+        themselves are not referenced afterwards.
+
+        """
+        self._rotor_tables = []     # list of (entry tables, exit tables)
+        self._rotor_ids = {}        # wiring -> index into _rotor_tables
+        self._reflector_tables = [] # list of 26-tuples of tables
+        self._reflector_ids = {}    # key -> index into _reflector_tables
+
+        self.rotor_counts = bytearray()
+        self.positions = bytearray()    # 4 per machine; internal positions
+        self.rings = bytearray()        # 4 per machine
+        self.rotors = bytearray()       # 4 per machine; slot 0 unused
+        self.reflectors = array.array('H')
+        self.middle_notches = array.array('L')
+        self.right_notches = array.array('L')
+        self.plugboards = bytearray()   # 26 per machine
+
+        for machine in machines:
+            self._add(machine)
+
+    @classmethod
+    def from_key_sheets(cls, settings, displays=None):
+        """Build a batch from an iterable of dictionaries of keyword arguments
+        for EnigmaMachine.from_key_sheet (as returned by
+        keyfile.get_daily_settings).
+
+        displays - an optional iterable of start positions, one per machine
+
+        """
+        machines = [EnigmaMachine.from_key_sheet(**s) for s in settings]
+        if displays is not None:
+            displays = list(displays)
+            if len(displays) != len(machines):
+                raise EnigmaError('expecting %d display values' % len(machines))
+            for machine, display in zip(machines, displays):
+                machine.set_display(display)
+        return cls(machines)
+
+    def _table_id(self, rotor):
+        wiring = rotor.wiring_str
+        if wiring not in self._rotor_ids:
+            self._rotor_ids[wiring] = len(self._rotor_tables)
+            self._rotor_tables.append((entry_tables(wiring),
+                                       exit_tables(wiring)))
+        return self._rotor_ids[wiring]
+
+    def _reflector_id(self, reflector, fourth):
+        if fourth is None:
+            key = (reflector.wiring_str, reflector.pos, None)
+        else:
+            key = (reflector.wiring_str, reflector.pos, fourth.wiring_str)
+
+        if key not in self._reflector_ids:
+            if fourth is None:
+                table = entry_tables(reflector.wiring_str)[reflector.pos]
+                tables = (table,) * 26
+            else:
+                tables = folded_reflector_tables(*key)
+            self._reflector_ids[key] = len(self._reflector_tables)
+            self._reflector_tables.append(tables)
+        return self._reflector_ids[key]
+
+    def _add(self, machine):
+        rotors = list(machine.rotors)
+        fourth = rotors[0] if len(rotors) == 4 else None
+        if fourth is None:
+            rotors.insert(0, rotors[0])
+
+        self.rotor_counts.append(machine.rotor_count)
+        self.positions.extend(r.pos for r in rotors)
+        self.rings.extend(r.ring_setting for r in rotors)
+        self.rotors.extend(self._table_id(r) for r in rotors)
+        self.reflectors.append(self._reflector_id(machine.reflector, fourth))
+        self.middle_notches.append(notch_mask(rotors[2]))
+        self.right_notches.append(notch_mask(rotors[3]))
+        self.plugboards.extend(machine.plugboard.wiring_map)
+
+    def __len__(self):
+        return len(self.rotor_counts)
+
+    def set_display(self, i, val):
+        """Sets the rotor operator windows of machine number i to val."""
+        count = self.rotor_counts[i]
+        if len(val) != count:
+            raise EnigmaError("Incorrect length for display value")
+
+        for slot, c in zip(range(4 - count, 4), val.upper()):
+            if c not in KEYBOARD_SET:
+                raise EnigmaError("bad display value %s" % val)
+            j = 4 * i + slot
+            self.positions[j] = (ord(c) - ord('A') - self.rings[j]) % 26
+
+    def get_display(self, i):
+        """Returns the operator display of machine number i as a string."""
+        count = self.rotor_counts[i]
+        return ''.join(
+            KEYBOARD_CHARS[(self.positions[j] + self.rings[j]) % 26]
+            for j in range(4 * i + 4 - count, 4 * i + 4))
+
+    def step(self):
+        """Step the rotors of every machine once, as if a key was pressed."""
+        pos = self.positions
+        middle_notches = self.middle_notches
+        right_notches = self.right_notches
+        for i in range(len(self)):
+            j = 4 * i
+            pl, pm, pr = pos[j + 1], pos[j + 2], pos[j + 3]
+            rotate3 = (middle_notches[i] >> pm) & 1
+            if rotate3:
+                pos[j + 1] = (pl + 1) % 26
+            if rotate3 or (right_notches[i] >> pr) & 1:
+                pos[j + 2] = (pm + 1) % 26
+            pos[j + 3] = (pr + 1) % 26
+
+    def key_press(self, keys):
+        """Simulate a key press on every machine.
+
+        keys - a sequence of letters, one for each machine
+
+        Returns a string of the lamps lit, one for each machine.
+
+        """
+        if len(keys) != len(self):
+            raise EnigmaError('expecting %d keys' % len(self))
+        for key in keys:
+            if key not in KEYBOARD_SET:
+                raise EnigmaError('illegal key press %s' % key)
+        return ''.join(self.process_text(list(keys)))
+
+    def process_text(self, texts, replace_char='X'):
+        """Run text through every machine, as EnigmaMachine.process_text does.
+
+        texts - either a single string that every machine processes, or a
+        sequence of strings, one for each machine
+
+        replace_char - as for EnigmaMachine.process_text
+
+        Returns a list of strings, one for each machine.
+
+        The result is the same as pressing the keys on all machines in
+        lockstep, but each machine runs through its whole text in turn using
+        engine.run(), which keeps all of its state in local variables.
+
+        """
+        if isinstance(texts, str):
+            data = normalize(texts, replace_char)
+            inputs = [data] * len(self)
+        else:
+            if len(texts) != len(self):
+                raise EnigmaError('expecting %d texts' % len(self))
+            inputs = [normalize(t, replace_char) for t in texts]
+
+        return [self._process(i, data) for i, data in enumerate(inputs)]
+
+    def _process(self, i, data):
+        """Encrypt the letter numbers in data with machine number i."""
+        j = 4 * i
+        pos = self.positions
+        l_in, l_out = self._rotor_tables[self.rotors[j + 1]]
+        m_in, m_out = self._rotor_tables[self.rotors[j + 2]]
+        r_in, r_out = self._rotor_tables[self.rotors[j + 3]]
+        tables = (l_in, l_out, m_in, m_out, r_in, r_out,
+                  self._reflector_tables[self.reflectors[i]][pos[j]],
+                  bytes(self.plugboards[26 * i:26 * i + 26]),
+                  self.middle_notches[i], self.right_notches[i])
+
+        result, pos[j + 1], pos[j + 2], pos[j + 3] = run(
+                tables, pos[j + 1], pos[j + 2], pos[j + 3], data)
+        return result.decode('ascii')
@@ -0,0 +1,70 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Measure the pickled size and round trip time of Enigma machines, as sent to
+process pool workers.
+
+Run with:
+
+    $ python -m enigma.benchmarks.bench_pickle [--count N]
+
+The "attribute dicts" row pickles each object's full __dict__, which is what
+default pickling did before machines, rotors and plugboards defined their own
+reductions (less the plugboard's read-only view, which cannot be pickled).
+
+"""
+
+import argparse
+import copy
+import pickle
+import time
+
+from enigma.machine import EnigmaMachine
+
+
+SETTINGS = [
+    dict(rotors='II IV V', ring_settings='B U L',
+         plugboard_settings='AV BS CG DL FU HZ IN KM OW RX'),
+    dict(rotors='Beta II IV I', ring_settings='A A A V', reflector='B-Thin',
+         plugboard_settings='1/20 2/12 4/6 7/10 8/13 14/23 15/16 17/25 18/26'),
+]
+
+
+def attribute_dicts(machine):
+    """Return the object graph default pickling used to serialize."""
+    state = dict(machine.__dict__)
+    state['rotors'] = [dict(r.__dict__) for r in machine.rotors]
+    state['reflector'] = dict(machine.reflector.__dict__)
+    state['plugboard'] = dict(machine.plugboard.__dict__)
+    del state['plugboard']['_view']
+    return state
+
+
+def measure(label, obj, count):
+    data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    start = time.perf_counter()
+    for _ in range(count):
+        pickle.loads(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+    elapsed = time.perf_counter() - start
+    print('%-18s %6d bytes  %8.1f us/round trip' %
+          (label, len(data), elapsed / count * 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=5000,
+            help='round trips per measurement [default: %(default)s]')
+    args = parser.parse_args()
+
+    for settings in SETTINGS:
+        machine = EnigmaMachine.from_key_sheet(**settings)
+        print('%s:' % settings['rotors'])
+        measure('  attribute dicts', attribute_dicts(machine), args.count)
+        measure('  EnigmaMachine', machine, args.count)
+        copies = [copy.copy(machine) for _ in range(100)]
+        measure('  100 machines', copies, args.count // 100)
+
+
+if __name__ == '__main__':
+    main()
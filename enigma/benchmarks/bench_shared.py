@@ -0,0 +1,107 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Measure per-worker memory use of a process pool that needs a scrambler atlas
+and a quadgram model, with and without shared.SharedTables.
+
+Run with:
+
+    $ python -m enigma.benchmarks.bench_shared [--workers N]
+
+In "private" mode each worker receives its own copy of the tables through the
+pool initializer; in "shared" mode the workers attach to one shared memory
+block. Each worker reads every page of the tables, then reports its resident
+set size. Private (anonymous) memory is what multiplies with the worker count;
+shared memory pages are counted once by the system however many workers map
+them. The breakdown is read from /proc/self/status, so it is only available on
+Linux; elsewhere only the peak RSS is reported.
+
+"""
+
+import argparse
+import multiprocessing
+import random
+import resource
+import sys
+
+from enigma.atlas import ScramblerAtlas
+from enigma.machine import KEYBOARD_CHARS
+from enigma.ngram import NgramModel
+from enigma.shared import SharedTables
+
+
+_tables = {}
+
+
+def memory_usage():
+    """Return a dictionary of this process's memory use in KB."""
+    usage = {}
+    try:
+        with open('/proc/self/status') as fp:
+            for line in fp:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'RssAnon', 'RssFile', 'RssShmem'):
+                    usage[key] = int(value.split()[0])
+    except OSError:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['VmRSS'] = maxrss // 1024 if sys.platform == 'darwin' else maxrss
+    return usage
+
+
+def init_private(atlas, model):
+    _tables.update(atlas=atlas, model=model)
+
+
+def init_shared(handle):
+    shared = SharedTables.attach(handle)
+    _tables.update(shared=shared, atlas=shared.atlas(),
+                   model=shared.ngram_model())
+
+
+def work(_):
+    # touch every page of both tables
+    data = _tables['atlas'].data
+    total = sum(data[i] for i in range(0, len(data), 4096))
+    table = _tables['model'].table
+    total += sum(table[i] for i in range(0, len(table), 1024))
+    return memory_usage()
+
+
+def run(label, workers, initializer, initargs):
+    with multiprocessing.Pool(workers, initializer, initargs) as pool:
+        usages = pool.map(work, range(workers), chunksize=1)
+
+    print('%s:' % label)
+    for key in ('VmRSS', 'RssAnon', 'RssShmem'):
+        values = [u[key] for u in usages if key in u]
+        if values:
+            print('  %-8s per worker %8.1f MB   all workers %8.1f MB' %
+                  (key, sum(values) / len(values) / 1024, sum(values) / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=4,
+            help='number of worker processes [default: %(default)s]')
+    args = parser.parse_args()
+
+    # the spawn start method makes workers start from a fresh interpreter
+    # rather than inheriting the parent's copy of the tables by fork
+    multiprocessing.set_start_method('spawn')
+
+    rng = random.Random(38)
+    corpus = ''.join(rng.choice(KEYBOARD_CHARS) for _ in range(200000))
+    model = NgramModel.from_corpus(corpus, n=4)
+    atlas = ScramblerAtlas.build()
+    print('atlas %.1f MB, model %.1f MB, %d workers\n' % (
+          len(atlas.data) / 2 ** 20, len(model.table) * 4 / 2 ** 20,
+          args.workers))
+
+    run('private', args.workers, init_private, (atlas, model))
+    with SharedTables.create(model=model, atlas=atlas) as shared:
+        run('shared', args.workers, init_shared, (shared.handle, ))
+
+
+if __name__ == '__main__':
+    main()
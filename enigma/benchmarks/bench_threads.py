@@ -0,0 +1,71 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Measure how the stateless engine.encrypt() function scales across a thread
+pool.
+
+Run with:
+
+    $ python -m enigma.benchmarks.bench_threads [--jobs N] [--length N]
+
+On a standard (GIL) Python build, throughput stays roughly flat as threads are
+added. On a free-threaded build it should scale with the number of cores.
+
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import random
+import sys
+import time
+
+from enigma.engine import encrypt
+from enigma.machine import KEYBOARD_CHARS
+
+
+def random_spec(rng):
+    rotors = rng.sample(['I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII'], 3)
+    letters = rng.sample(KEYBOARD_CHARS, 20)
+    plugs = ' '.join(letters[i] + letters[i + 1] for i in range(0, 20, 2))
+    return dict(rotors=rotors,
+                ring_settings=[rng.randrange(26) for _ in range(3)],
+                reflector=rng.choice(['B', 'C']),
+                plugboard_settings=plugs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--jobs', type=int, default=400,
+            help='number of messages to encrypt [default: %(default)s]')
+    parser.add_argument('--length', type=int, default=2000,
+            help='message length [default: %(default)s]')
+    parser.add_argument('--threads', type=int, nargs='+',
+            default=[1, 2, 4, 8], help='thread counts to try')
+    args = parser.parse_args()
+
+    rng = random.Random(32)
+    specs = [random_spec(rng) for _ in range(20)]
+    text = ''.join(rng.choice(KEYBOARD_CHARS) for _ in range(args.length))
+    jobs = [(specs[i % len(specs)], 'ABC') for i in range(args.jobs)]
+
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('Python %s, GIL %s' % (sys.version.split()[0],
+                                 'enabled' if gil else 'disabled'))
+
+    baseline = None
+    for threads in args.threads:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for _ in pool.map(lambda job: encrypt(job[0], job[1], text), jobs):
+                pass
+        elapsed = time.perf_counter() - start
+
+        rate = args.jobs * args.length / elapsed
+        baseline = baseline or rate
+        print('%2d threads: %10.0f chars/sec  (%.2fx)' %
+              (threads, rate, rate / baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains the MachineCache class, a least recently used cache of constructed
+EnigmaMachine objects and compiled keys.
+
+Building a machine with EnigmaMachine.from_key_sheet parses and validates every
+setting and constructs several lookup tables per rotor. Services typically see
+only a few dozen distinct keys, so it is much cheaper to build each machine
+once, keep it as a prototype, and hand out copies (see EnigmaMachine.__copy__)
+with the rotors set to the requested start position.
+
+Entries are keyed by MachineSpec, so the same key spelled in different ways
+shares a single entry. The cache is bounded both by entry count and by an
+approximate size in bytes; the least recently used entries are evicted first.
+All methods are thread-safe.
+
+"""
+
+import collections
+import copy
+import sys
+import threading
+
+from .engine import CompiledKey
+from .spec import MachineSpec
+
+
+# Default limits for the module level cache used by get_machine():
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def _sizeof(obj, seen):
+    """Return the approximate size in bytes of obj and the containers it
+    references, skipping objects already in seen.
+
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_sizeof(k, seen) + _sizeof(v, seen)
+                    for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(v, seen) for v in obj)
+    elif hasattr(obj, '__dict__'):
+        size += _sizeof(obj.__dict__, seen)
+    return size
+
+
+def estimate_size(obj):
+    """Return the approximate memory footprint in bytes of a cache entry.
+
+    For a CompiledKey the rotor and reflector tables are not counted, since
+    they are shared by every key that uses the same rotors.
+
+    """
+    if isinstance(obj, CompiledKey):
+        return (sys.getsizeof(obj) + sys.getsizeof(obj.plugboard) +
+                sys.getsizeof(obj.rings) + sys.getsizeof(obj.rotor_tables))
+    return _sizeof(obj, set())
+
+
+class MachineCache:
+    """A thread-safe LRU cache of EnigmaMachine prototypes and compiled keys,
+    bounded by entry count and approximate size in bytes.
+
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=None):
+        """Create an empty cache.
+
+        max_entries - the maximum number of entries kept
+
+        max_bytes - the maximum approximate size of all entries in bytes (see
+        estimate_size()), or None for no limit
+
+        """
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()   # key -> (value, size)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # build outside the lock; if two threads race to build the same entry
+        # the second one simply replaces the first
+        value = build()
+        size = estimate_size(value)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+        return value
+
+    def _evict(self):
+        # always keep the newest entry, even if it alone exceeds max_bytes
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def get(self, spec, display=None):
+        """Return a new EnigmaMachine for a key, with its rotors set to display.
+
+        spec - a MachineSpec, or a dictionary of keyword arguments for
+        EnigmaMachine.from_key_sheet
+
+        display - the start position, e.g. 'WXC'; if None, all rotors are set
+        to 'A'
+
+        Every call returns an independent copy that the caller may modify
+        freely.
+
+        """
+        spec = MachineSpec.coerce(spec)
+        prototype = self._lookup(('machine', spec), spec.create_machine)
+
+        machine = copy.copy(prototype)
+        machine.set_display(display or 'A' * machine.rotor_count)
+        return machine
+
+    def get_compiled(self, spec):
+        """Return the engine.CompiledKey for a key. Compiled keys are immutable,
+        so the cached object itself is returned.
+
+        """
+        spec = MachineSpec.coerce(spec)
+        return self._lookup(('compiled', spec),
+                            lambda: CompiledKey(spec.create_machine()))
+
+    def clear(self):
+        """Remove all entries. Statistics are not reset."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return the cache statistics as a dictionary."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+DEFAULT_CACHE = MachineCache(DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES)
+
+
+def get_machine(spec, display=None):
+    """Return a new EnigmaMachine from the module level cache; see
+    MachineCache.get().
+
+    """
+    return DEFAULT_CACHE.get(spec, display)
@@ -0,0 +1,570 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Runs a sharded key search (see shards.py) on many machines: one coordinator
+hands out shards over TCP to any number of workers.
+
+The protocol is one JSON object per line in each direction. A worker sends a
+request and reads exactly one reply:
+
+    {"op": "hello", "name": ..., "model": ...}
+        -> {"worker": id, "job": {...}}, the search parameters
+
+    {"op": "next"}
+        -> {"unit": n}, a shard number to search;
+           {"wait": seconds}, if every remaining shard is being searched by
+           another worker; or {"done": true}
+
+    {"op": "result", "unit": n, "results": [...], "stats": {...}}
+        -> {"ok": true}
+
+    {"op": "status"}
+        -> the coordinator's status(), for monitoring
+
+The coordinator keeps a deque of reserved shards for every worker, filled
+batch_size shards at a time from the shared queue. A worker that has used up
+its own deque, when the shared queue is empty, steals the newer half of the
+longest deque belonging to another worker, so that a slow worker does not hold
+up the end of the search. When a worker disconnects, or is silent for longer
+than the timeout, its reserved shards and the one it was searching go back to
+the front of the shared queue.
+
+Results from all workers are merged into a shards.Checkpoint, which may be
+saved to a file; a coordinator started with an existing checkpoint file only
+hands out the shards not yet completed. Each worker's throughput is available
+from status() and is reported periodically while the search runs.
+
+From the command line, start a coordinator, then workers on each machine:
+
+    $ python -m enigma.cluster coordinator --port 6174 --checkpoint m4.json \\
+          --rotor-count 4 CIPHERTEXT
+    $ python -m enigma.cluster worker --model quadgrams.bin --processes 8 \\
+          coordinator-host:6174
+
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import multiprocessing
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from .ngram import NgramModel, text_to_indices, indices_to_text
+from .search import DEFAULT_CHUNK_SIZE, SearchStats
+from .shards import (Checkpoint, Keyspace, format_result, search_shard,
+                     ShardError, DEFAULT_CHECKPOINT_INTERVAL)
+
+
+class ClusterError(Exception):
+    pass
+
+
+# Number of shards reserved for a worker at a time:
+DEFAULT_BATCH_SIZE = 4
+
+# Seconds of silence after which a worker is considered dead. A worker is
+# silent while it searches a shard, so this should exceed the time to search
+# one (26**3 starts for three rotors, 26**4 for M4); a worker that overruns it
+# loses its reserved shards to the queue, reconnects and carries on:
+DEFAULT_TIMEOUT = 600.0
+
+# Seconds a worker waits before asking again when no shard is available:
+WAIT_SECONDS = 0.5
+
+# Seconds the coordinator keeps serving after the search is complete, so that
+# connected workers can be told it is done:
+LINGER_SECONDS = 5.0
+
+
+def model_digest(model):
+    """Return a digest of an n-gram model's table, used to check that every
+    worker scores with the same model.
+
+    """
+    return hashlib.sha256(memoryview(model.table).cast('B')).hexdigest()
+
+
+class _Worker:
+    """The coordinator's record of one connected worker."""
+
+    def __init__(self, number, name, address):
+        self.number = number
+        self.name = name
+        self.address = address
+        self.reserved = collections.deque()
+        self.active = None
+        self.units = 0
+        self.trials = 0
+        self.started = time.monotonic()
+
+    def status(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            'worker': self.number,
+            'name': self.name,
+            'address': self.address,
+            'active': self.active,
+            'reserved': len(self.reserved),
+            'units': self.units,
+            'trials': self.trials,
+            'trials_per_second': self.trials / elapsed if elapsed else 0.0,
+        }
+
+
+class Coordinator:
+    """Hands out the shards of a search to workers and merges their results."""
+
+    def __init__(self, ciphertext, keyspace, top_k=10, checkpoint=None,
+            start=0, stop=None, batch_size=DEFAULT_BATCH_SIZE,
+            chunk_size=DEFAULT_CHUNK_SIZE, bound=None, expected_digest=None,
+            checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        """Prepare a search of the shards numbered start up to but not
+        including stop.
+
+        checkpoint - as for shards.sharded_search()
+
+        batch_size - the number of shards reserved for a worker at a time
+
+        expected_digest - if given, workers whose model does not have this
+        digest (see model_digest()) are refused
+
+        The remaining parameters are as for shards.sharded_search().
+
+        """
+        if batch_size < 1:
+            raise ClusterError('batch_size must be at least 1')
+        self.ciphertext = indices_to_text(text_to_indices(ciphertext))
+        self.keyspace = keyspace
+        if not isinstance(checkpoint, Checkpoint):
+            checkpoint = Checkpoint(keyspace, self.ciphertext, top_k,
+                                    checkpoint)
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.expected_digest = expected_digest
+        self.checkpoint_interval = checkpoint_interval
+        self.job = {
+            'ciphertext': self.ciphertext,
+            'keyspace': keyspace.description(),
+            'top_k': top_k,
+            'chunk_size': chunk_size,
+            'bound': bound,
+        }
+
+        stop = len(keyspace) if stop is None else min(stop, len(keyspace))
+        self.queue = collections.deque(n for n in range(start, stop)
+                                       if n not in checkpoint.completed)
+        self.remaining = len(self.queue)
+        self.workers = {}
+        self.steals = 0
+        self.requeued = 0
+        self._numbers = iter(range(1, sys.maxsize))
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._last_save = time.monotonic()
+        self._started = time.monotonic()
+        self._trials = 0
+        if not self.remaining:
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Wait until every shard is complete. Returns True if it is."""
+        return self._done.wait(timeout)
+
+    def register(self, name, address=None, digest=None):
+        """Add a worker. Returns its number."""
+        if (self.expected_digest is not None and
+                digest != self.expected_digest):
+            raise ClusterError('worker %s has a different n-gram model' % name)
+        with self._lock:
+            worker = _Worker(next(self._numbers), name, address)
+            self.workers[worker.number] = worker
+            return worker.number
+
+    def next_unit(self, number):
+        """Return the next shard number for a worker, or None if there is
+        nothing for it to do at the moment.
+
+        """
+        with self._lock:
+            worker = self.workers[number]
+            if worker.active is not None:
+                raise ClusterError('worker %d has not finished shard %d' %
+                                   (number, worker.active))
+            if not worker.reserved:
+                self._refill(worker)
+            if worker.reserved:
+                worker.active = worker.reserved.popleft()
+            return worker.active
+
+    def _refill(self, worker):
+        for _ in range(min(self.batch_size, len(self.queue))):
+            worker.reserved.append(self.queue.popleft())
+        if worker.reserved:
+            return
+
+        # steal the newer half of the longest reservation
+        victim = max(self.workers.values(), key=lambda w: len(w.reserved))
+        count = (len(victim.reserved) + 1) // 2
+        if count:
+            stolen = [victim.reserved.pop() for _ in range(count)]
+            worker.reserved.extend(reversed(stolen))
+            self.steals += 1
+
+    def complete(self, number, unit, results, counts):
+        """Record a worker's results for the shard it was given."""
+        with self._lock:
+            worker = self.workers[number]
+            if worker.active != unit:
+                raise ClusterError('worker %d was not searching shard %d' %
+                                   (number, unit))
+            worker.active = None
+            worker.units += 1
+            worker.trials += counts.get('trials', 0)
+            self._trials += counts.get('trials', 0)
+            if unit not in self.checkpoint.completed:
+                self.checkpoint.add(unit, [tuple(r) for r in results], counts)
+                self.remaining -= 1
+
+            now = time.monotonic()
+            if self.remaining == 0 or \
+                    now - self._last_save >= self.checkpoint_interval:
+                self.checkpoint.save()
+                self._last_save = now
+            if self.remaining == 0:
+                self._done.set()
+
+    def lost(self, number):
+        """Remove a worker, returning its shards to the shared queue."""
+        with self._lock:
+            worker = self.workers.pop(number, None)
+            if worker is None:
+                return
+            units = list(worker.reserved)
+            if worker.active is not None:
+                units.insert(0, worker.active)
+            self.queue.extendleft(reversed(units))
+            self.requeued += len(units)
+
+    def status(self):
+        """Return a dictionary describing the progress of the search and the
+        throughput of each worker.
+
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            return {
+                'remaining': self.remaining,
+                'queued': len(self.queue),
+                'completed': len(self.checkpoint.completed),
+                'steals': self.steals,
+                'requeued': self.requeued,
+                'trials_per_second': self._trials / elapsed if elapsed else
+                                     0.0,
+                'workers': [w.status() for w in self.workers.values()],
+            }
+
+    def results(self):
+        """Return the merged results, as for shards.Checkpoint.results()."""
+        with self._lock:
+            return self.checkpoint.results()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        self.timeout = self.server.worker_timeout
+        super().setup()
+
+    def send(self, message):
+        self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        number = None
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    reply = self.dispatch(coordinator, number, request)
+                except (ClusterError, ValueError, KeyError, TypeError) as ex:
+                    self.send({'error': str(ex)})
+                    break
+                if number is None and 'worker' in reply:
+                    number = reply['worker']
+                self.send(reply)
+        except OSError:
+            pass
+        finally:
+            if number is not None:
+                coordinator.lost(number)
+
+    def dispatch(self, coordinator, number, request):
+        op = request['op']
+        if op == 'status':
+            return coordinator.status()
+        if op == 'hello':
+            if number is not None:
+                raise ClusterError('already registered')
+            number = coordinator.register(request.get('name'),
+                                          '%s:%d' % self.client_address[:2],
+                                          request.get('model'))
+            return {'worker': number, 'job': coordinator.job}
+        if number is None:
+            raise ClusterError('not registered')
+        if op == 'next':
+            if coordinator.done:
+                return {'done': True}
+            unit = coordinator.next_unit(number)
+            return {'wait': WAIT_SECONDS} if unit is None else {'unit': unit}
+        if op == 'result':
+            coordinator.complete(number, request['unit'], request['results'],
+                                 request['stats'])
+            return {'ok': True}
+        raise ClusterError('unknown op: %s' % op)
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    """A TCP server for a Coordinator; one thread per worker connection."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, coordinator, worker_timeout=DEFAULT_TIMEOUT):
+        self.coordinator = coordinator
+        self.worker_timeout = worker_timeout
+        super().__init__(address, _Handler)
+
+
+def serve(coordinator, host='', port=0, worker_timeout=DEFAULT_TIMEOUT,
+          report=None, report_interval=10.0, ready=None):
+    """Run a coordinator's server until the search is complete.
+
+    report - an optional function called with coordinator.status() every
+    report_interval seconds
+
+    ready - an optional function called with the server's (host, port) once it
+    is listening, e.g. to start workers when port is 0
+
+    Returns the merged results.
+
+    """
+    with CoordinatorServer((host, port), coordinator, worker_timeout) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        if ready is not None:
+            ready(server.server_address)
+        try:
+            while not coordinator.wait(report_interval):
+                if report is not None:
+                    report(coordinator.status())
+            deadline = time.monotonic() + LINGER_SECONDS
+            while coordinator.workers and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            server.shutdown()
+            thread.join()
+            coordinator.checkpoint.save()
+    return coordinator.results()
+
+
+class _ConnectionLost(ClusterError):
+    pass
+
+
+class _Connection:
+    """A worker's connection to the coordinator."""
+
+    def __init__(self, address, timeout=None):
+        self.sock = socket.create_connection(address, timeout)
+        self.rfile = self.sock.makefile('rb')
+
+    def request(self, **message):
+        try:
+            self.sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            line = self.rfile.readline()
+        except ConnectionError as ex:
+            raise _ConnectionLost('connection to coordinator lost: %s' % ex)
+        if not line:
+            raise _ConnectionLost('connection closed by coordinator')
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise ClusterError(reply['error'])
+        return reply
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+def run_worker(address, model, name=None, timeout=None):
+    """Search shards handed out by the coordinator at address, a (host, port)
+    tuple, until the search is done.
+
+    model - the NgramModel used to score; it must be the same as the other
+    workers'
+
+    If the coordinator has dropped the connection by the time a shard's results
+    are sent (because the search took longer than its worker_timeout), the
+    results are discarded, as the shard has been requeued, and the worker
+    reconnects.
+
+    Returns the number of shards searched.
+
+    """
+    name = name or socket.gethostname()
+    connection = None
+    units = 0
+    try:
+        while True:
+            if connection is None:
+                connection = _Connection(address, timeout)
+                reply = connection.request(op='hello', name=name,
+                                           model=model_digest(model))
+                job = reply['job']
+                keyspace = Keyspace(**job['keyspace'])
+
+            reply = connection.request(op='next')
+            if reply.get('done'):
+                return units
+            if 'wait' in reply:
+                time.sleep(reply['wait'])
+                continue
+
+            stats = SearchStats()
+            results = search_shard(job['ciphertext'], model, keyspace,
+                                   reply['unit'], top_k=job['top_k'],
+                                   chunk_size=job['chunk_size'],
+                                   bound=job['bound'], stats=stats)
+            try:
+                connection.request(op='result', unit=reply['unit'],
+                                   results=results, stats=stats.as_dict())
+            except _ConnectionLost:
+                connection.close()
+                connection = None
+                continue
+            units += 1
+    finally:
+        if connection is not None:
+            connection.close()
+
+
+def _worker_process(address, model_path, name):
+    model = NgramModel.load(model_path)
+    try:
+        run_worker(address, model, name)
+    finally:
+        model.close()
+
+
+def run_workers(address, model_path, processes=None, name=None):
+    """Run several worker processes on this machine, each loading the model
+    from model_path. processes None means one per CPU. Returns when all of
+    them have finished.
+
+    """
+    name = name or socket.gethostname()
+    workers = [multiprocessing.Process(target=_worker_process,
+                                       args=(address, model_path,
+                                             '%s/%d' % (name, n)))
+               for n in range(processes or multiprocessing.cpu_count())]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def _address(text):
+    host, sep, port = text.rpartition(':')
+    try:
+        return (host if sep else 'localhost'), int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid address: %s' % text)
+
+
+def _report(status):
+    lines = ['%d shards remaining, %d queued, %d steals, %d requeued, '
+             '%.0f trials/s' % (status['remaining'], status['queued'],
+                                status['steals'], status['requeued'],
+                                status['trials_per_second'])]
+    for w in status['workers']:
+        lines.append('  %3d %-20s %6d shards %10.0f trials/s' % (
+                     w['worker'], w['name'], w['units'],
+                     w['trials_per_second']))
+    sys.stderr.write('\n'.join(lines) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coord = commands.add_parser('coordinator', help='hand out shards')
+    coord.add_argument('ciphertext', help='the ciphertext to attack')
+    coord.add_argument('--host', default='', help='address to listen on')
+    coord.add_argument('--port', type=int, default=6174,
+            help='port to listen on [default: %(default)s]')
+    coord.add_argument('-c', '--checkpoint',
+            help='checkpoint file; an existing one is resumed')
+    coord.add_argument('-r', '--rotor-count', type=int, choices=[3, 4],
+            default=3, help='3 or 4 rotors [default: %(default)s]')
+    coord.add_argument('--rotors', help='stepping rotors to choose from '
+            '[default: all]')
+    coord.add_argument('--reflectors', help='reflectors to try '
+            '[default: B C, or B-Thin C-Thin for 4 rotors]')
+    coord.add_argument('-p', '--plugboard', help='fixed plugboard settings')
+    coord.add_argument('-k', '--top-k', type=int, default=10,
+            help='number of results to keep [default: %(default)s]')
+    coord.add_argument('-m', '--model',
+            help='n-gram model file; workers with a different model are '
+                 'refused')
+    coord.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='shards reserved per worker [default: %(default)s]')
+    coord.add_argument('--interval', type=float, default=10.0,
+            help='seconds between status reports [default: %(default)s]')
+
+    worker = commands.add_parser('worker', help='search shards')
+    worker.add_argument('address', type=_address, help='coordinator HOST:PORT')
+    worker.add_argument('-m', '--model', required=True,
+            help='n-gram model file (see ngram.NgramModel.save)')
+    worker.add_argument('-j', '--processes', type=int, default=None,
+            help='worker processes [default: one per CPU]')
+    worker.add_argument('--name', help='worker name [default: host name]')
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        run_workers(args.address, args.model, args.processes, args.name)
+        return
+
+    digest = None
+    if args.model:
+        model = NgramModel.load(args.model)
+        digest = model_digest(model)
+        model.close()
+    try:
+        keyspace = Keyspace(args.rotor_count,
+                rotors=args.rotors.split() if args.rotors else None,
+                reflectors=args.reflectors.split() if args.reflectors else None,
+                plugboard_settings=args.plugboard)
+        coordinator = Coordinator(args.ciphertext, keyspace, args.top_k,
+                                  args.checkpoint, batch_size=args.batch_size,
+                                  expected_digest=digest)
+    except (ShardError, ClusterError) as ex:
+        parser.error(str(ex))
+
+    results = serve(coordinator, args.host, args.port, report=_report,
+                    report_interval=args.interval)
+    for result in results:
+        print(format_result(keyspace, result))
+
+
+if __name__ == '__main__':
+    main()
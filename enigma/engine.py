@@ -0,0 +1,205 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains a stateless, table driven Enigma engine.
+
+EnigmaMachine objects change their rotor state on every key press, so one
+machine must not be shared between threads. The encrypt() function in this
+module is a pure function instead: the key settings are compiled once into an
+immutable CompiledKey object of lookup tables (cached and shared by all
+callers), and all state for a call lives in local variables. It may therefore be
+called concurrently from any number of threads without locks, and scales across
+cores on free-threaded Python builds.
+
+"""
+
+import functools
+
+from .machine import EnigmaError, KEYBOARD_CHARS, KEYBOARD_SET
+from .rotors.tables import entry_tables, exit_tables, folded_reflector_tables
+from .spec import MachineSpec
+from .text import count_invalid, keyboard_text, LETTERS_TO_NUMBERS
+
+
+# The number of compiled keys kept by compile_key():
+COMPILE_CACHE_SIZE = 256
+
+
+def normalize(text, replace_char='X'):
+    """Return text as a bytes object of letter numbers (0-25), upper casing and
+    replacing or dropping characters exactly as EnigmaMachine.process_text
+    does.
+
+    """
+    if replace_char and replace_char not in KEYBOARD_SET and \
+            count_invalid(text):
+        raise EnigmaError('illegal key press %s' % replace_char)
+    data = keyboard_text(text, replace_char).encode('ascii')
+    return data.translate(LETTERS_TO_NUMBERS)
+
+
+def notch_mask(rotor):
+    """Return an integer with bit n set if the rotor's notch is over the pawl
+    when the rotor is at internal position n.
+
+    """
+    mask = 0
+    for letter in rotor.step_set:
+        mask |= 1 << rotor.display_map[letter]
+    return mask
+
+
+def run(tables, pl, pm, pr, data):
+    """Encrypt a sequence of letter numbers. This is the inner loop shared by
+    all table driven engines, so all of its state is kept in local variables.
+
+    tables - a tuple (l_in, l_out, m_in, m_out, r_in, r_out, reflector,
+    plugboard, middle_mask, right_mask). The first six are tuples of 26
+    translation tables, one per rotor position, from rotors.tables; reflector
+    and plugboard are single translation tables; the masks are notch masks as
+    returned by notch_mask().
+
+    pl, pm, pr - the internal positions of the left, middle and right rotors
+
+    data - a sequence of letter numbers (0-25)
+
+    Returns a tuple (result, pl, pm, pr) where result is a bytearray of
+    uppercase ASCII letters and the remaining items are the final rotor
+    positions.
+
+    """
+    l_in, l_out, m_in, m_out, r_in, r_out, refl, plug, mask_m, mask_r = tables
+
+    result = bytearray(len(data))
+    for k, c in enumerate(data):
+        # step the rotors
+        if (mask_m >> pm) & 1:
+            pl = (pl + 1) % 26
+            pm = (pm + 1) % 26
+        elif (mask_r >> pr) & 1:
+            pm = (pm + 1) % 26
+        pr = (pr + 1) % 26
+
+        # run the signal through the machine
+        c = plug[c]
+        c = l_in[pl][m_in[pm][r_in[pr][c]]]
+        c = refl[c]
+        c = r_out[pr][m_out[pm][l_out[pl][c]]]
+        result[k] = plug[c] + 65
+
+    return result, pl, pm, pr
+
+
+class CompiledKey:
+    """The immutable lookup tables for one key (rotor order, ring settings,
+    reflector and plugboard). Instances hold no rotor positions and may be
+    shared freely between threads.
+
+    """
+    __slots__ = ('rotor_count', 'rings', 'rotor_tables', 'reflector_tables',
+                 'plugboard', 'middle_mask', 'right_mask')
+
+    def __init__(self, machine):
+        """Compile the key of an EnigmaMachine. Only the machine's settings are
+        used; its rotor positions are ignored.
+
+        """
+        rotors = machine.rotors
+        self.rotor_count = machine.rotor_count
+        self.rings = tuple(r.ring_setting for r in rotors)
+
+        reflector = machine.reflector
+        if self.rotor_count == 4:
+            self.reflector_tables = folded_reflector_tables(
+                    reflector.wiring_str, reflector.pos, rotors[0].wiring_str)
+        else:
+            table = entry_tables(reflector.wiring_str)[reflector.pos]
+            self.reflector_tables = (table,) * 26
+
+        self.rotor_tables = tuple((entry_tables(r.wiring_str),
+                                   exit_tables(r.wiring_str))
+                                  for r in rotors[-3:])
+        self.plugboard = bytes(machine.plugboard.wiring_map)
+        self.middle_mask = notch_mask(rotors[-2])
+        self.right_mask = notch_mask(rotors[-1])
+
+    def positions(self, display):
+        """Convert an operator display string into a tuple of internal rotor
+        positions, one per rotor, left to right.
+
+        """
+        if len(display) != self.rotor_count:
+            raise EnigmaError("Incorrect length for display value")
+
+        positions = []
+        for c, ring in zip(display.upper(), self.rings):
+            if c not in KEYBOARD_SET:
+                raise EnigmaError("bad display value %s" % display)
+            positions.append((ord(c) - ord('A') - ring) % 26)
+        return tuple(positions)
+
+    def display(self, positions):
+        """Convert a tuple of internal rotor positions into a display string."""
+        return ''.join(KEYBOARD_CHARS[(p + ring) % 26]
+                       for p, ring in zip(positions, self.rings))
+
+    def tables(self, positions):
+        """Return the tables argument for run() when the rotors are at the
+        given internal positions.
+
+        """
+        (l_in, l_out), (m_in, m_out), (r_in, r_out) = self.rotor_tables
+        refl = self.reflector_tables[positions[0] if self.rotor_count == 4
+                                     else 0]
+        return (l_in, l_out, m_in, m_out, r_in, r_out, refl, self.plugboard,
+                self.middle_mask, self.right_mask)
+
+    def process(self, positions, data):
+        """Encrypt letter numbers starting at the given internal positions.
+
+        Returns a tuple (result, positions) where result is a bytearray of
+        uppercase ASCII letters and positions are the final rotor positions.
+
+        """
+        result, pl, pm, pr = run(self.tables(positions), *positions[-3:],
+                                 data=data)
+        return result, positions[:-3] + (pl, pm, pr)
+
+
+@functools.lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile(spec):
+    return CompiledKey(spec.create_machine())
+
+
+def compile_key(spec):
+    """Return the CompiledKey for a key specification.
+
+    spec - a MachineSpec, or a dictionary of keyword arguments for
+    EnigmaMachine.from_key_sheet (for example as returned by
+    keyfile.get_daily_settings)
+
+    Compiled keys are cached by their normalized MachineSpec, so repeated calls
+    with the same key are cheap however it is spelled.
+
+    """
+    return _compile(MachineSpec.coerce(spec))
+
+
+def encrypt(spec, start, text, replace_char='X'):
+    """Encrypt or decrypt text; a thread-safe equivalent of:
+
+        machine = EnigmaMachine.from_key_sheet(**spec)
+        machine.set_display(start)
+        return machine.process_text(text, replace_char)
+
+    spec - the key; a MachineSpec or a settings dictionary (see compile_key())
+
+    start - the starting rotor positions as a display string, e.g. 'WXC'
+
+    text, replace_char - as for EnigmaMachine.process_text
+
+    """
+    key = compile_key(spec)
+    result, _ = key.process(key.positions(start), normalize(text, replace_char))
+    return result.decode('ascii')
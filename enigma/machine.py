@@ -6,11 +6,15 @@
 simulation.
 
 """
+import copy
 import string
 
 from .rotors.factory import create_rotor, create_reflector
-from .plugboard import Plugboard
+from .rotors.rotor import Rotor, _standard_rotor
+from .rotors.tables import folded_reflector_tables
+from .plugboard import Plugboard, _restore_plugboard
 from .keyfile import get_daily_settings
+from .text import keyboard_text
 
 
 class EnigmaError(Exception):
@@ -21,6 +25,39 @@ class EnigmaError(Exception):
 KEYBOARD_CHARS = string.ascii_uppercase
 KEYBOARD_SET = set(KEYBOARD_CHARS)
 
+# An alternative implementation of EnigmaMachine.process_text, or None to use
+# the reference implementation; see backends.set_backend().
+_backend = None
+
+
+def parse_ring_settings(ring_settings, num_rotors):
+    """Convert ring settings in any of the forms accepted by
+    EnigmaMachine.from_key_sheet into a list of integers.
+
+    ring_settings - a list/tuple of integers, a string of space separated
+    letters or 1-based numbers, or None for all zeros
+
+    num_rotors - the number of rotors the settings are for
+
+    """
+    if ring_settings is None:
+        ring_settings = [0] * num_rotors
+    elif isinstance(ring_settings, str):
+        strings = ring_settings.split()
+        ring_settings = []
+        for s in strings:
+            if s.isalpha():
+                ring_settings.append(ord(s.upper()) - ord('A'))
+            elif s.isdigit():
+                ring_settings.append(int(s) - 1)
+            else:
+                raise EnigmaError('invalid ring setting: %s' % s)
+
+    if num_rotors != len(ring_settings):
+        raise EnigmaError("# of rotors doesn't match # of ring settings")
+
+    return list(ring_settings)
+
 
 class EnigmaMachine:
     """Top-level class for the Enigma Machine simulation."""
@@ -52,6 +89,24 @@ class EnigmaMachine:
         self.reflector = reflector
         self.plugboard = plugboard
 
+    @property
+    def _folded_reflector(self):
+        """On the Kriegsmarine M4 the leftmost rotor never steps (see
+        _step_rotors), so for any given position it and the thin reflector act
+        as a single fixed reflector. They are folded into one lookup table per
+        position of the leftmost rotor, saving two rotor passes per key press.
+
+        The tables are cached and shared by all machines; they are looked up
+        from the current reflector and leftmost rotor, so changes to either
+        take effect at once. None for 3 rotor machines.
+
+        """
+        if self.rotor_count != 4:
+            return None
+        return folded_reflector_tables(self.reflector.wiring_str,
+                                       self.reflector.pos,
+                                       self.rotors[0].wiring_str)
+
     @classmethod
     def from_key_sheet(cls, rotors='I II III', ring_settings=None,
             reflector='B', plugboard_settings=None):
@@ -91,21 +146,7 @@ class EnigmaMachine:
         if num_rotors not in (3, 4):
             raise EnigmaError("invalid rotors list size")
 
-        if ring_settings is None:
-            ring_settings = [0] * num_rotors
-        elif isinstance(ring_settings, str):
-            strings = ring_settings.split()
-            ring_settings = []
-            for s in strings:
-                if s.isalpha():
-                    ring_settings.append(ord(s.upper()) - ord('A'))
-                elif s.isdigit():
-                    ring_settings.append(int(s) - 1)
-                else:
-                    raise EnigmaError('invalid ring setting: %s' % s)
-
-        if num_rotors != len(ring_settings):
-            raise EnigmaError("# of rotors doesn't match # of ring settings")
+        ring_settings = parse_ring_settings(ring_settings, num_rotors)
 
         # assemble the machine
         rotor_list = [create_rotor(r[0], r[1]) for r in zip(rotors, ring_settings)]
@@ -129,6 +170,42 @@ class EnigmaMachine:
         args = get_daily_settings(fp, day)
         return cls.from_key_sheet(**args)
 
+    def __copy__(self):
+        """Returns an independent machine with the same settings and rotor
+        positions. This is much cheaper than building a new machine with
+        from_key_sheet().
+
+        """
+        return type(self)([copy.copy(r) for r in self.rotors],
+                          copy.copy(self.reflector),
+                          copy.copy(self.plugboard))
+
+    def __reduce_ex__(self, protocol):
+        """Support for pickling.
+
+        A machine built from standard rotors and reflectors pickles as its
+        rotor and reflector names, ring settings, rotor positions and plugboard
+        pairs, a few dozen bytes in all. On load it is rebuilt from tables
+        shared by all machines unpickled with the same settings. Other machines,
+        including instances of subclasses and machines with attributes of their
+        own, pickle their class and every attribute as usual.
+
+        """
+        parts = list(self.rotors) + [self.reflector]
+        if (not self._is_plain() or
+                not all(part._is_standard() for part in parts)):
+            return super().__reduce_ex__(protocol)
+
+        rotations = tuple(r.rotations for r in parts)
+        args = (' '.join(r.name for r in self.rotors),
+                self.reflector.name,
+                bytes(r.ring_setting for r in parts),
+                bytes(r.pos for r in parts),
+                ''.join(self.plugboard.army_str().split()))
+        if any(rotations):
+            args += (rotations, )
+        return (_restore_machine, args)
+
     def set_display(self, val):
         """Sets the rotor operator windows to 'val'.
 
@@ -212,12 +289,18 @@ class EnigmaMachine:
         """
         pos = self.plugboard.signal(signal_num)
 
-        for rotor in reversed(self.rotors):
-            pos = rotor.signal_in(pos)
-
-        pos = self.reflector.signal_in(pos)
-
-        for rotor in self.rotors:
+        rotors = self.rotors
+        if self.rotor_count == 4:
+            rotors = rotors[1:]
+            for rotor in reversed(rotors):
+                pos = rotor.signal_in(pos)
+            pos = self._folded_reflector[self.rotors[0].pos][pos]
+        else:
+            for rotor in reversed(rotors):
+                pos = rotor.signal_in(pos)
+            pos = self.reflector.signal_in(pos)
+
+        for rotor in rotors:
             pos = rotor.signal_out(pos)
 
         return self.plugboard.signal(pos)
@@ -233,21 +316,53 @@ class EnigmaMachine:
         it with replace_char; if replace_char is None the character is dropped
         from the message
 
+        The work is done by the backend chosen with backends.set_backend(); by
+        default, by calling key_press() for each character. The fast backends
+        do not call key_press(), so they are only used for plain machines (see
+        _is_plain()); subclasses, machines with overridden or instrumented
+        methods, and machines with custom rotor or plugboard classes always use
+        key_press().
+
         """
-        result = []
-        for key in text:
-            c = key.upper()
+        if _backend is not None and self._is_plain():
+            return _backend(self, text, replace_char)
 
-            if c not in KEYBOARD_SET:
-                if replace_char:
-                    c = replace_char
-                else:
-                    continue    # ignore it
+        return self._process_keys(text, replace_char)
 
-            result.append(self.key_press(c))
+    def _process_keys(self, text, replace_char='X'):
+        """The reference implementation of process_text: key_press() for
+        each character.
 
-        return ''.join(result)
+        """
+        return ''.join(map(self.key_press, keyboard_text(text, replace_char)))
+
+    def _is_plain(self):
+        """Return True if the machine, its rotors, reflector and plugboard
+        are all instances of the base classes, with no methods replaced on the
+        instance. Only plain machines may be pickled compactly or run by the
+        fast backends, which reproduce the base class behavior.
+
+        """
+        return (type(self) is EnigmaMachine and
+                self.__dict__.keys() == _ATTRIBUTES and
+                type(self.plugboard) is Plugboard and
+                type(self.reflector) is Rotor and
+                all(type(r) is Rotor for r in self.rotors))
 
     def get_rotor_counts(self):
         """Return the rotor rotation counts as a list of integers."""
         return [r.rotations for r in self.rotors]
+
+
+# The attributes set by EnigmaMachine.__init__; machines with others are not
+# pickled in the compact form:
+_ATTRIBUTES = frozenset(['rotors', 'rotor_count', 'reflector', 'plugboard'])
+
+
+def _restore_machine(rotors, reflector, rings, positions, plugs,
+                     rotations=None):
+    parts = rotors.split() + [reflector]
+    rotations = rotations or (0, ) * len(parts)
+    parts = [_standard_rotor(*args)
+             for args in zip(parts, rings, positions, rotations)]
+    return EnigmaMachine(parts[:-1], parts[-1], _restore_plugboard(plugs))
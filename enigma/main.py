@@ -8,11 +8,21 @@ process text.
 """
 
 import argparse
+import contextlib
+import cProfile
 import sys
+import time
+import tracemalloc
 
 from .machine import EnigmaMachine, EnigmaError
 from .rotors import RotorError
-from .keyfile import KeyFileError
+from .keyfile import KeyFileError, get_daily_settings
+from .text import format_groups, keyboard_text, process_passthrough
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
 
 
 PROG_DESC = 'Encrypt/decrypt text according to Enigma machine key settings'
@@ -34,13 +44,68 @@ Examples:
     $ %(prog)s -r III IV V -i 1 2 3 -p AB CD EF GH IJ KL MN -u B -s XYZ
     $ %(prog)s -r Beta III IV V -i A B C D -p 1/2 3/4 5/6 -u B-Thin -s WXYZ
 
+Use --groups to write the output in groups of 5 letters, and --preserve to keep
+the spaces and punctuation of the input in place, encrypting only its letters.
+
+Use --stats to print a breakdown of where the time went to standard error, and
+--profile=FILE to save cProfile data for the run (view it with pstats or
+snakeviz).
+
 """
 
-def create_from_key_file(filename, day=None):
+class PhaseTimer:
+    """Accumulates wall clock time spent in named phases of a run."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def report(self, chars, fp, traced_peak=None):
+        """Write the phase times, throughput and peak memory use to fp.
+        traced_peak is the peak traced memory in bytes, if it was measured.
+
+        """
+        total = sum(self.phases.values())
+        fp.write('Phase                      Seconds      %\n')
+        for name, seconds in self.phases.items():
+            fp.write('%-24s %9.6f %6.1f\n' %
+                     (name, seconds, 100.0 * seconds / total if total else 0))
+        fp.write('%-24s %9.6f\n' % ('total', total))
+
+        seconds = self.phases.get('encryption', 0.0)
+        if seconds:
+            fp.write('Characters processed:    %d (%.0f chars/sec)\n' %
+                     (chars, chars / seconds))
+        else:
+            fp.write('Characters processed:    %d\n' % chars)
+
+        if traced_peak is not None:
+            fp.write('Peak traced memory:      %.1f KB\n' %
+                     (traced_peak / 1024))
+        if resource is not None:
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform != 'darwin':
+                maxrss *= 1024  # ru_maxrss is in KB on Linux, bytes on macOS
+            fp.write('Peak RSS:                %.1f MB\n' % (maxrss / 2 ** 20))
+
+
+def create_from_key_file(filename, day=None, timer=None):
     """Create an EnigmaMachine from a daily key sheet."""
 
-    with open(filename, 'r') as f:
-        return EnigmaMachine.from_key_file(f, day)
+    timer = timer or PhaseTimer()
+    with timer.phase('key file parsing'):
+        with open(filename, 'r') as f:
+            settings = get_daily_settings(f, day)
+    with timer.phase('machine construction'):
+        return EnigmaMachine.from_key_sheet(**settings)
 
 
 def create_from_args(parser, args):
@@ -63,7 +128,7 @@ def create_from_args(parser, args):
                                         reflector=args.reflector)
 
 
-def main():
+def main(argv=None):
 
     parser = argparse.ArgumentParser(description=PROG_DESC, epilog=HELP_EPILOG,
             formatter_class=argparse.RawDescriptionHelpFormatter)
@@ -90,10 +155,24 @@ def main():
             action='store_true',
             help=('if the input text contains chars not found on the enigma'
                   ' keyboard, delete them from the input'))
+    parser.add_argument('-P', '--preserve', default=False,
+            action='store_true',
+            help=('leave chars not found on the enigma keyboard in place in the'
+                  ' output; only letters are processed'))
+    parser.add_argument('-g', '--groups', type=int, nargs='?', const=5,
+            metavar='N',
+            help='write the output in groups of N letters [default N: 5]')
+    parser.add_argument('--groups-per-line', type=int, metavar='COUNT',
+            help='with --groups, start a new line every COUNT groups')
     parser.add_argument('-v', '--verbose', action='store_true', default=False,
             help='provide verbose output; include final rotor positions')
+    parser.add_argument('--stats', action='store_true', default=False,
+            help=('print time spent per phase, throughput and peak memory to'
+                  ' standard error'))
+    parser.add_argument('--profile', metavar='FILE',
+            help='save cProfile data for the run to FILE')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if args.key_file and (args.rotors or args.ring_settings or args.plugboard
             or args.reflector):
@@ -103,24 +182,63 @@ def main():
     if args.start is None:
         parser.error("Please specify a start position")
 
-    if args.key_file:
-        machine = create_from_key_file(args.key_file, args.day)
-    else:
-        machine = create_from_args(parser, args)
+    if args.preserve and args.groups:
+        parser.error("Please specify --preserve or --groups, but not both")
+    if args.groups is not None and args.groups < 1:
+        parser.error("Group size must be at least 1")
+    if args.groups_per_line is not None and (not args.groups or
+                                             args.groups_per_line < 1):
+        parser.error("--groups-per-line needs --groups and a count of at "
+                     "least 1")
+
+    timer = PhaseTimer() if args.stats else None
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        machine, text, count = run(parser, args, timer)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+
+    if timer is not None:
+        # tracemalloc slows everything down, so memory is measured in a
+        # second, untimed pass over the same input:
+        machine.set_display(args.start)
+        tracemalloc.start()
+        try:
+            process(machine, text, args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        timer.report(count, sys.stderr, peak)
+
+
+def run(parser, args, timer=None):
+    """Build the machine, process the text and print the results. Returns the
+    machine, the input text and the number of characters processed.
+
+    """
+    timer = timer or PhaseTimer()
 
-    if args.text:
-        text = args.text
-    elif args.file:
-        with open(args.file, 'r') as f:
-            text = f.read()
+    if args.key_file:
+        machine = create_from_key_file(args.key_file, args.day, timer)
     else:
-        text = input('--> ')
-
-    replace_char = args.replace_char if not args.delete_chars else None
+        with timer.phase('machine construction'):
+            machine = create_from_args(parser, args)
+
+    with timer.phase('reading input'):
+        if args.text:
+            text = args.text
+        elif args.file:
+            with open(args.file, 'r') as f:
+                text = f.read()
+        else:
+            text = input('--> ')
 
     machine.set_display(args.start)
-
-    s = machine.process_text(text, replace_char=replace_char)
+    s, count = process(machine, text, args, timer)
 
     if args.verbose:
         print('Final rotor positions:', machine.get_display())
@@ -128,6 +246,33 @@ def main():
         print('Output:')
 
     print(s)
+    return machine, text, count
+
+
+def process(machine, text, args, timer=None):
+    """Normalize, encrypt and format text. Returns the output and the number of
+    characters processed.
+
+    """
+    timer = timer or PhaseTimer()
+    replace_char = args.replace_char if not args.delete_chars else None
+
+    if not args.preserve:
+        with timer.phase('normalization'):
+            text = keyboard_text(text, replace_char)
+
+    with timer.phase('encryption'):
+        if args.preserve:
+            s = process_passthrough(machine, text)
+        else:
+            s = machine.process_text(text)
+    count = len(s)
+
+    if args.groups:
+        with timer.phase('formatting'):
+            s = format_groups(s, args.groups, args.groups_per_line)
+
+    return s, count
 
 
 def console_main():
@@ -0,0 +1,192 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains optional instrumentation for EnigmaMachine objects.
+
+instrument() replaces the key_press, _step_rotors and process_text methods of
+one machine object with versions that also record:
+
+    key_presses - keys pressed, including those pressed by process_text
+    double_steps - times the middle rotor stepped because of its own notch
+    chars_replaced - characters process_text replaced with replace_char
+    chars_dropped - characters process_text dropped
+    process_text_calls - calls to process_text
+
+and a histogram of the time spent in each process_text call. Instrumented
+machines always process text by pressing keys, whatever backend is selected
+(see backends.py), so the counts are exact. The replacement methods are stored on the instance, so machines that are not instrumented run
+the original class methods and pay nothing at all; uninstrument() removes them
+again. Copies and unpickled machines are never instrumented.
+
+A Metrics object may be shared by any number of machines and threads. Its
+contents are available as a dictionary (as_dict()) or in the Prometheus text
+exposition format (prometheus()).
+
+"""
+
+import bisect
+import threading
+import time
+import types
+
+from .machine import EnigmaMachine
+from .text import count_invalid
+
+
+# Upper bounds of the process_text timing histogram buckets, in seconds:
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0,
+                   5.0)
+
+COUNTERS = (
+    ('key_presses', 'Keys pressed.'),
+    ('double_steps', 'Middle rotor steps caused by its own notch.'),
+    ('chars_replaced', 'Characters replaced by process_text.'),
+    ('chars_dropped', 'Characters dropped by process_text.'),
+    ('process_text_calls', 'Calls to process_text.'),
+)
+
+
+class Histogram:
+    """A histogram of observed values with fixed bucket upper bounds."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)     # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Record one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def as_dict(self):
+        """Return the histogram as a dictionary. The bucket counts are
+        cumulative, keyed by upper bound, as in Prometheus.
+
+        """
+        cumulative = {}
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'), ), self.counts):
+            total += count
+            cumulative[bound] = total
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+
+class Metrics:
+    """Counters and timing histograms collected from instrumented machines."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys((name for name, _ in COUNTERS), 0)
+        self.process_text_seconds = Histogram(buckets)
+
+    def inc(self, name, n=1):
+        """Add n to a counter."""
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, seconds):
+        """Record the duration of one process_text call."""
+        with self._lock:
+            self.process_text_seconds.observe(seconds)
+
+    def as_dict(self):
+        """Return all metrics as a dictionary."""
+        with self._lock:
+            result = dict(self.counters)
+            result['process_text_seconds'] = \
+                    self.process_text_seconds.as_dict()
+        return result
+
+    def prometheus(self, prefix='enigma'):
+        """Return all metrics in the Prometheus text exposition format."""
+        data = self.as_dict()
+        lines = []
+        for name, help_text in COUNTERS:
+            metric = '%s_%s_total' % (prefix, name)
+            lines.append('# HELP %s %s' % (metric, help_text))
+            lines.append('# TYPE %s counter' % metric)
+            lines.append('%s %d' % (metric, data[name]))
+
+        metric = '%s_process_text_seconds' % prefix
+        hist = data['process_text_seconds']
+        lines.append('# HELP %s Time spent in process_text.' % metric)
+        lines.append('# TYPE %s histogram' % metric)
+        for bound, count in hist['buckets'].items():
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append('%s_bucket{le="%s"} %d' % (metric, le, count))
+        lines.append('%s_sum %r' % (metric, hist['sum']))
+        lines.append('%s_count %d' % (metric, hist['count']))
+        return '\n'.join(lines) + '\n'
+
+
+# The instrumented methods; each calls the original class method.
+
+def _key_press(self, key):
+    self._metrics.inc('key_presses')
+    return EnigmaMachine.key_press(self, key)
+
+
+def _step_rotors(self):
+    # the middle rotor double steps when its own notch is over the pawl
+    if self.rotors[-2].notch_over_pawl():
+        self._metrics.inc('double_steps')
+    EnigmaMachine._step_rotors(self)
+
+
+def _process_text(self, text, replace_char='X'):
+    metrics = self._metrics
+    metrics.inc('process_text_calls')
+    invalid = count_invalid(text)
+    if invalid:
+        metrics.inc('chars_replaced' if replace_char else 'chars_dropped',
+                    invalid)
+
+    start = time.perf_counter()
+    try:
+        # always the key_press loop: the fast backends would skip the
+        # instrumented key_press and _step_rotors
+        return EnigmaMachine._process_keys(self, text, replace_char)
+    finally:
+        metrics.observe(time.perf_counter() - start)
+
+
+_METHODS = {
+    'key_press': _key_press,
+    '_step_rotors': _step_rotors,
+    'process_text': _process_text,
+}
+
+
+def instrument(machine, metrics=None):
+    """Start collecting metrics from an EnigmaMachine.
+
+    metrics - the Metrics object to update; if None a new one is created
+
+    Returns the Metrics object.
+
+    """
+    if metrics is None:
+        metrics = Metrics()
+    machine._metrics = metrics
+    for name, method in _METHODS.items():
+        setattr(machine, name, types.MethodType(method, machine))
+    return metrics
+
+
+def uninstrument(machine):
+    """Stop collecting metrics from an EnigmaMachine, restoring the original
+    uninstrumented methods.
+
+    """
+    for name in _METHODS:
+        machine.__dict__.pop(name, None)
+    machine.__dict__.pop('_metrics', None)
+
+
+def is_instrumented(machine):
+    """Return True if instrument() has been called on machine."""
+    return '_metrics' in machine.__dict__
@@ -0,0 +1,240 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains the NgramModel class, which scores text against a table of n-gram
+log-probabilities. This is the basic building block for scoring-based attacks.
+
+The table for an n-gram model is a dense array of 26 ** n single precision
+floats, one per n-gram over the 26 letter keyboard alphabet. The n-gram
+consisting of letter numbers (c0, c1, ..., cn-1) is found at index
+c0 * 26 ** (n - 1) + c1 * 26 ** (n - 2) + ... + cn-1. N-grams never seen in the
+training corpus are given a floor value.
+
+Models can be saved to a compact binary file. That file consists of a 16 byte
+header followed by the table stored as little-endian float32 values. When such a
+file is loaded it is memory-mapped by default, so any number of worker processes
+loading the same file share a single copy of the table in the page cache.
+
+"""
+
+import array
+import math
+import mmap
+import struct
+import sys
+
+from .machine import KEYBOARD_CHARS
+
+
+class NgramError(Exception):
+    pass
+
+# The n-gram sizes we support; monograms through quadgrams:
+MIN_N = 1
+MAX_N = 4
+
+# Binary file header: magic, version, n, 2 pad bytes, floor value, table length
+FILE_MAGIC = b'ENGM'
+FILE_VERSION = 1
+HEADER = struct.Struct('<4sBB2xfI')
+
+# Translation tables to turn text into a string of letter numbers (0-25); any
+# byte that isn't an uppercase letter is deleted.
+_ALPHA_BYTES = KEYBOARD_CHARS.encode('ascii')
+_INDEX_TABLE = bytes.maketrans(_ALPHA_BYTES, bytes(range(26)))
+_DELETE_BYTES = bytes(b for b in range(256) if b not in _ALPHA_BYTES)
+
+
+def text_to_indices(text):
+    """Convert a string of text to a bytes object of letter numbers (0-25).
+
+    The text is converted to upper case first. Any character not on the Enigma
+    keyboard is dropped.
+
+    """
+    data = text.upper().encode('ascii', 'ignore')
+    return data.translate(_INDEX_TABLE, _DELETE_BYTES)
+
+
+def indices_to_text(indices):
+    """Convert an iterable of letter numbers (0-25) back to a string."""
+    return ''.join(KEYBOARD_CHARS[i] for i in indices)
+
+
+class NgramModel:
+    """An n-gram language model over the 26 letter Enigma keyboard alphabet.
+
+    Models are usually created by either training on a corpus with
+    from_corpus() or by loading a previously saved model with load().
+
+    """
+    def __init__(self, n, table, floor):
+        """Create a model from an existing table. Parameters are as follows:
+
+        n - the n-gram size, 1-4 inclusive
+
+        table - a sequence of 26 ** n floats, as described in the module
+        documentation. Normally an array.array('f') or a memoryview cast to
+        'f'.
+
+        floor - the log-probability assigned to n-grams that never occurred in
+        the training data.
+
+        """
+        if not (MIN_N <= n <= MAX_N):
+            raise NgramError('n must be between %d and %d' % (MIN_N, MAX_N))
+        if len(table) != 26 ** n:
+            raise NgramError('table must have %d entries' % 26 ** n)
+
+        self.n = n
+        self.table = table
+        self.floor = floor
+        self._mmap = None
+
+        # The best log-probability any single n-gram can contribute; this is
+        # useful when bounding the score of partially processed text.
+        self.max_log_prob = max(table)
+
+    @classmethod
+    def from_corpus(cls, corpus, n=4):
+        """Train a model on a corpus of text.
+
+        corpus - either a string, or an iterable of strings (e.g. an open text
+        file). N-grams spanning the boundary between two strings are counted,
+        so a file may be passed in directly. Characters not on the Enigma
+        keyboard are ignored.
+
+        n - the n-gram size, 1-4 inclusive
+
+        The log10 probability of each n-gram is stored in the table. Unseen
+        n-grams receive a floor value of log10(0.01 / total).
+
+        """
+        if not (MIN_N <= n <= MAX_N):
+            raise NgramError('n must be between %d and %d' % (MIN_N, MAX_N))
+
+        if isinstance(corpus, str):
+            corpus = [corpus]
+
+        size = 26 ** n
+        counts = array.array('d', bytes(8 * size))
+        tail = b''
+        for chunk in corpus:
+            data = tail + text_to_indices(chunk)
+            for idx in _window_indices(data, n):
+                counts[idx] += 1
+            tail = data[-(n - 1):] if n > 1 else b''
+
+        total = sum(counts)
+        if total == 0:
+            raise NgramError('corpus contains no %d-grams' % n)
+
+        floor = math.log10(0.01 / total)
+        table = array.array('f', (math.log10(c / total) if c else floor
+                                  for c in counts))
+        return cls(n, table, floor)
+
+    @classmethod
+    def load(cls, path, use_mmap=True):
+        """Load a model previously written by save().
+
+        path - the path to the model file
+
+        use_mmap - if True, the file is memory-mapped read-only instead of
+        being read into memory. Processes that load the same file then share
+        the table's pages. On big-endian hosts the table is always copied.
+
+        """
+        with open(path, 'rb') as fp:
+            header = fp.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise NgramError('truncated model file: %s' % path)
+
+            magic, version, n, floor, count = HEADER.unpack(header)
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                raise NgramError('not a model file: %s' % path)
+            if not (MIN_N <= n <= MAX_N) or count != 26 ** n:
+                raise NgramError('corrupt model file: %s' % path)
+
+            if use_mmap and sys.byteorder == 'little':
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                end = HEADER.size + 4 * count
+                if len(mm) < end:
+                    mm.close()
+                    raise NgramError('truncated model file: %s' % path)
+                view = memoryview(mm)
+                table = view[HEADER.size:end].cast('f')
+                model = cls(n, table, floor)
+                model._mmap = (mm, view)
+                return model
+
+            table = array.array('f')
+            try:
+                table.fromfile(fp, count)
+            except EOFError:
+                raise NgramError('truncated model file: %s' % path)
+            if sys.byteorder != 'little':
+                table.byteswap()
+            return cls(n, table, floor)
+
+    def save(self, path):
+        """Write the model to path in the binary format described in the module
+        documentation.
+
+        """
+        table = array.array('f', self.table)
+        if sys.byteorder != 'little':
+            table.byteswap()
+
+        with open(path, 'wb') as fp:
+            fp.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, self.n, self.floor,
+                                 len(table)))
+            table.tofile(fp)
+
+    def close(self):
+        """Release the memory map backing the table, if any. The model may not
+        be used after calling close().
+
+        """
+        if self._mmap is not None:
+            mm, view = self._mmap
+            self.table.release()
+            view.release()
+            mm.close()
+            self._mmap = None
+            self.table = None
+
+    def score(self, indices):
+        """Return the sum of the n-gram log-probabilities for a sequence of
+        letter numbers.
+
+        indices - a bytes, bytearray, array.array('B') or similar sequence of
+        integers in the range 0-25; i.e. decrypted text as produced by
+        text_to_indices().
+
+        """
+        return sum(map(self.table.__getitem__, _window_indices(indices, self.n)))
+
+    def score_text(self, text):
+        """Convenience method to score a string of text. Characters not on the
+        Enigma keyboard are ignored.
+
+        """
+        return self.score(text_to_indices(text))
+
+
+def _window_indices(seq, n):
+    """Return an iterable of table indices, one for every window of n letter
+    numbers in seq.
+
+    """
+    if n == 1:
+        return seq
+    if n == 2:
+        return (a * 26 + b for a, b in zip(seq, seq[1:]))
+    if n == 3:
+        return ((a * 26 + b) * 26 + c
+                for a, b, c in zip(seq, seq[1:], seq[2:]))
+    return (((a * 26 + b) * 26 + c) * 26 + d
+            for a, b, c, d in zip(seq, seq[1:], seq[2:], seq[3:]))
@@ -0,0 +1,310 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains the Permutation class, a compact immutable permutation of the 26
+wires, and helpers for working with many permutations at once.
+
+Every component of the Enigma is a permutation of the 26 wires: the plugboard,
+each rotor at each position, the reflector and the whole machine at a given
+rotor position. Cryptanalysis works with these directly: composing them,
+inverting them, finding their cycle structure and conjugating by a plugboard.
+
+A Permutation stores its mapping as a 26 byte bytes object, so composition is a
+single bytes.translate() call (see rotors.tables). Its inverse and cycle
+decomposition are computed on first use and cached.
+
+Permutations compose left to right: p.then(q) is the permutation "apply p, then
+apply q", i.e. p.then(q)[n] == q[p[n]].
+
+Many permutations can be packed end to end into one bytes object with pack();
+compose_batch() then composes all of them with a common permutation in a single
+translate() call.
+
+"""
+
+import copy
+
+from .rotors.tables import IDENTITY, make_table, entry_tables, exit_tables
+
+
+# Translates wire numbers 0-25 into the letters A-Z:
+_LETTERS = make_table(range(ord('A'), ord('A') + 26))
+
+
+class PermError(Exception):
+    pass
+
+
+class Permutation:
+    """An immutable permutation of the integers 0-25."""
+
+    __slots__ = ('_map', '_table', '_inverse', '_cycles')
+
+    def __init__(self, mapping):
+        """Create a permutation from a sequence of 26 distinct integers 0-25,
+        or a string of 26 distinct letters, where mapping[n] is the image of n.
+
+        A PermError is raised if mapping is not a permutation.
+
+        """
+        if isinstance(mapping, str):
+            mapping = [ord(c) - ord('A') for c in mapping.upper()]
+        try:
+            data = bytes(mapping)
+        except (TypeError, ValueError):
+            raise PermError('invalid permutation: %r' % (mapping, ))
+        if len(data) != 26 or set(data) != set(IDENTITY):
+            raise PermError('invalid permutation: %r' % (mapping, ))
+        self._init(data)
+
+    def _init(self, data):
+        self._map = data
+        self._table = None
+        self._inverse = None
+        self._cycles = None
+
+    @classmethod
+    def _from_bytes(cls, data):
+        # trusted constructor; data is a valid 26 byte permutation
+        perm = cls.__new__(cls)
+        perm._init(data)
+        return perm
+
+    @classmethod
+    def identity(cls):
+        """Return the identity permutation."""
+        return cls._from_bytes(IDENTITY)
+
+    @classmethod
+    def from_cycles(cls, cycles):
+        """Create a permutation from an iterable of disjoint cycles, each a
+        sequence of integers or a string of letters, e.g. ['AB', 'CDE']. Wires
+        not in any cycle are fixed.
+
+        """
+        mapping = list(IDENTITY)
+        seen = set()
+        for cycle in cycles:
+            if isinstance(cycle, str):
+                cycle = [ord(c) - ord('A') for c in cycle.upper()]
+            for i, n in enumerate(cycle):
+                if n in seen or not (0 <= n < 26):
+                    raise PermError('invalid cycles: %r' % (cycles, ))
+                seen.add(n)
+                mapping[n] = cycle[(i + 1) % len(cycle)]
+        return cls(mapping)
+
+    @classmethod
+    def from_rotor(cls, rotor, reverse=False):
+        """Return the permutation a rotor (or reflector) applies at its
+        current position: to a signal entering from the right, or from the left
+        if reverse is True.
+
+        """
+        tables = exit_tables if reverse else entry_tables
+        return cls._from_bytes(tables(rotor.wiring_str)[rotor.pos][:26])
+
+    @classmethod
+    def from_plugboard(cls, plugboard):
+        """Return the permutation of a Plugboard."""
+        return cls._from_bytes(bytes(plugboard.wiring_map))
+
+    @classmethod
+    def from_machine(cls, machine, display=None):
+        """Return the permutation an EnigmaMachine applies with its rotors in
+        their current position, or at display if given (the machine itself is
+        not changed).
+
+        Note that EnigmaMachine.key_press() steps the rotors before encrypting,
+        so this is the permutation applied to the key pressed *after* the
+        rotors reach this position.
+
+        """
+        if display is not None:
+            machine = copy.copy(machine)
+            machine.set_display(display)
+        return cls._from_bytes(bytes(machine._electric_signal(n)
+                                     for n in range(26)))
+
+    # sequence protocol
+
+    def __len__(self):
+        return 26
+
+    def __getitem__(self, n):
+        return self._map[n]
+
+    def __iter__(self):
+        return iter(self._map)
+
+    def __eq__(self, other):
+        if not isinstance(other, Permutation):
+            return NotImplemented
+        return self._map == other._map
+
+    def __hash__(self):
+        return hash(self._map)
+
+    def __repr__(self):
+        return 'Permutation(%r)' % str(self)
+
+    def __str__(self):
+        """Returns the permutation as a string of 26 letters."""
+        return self._map.translate(_LETTERS).decode('ascii')
+
+    def __bytes__(self):
+        return self._map
+
+    def __reduce__(self):
+        return (type(self)._from_bytes, (self._map, ))
+
+    @property
+    def table(self):
+        """The 256 byte translation table for this permutation."""
+        if self._table is None:
+            self._table = make_table(self._map)
+        return self._table
+
+    def then(self, *others):
+        """Return the permutation formed by applying this permutation and then
+        each of others in turn.
+
+        """
+        result = self._map
+        for other in others:
+            result = result.translate(other.table)
+        return Permutation._from_bytes(result)
+
+    def apply(self, data):
+        """Apply the permutation to every item of a bytes-like sequence of
+        integers 0-25, returning bytes.
+
+        """
+        return bytes(data).translate(self.table)
+
+    def inverse(self):
+        """Return the inverse permutation."""
+        if self._inverse is None:
+            inverse = bytearray(26)
+            for n, m in enumerate(self._map):
+                inverse[m] = n
+            self._inverse = Permutation._from_bytes(bytes(inverse))
+            self._inverse._inverse = self
+        return self._inverse
+
+    def conjugate(self, other):
+        """Return the conjugate of this permutation by other: other inverse,
+        then this permutation, then other. The result has the same cycle
+        structure, with every wire n relabeled other[n].
+
+        For a plugboard S (an involution), p.conjugate(S) is S p S.
+
+        """
+        return other.inverse().then(self, other)
+
+    def cycles(self):
+        """Return the cycle decomposition as a tuple of tuples, including fixed
+        points. Each cycle starts with its smallest element and cycles are
+        ordered by their first element.
+
+        """
+        if self._cycles is None:
+            mapping = self._map
+            seen = bytearray(26)
+            cycles = []
+            for start in range(26):
+                if seen[start]:
+                    continue
+                cycle = []
+                n = start
+                while not seen[n]:
+                    seen[n] = 1
+                    cycle.append(n)
+                    n = mapping[n]
+                cycles.append(tuple(cycle))
+            self._cycles = tuple(cycles)
+        return self._cycles
+
+    def cycle_type(self):
+        """Return the cycle lengths in decreasing order, e.g. (13, 13) for an
+        Enigma scrambler. This is the same for all conjugates.
+
+        """
+        return tuple(sorted((len(c) for c in self.cycles()), reverse=True))
+
+    def cycle_str(self):
+        """Return the cycles of length 2 or more in letter notation, e.g.
+        '(AB)(CDE)'.
+
+        """
+        return ''.join('(%s)' % bytes(c).translate(_LETTERS).decode('ascii')
+                       for c in self.cycles() if len(c) > 1)
+
+    def fixed_points(self):
+        """Return a tuple of the wires mapped to themselves."""
+        return tuple(n for n, m in enumerate(self._map) if n == m)
+
+    def is_involution(self):
+        """Return True if applying the permutation twice is the identity."""
+        return self._map.translate(self.table) == IDENTITY
+
+    def order(self):
+        """Return the smallest k > 0 such that applying the permutation k times
+        is the identity.
+
+        """
+        result = 1
+        for c in self.cycles():
+            a, b = result, len(c)
+            while b:
+                a, b = b, a % b
+            result = result * len(c) // a
+        return result
+
+
+def compose(*perms):
+    """Return the permutation formed by applying each of perms in turn."""
+    if not perms:
+        return Permutation.identity()
+    return perms[0].then(*perms[1:])
+
+
+def pack(perms):
+    """Pack an iterable of permutations end to end into one bytes object of
+    26 bytes per permutation.
+
+    """
+    return b''.join(p._map for p in perms)
+
+
+def unpack(data):
+    """Split a bytes object made by pack() (or compose_batch()) back into a
+    list of Permutations.
+
+    """
+    if len(data) % 26:
+        raise PermError('packed data length must be a multiple of 26')
+    return [Permutation._from_bytes(bytes(data[i:i + 26]))
+            for i in range(0, len(data), 26)]
+
+
+def compose_batch(data, *perms):
+    """Compose many permutations with a common sequence of permutations.
+
+    data - permutations packed by pack(), or an iterable of Permutations
+
+    perms - the permutations to apply after each one in data
+
+    Returns packed bytes; entry i is data[i].then(*perms). Each permutation in
+    perms costs a single translate() call over the whole batch.
+
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = pack(data)
+    elif len(data) % 26:
+        raise PermError('packed data length must be a multiple of 26')
+    result = bytes(data)
+    for p in perms:
+        result = result.translate(p.table)
+    return result
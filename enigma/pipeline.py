@@ -0,0 +1,278 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Decrypts a day's (or many days') intercepted traffic.
+
+Each intercept carries a ground setting, an indicator and a ciphertext. Read one
+at a time as in examples/example1.py, every message needs a fresh machine built
+from the day's key:
+
+    machine = EnigmaMachine.from_key_sheet(**settings)
+    machine.set_display(ground)
+    message_key = machine.process_text(indicator)
+    machine.set_display(message_key)
+    plaintext = machine.process_text(ciphertext)
+
+The pipeline instead groups consecutive intercepts by date and, for each day:
+
+    1. builds the daily key once (DailyKey);
+
+    2. decodes the indicators of each chunk of the day's messages in one pass
+       of a batch.MachineBatch, each batch machine starting at that message's
+       ground setting;
+
+    3. decrypts the bodies from the compiled key (engine.CompiledKey), which
+       holds no rotor state: every body starts from the positions of its
+       message key, so no machine is ever reset or rebuilt. Bodies are sent in
+       chunks to a pool of worker processes, or decrypted in this process if
+       processes is 0.
+
+Results are yielded in input order as they become available, with a bounded
+number of chunks in flight, so any amount of traffic may be streamed through.
+
+Intercepts are dictionaries with the keys id, date, ground, indicator and
+ciphertext, as written by the traffic module; date is an ISO date string or a
+datetime.date. It may also be run from the command line on a directory written
+by traffic.write_corpus():
+
+    $ python -m enigma.pipeline corpus/ --output decrypts.jsonl
+
+"""
+
+import argparse
+import collections
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from .batch import MachineBatch
+from .engine import compile_key, normalize
+from .keyfile import get_daily_settings, KeyFileError
+from .spec import MachineSpec
+
+
+class PipelineError(Exception):
+    pass
+
+
+# Number of message bodies sent to a worker process at a time:
+DEFAULT_CHUNK_SIZE = 256
+
+
+Decrypt = collections.namedtuple('Decrypt',
+        ['id', 'date', 'message_key', 'plaintext'])
+
+
+def _as_date(date):
+    if isinstance(date, datetime.date):
+        return date
+    try:
+        return datetime.date.fromisoformat(date)
+    except (TypeError, ValueError):
+        raise PipelineError('invalid date: %r' % (date, ))
+
+
+def key_sheets(path):
+    """Return a function that maps a date to its daily key settings.
+
+    path - either a single key file (see keyfile.py), which is used for the day
+    of the month of every date, or a directory of monthly key files named
+    YYYY-MM.keys, as written by traffic.write_corpus().
+
+    """
+    if os.path.isdir(path):
+        def filename(date):
+            return os.path.join(path, '%04d-%02d.keys' % (date.year,
+                                                          date.month))
+    else:
+        def filename(date):
+            return path
+
+    def lookup(date):
+        date = _as_date(date)
+        with open(filename(date)) as fp:
+            return get_daily_settings(fp, day=date.day)
+
+    return lookup
+
+
+def _decrypt_bodies(spec, message_keys, ciphertexts, replace_char='X'):
+    """Decrypt bodies with one key; each starts at its message key."""
+    key = compile_key(spec)
+    results = []
+    for message_key, ciphertext in zip(message_keys, ciphertexts):
+        result, _ = key.process(key.positions(message_key),
+                                normalize(ciphertext, replace_char))
+        results.append(result.decode('ascii'))
+    return results
+
+
+class DailyKey:
+    """One day's key, built once and used for all of that day's messages."""
+
+    def __init__(self, settings):
+        """settings - a MachineSpec, or a dictionary of keyword arguments for
+        EnigmaMachine.from_key_sheet (as returned by keyfile.get_daily_settings)
+
+        """
+        self.spec = MachineSpec.coerce(settings)
+        self.machine = self.spec.create_machine()
+
+    def message_keys(self, grounds, indicators, replace_char='X'):
+        """Decode indicators, each at its own ground setting, in one batched
+        pass. Returns a list of message keys.
+
+        """
+        if len(grounds) != len(indicators):
+            raise PipelineError('expecting %d indicators' % len(grounds))
+        batch = MachineBatch(itertools.repeat(self.machine, len(grounds)))
+        for i, ground in enumerate(grounds):
+            batch.set_display(i, ground)
+        return batch.process_text(indicators, replace_char)
+
+    def decrypt(self, message_keys, ciphertexts, replace_char='X'):
+        """Decrypt bodies, each starting at its message key. Returns a list
+        of plaintexts.
+
+        """
+        return _decrypt_bodies(self.spec, message_keys, ciphertexts,
+                               replace_char)
+
+
+def _chunks(intercepts, keys, chunk_size):
+    """Group intercepts by date and decode their indicators, generating
+    (spec, ids, date, message keys, ciphertexts) chunks of at most chunk_size
+    messages.
+
+    """
+    for date, group in itertools.groupby(intercepts, lambda m: m['date']):
+        daily = DailyKey(keys(date))
+        while True:
+            messages = list(itertools.islice(group, chunk_size))
+            if not messages:
+                break
+            message_keys = daily.message_keys(
+                    [m['ground'] for m in messages],
+                    [m['indicator'] for m in messages])
+            yield (daily.spec, [m['id'] for m in messages], date,
+                   message_keys, [m['ciphertext'] for m in messages])
+
+
+def process_traffic(intercepts, keys, processes=None,
+                    chunk_size=DEFAULT_CHUNK_SIZE, max_pending=None):
+    """Decrypt intercepted messages, generating Decrypt tuples in input order.
+
+    intercepts - an iterable of intercept dictionaries (see the module
+    documentation); intercepts with the same date should be consecutive, as
+    each run of dates builds its daily key once
+
+    keys - a function mapping a date to its daily key settings: a MachineSpec
+    or a dictionary as returned by keyfile.get_daily_settings (see
+    key_sheets())
+
+    processes - the number of worker processes used to decrypt the bodies;
+    None means one per CPU and 0 decrypts them in this process
+
+    chunk_size - the number of bodies sent to a worker at a time
+
+    max_pending - the most chunks in flight at once; None means twice the
+    number of processes. This bounds memory use however long the input is.
+
+    """
+    if chunk_size < 1:
+        raise PipelineError('chunk_size must be at least 1')
+    chunks = _chunks(intercepts, keys, chunk_size)
+
+    if processes == 0:
+        for spec, ids, date, message_keys, ciphertexts in chunks:
+            plaintexts = _decrypt_bodies(spec, message_keys, ciphertexts)
+            yield from map(Decrypt, ids, itertools.repeat(date), message_keys,
+                           plaintexts)
+        return
+
+    if max_pending is None:
+        max_pending = 2 * (processes or os.cpu_count() or 1)
+
+    with multiprocessing.Pool(processes) as pool:
+        pending = collections.deque()
+        for spec, ids, date, message_keys, ciphertexts in chunks:
+            pending.append((ids, date, message_keys, pool.apply_async(
+                    _decrypt_bodies, (spec, message_keys, ciphertexts))))
+            while len(pending) > max_pending or \
+                    (pending and pending[0][-1].ready()):
+                ids, date, message_keys, result = pending.popleft()
+                yield from map(Decrypt, ids, itertools.repeat(date),
+                               message_keys, result.get())
+
+        while pending:
+            ids, date, message_keys, result = pending.popleft()
+            yield from map(Decrypt, ids, itertools.repeat(date), message_keys,
+                           result.get())
+
+
+def _read_jsonl(path):
+    with open(path) as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('corpus',
+            help='directory holding intercepts.jsonl and keys/')
+    parser.add_argument('-o', '--output',
+            help='write decrypts as JSON lines to this file [default: stdout]')
+    parser.add_argument('-k', '--keys',
+            help='key file or directory of monthly key files '
+                 '[default: CORPUS/keys]')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+            help='worker processes; 0 decrypts in this process '
+                 '[default: one per CPU]')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='bodies sent to a worker at a time [default: %(default)s]')
+    args = parser.parse_args(argv)
+
+    keys = key_sheets(args.keys or os.path.join(args.corpus, 'keys'))
+    intercepts = _read_jsonl(os.path.join(args.corpus, 'intercepts.jsonl'))
+    truth_path = os.path.join(args.corpus, 'truth.jsonl')
+    truth = _read_jsonl(truth_path) if os.path.exists(truth_path) else None
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    count = letters = correct = 0
+    start = time.perf_counter()
+    try:
+        for msg in process_traffic(intercepts, keys, args.processes,
+                                   args.chunk_size):
+            out.write(json.dumps({
+                'id': msg.id,
+                'message_key': msg.message_key,
+                'plaintext': msg.plaintext,
+            }) + '\n')
+            count += 1
+            letters += len(msg.plaintext)
+            if truth is not None:
+                expected = next(truth)
+                correct += (expected['id'] == msg.id and
+                            expected['plaintext'] == msg.plaintext)
+    except (PipelineError, KeyFileError, OSError) as ex:
+        parser.error(str(ex))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    sys.stderr.write('%d messages, %d letters in %.2f s (%.0f letters/s)\n' % (
+                     count, letters, elapsed, letters / elapsed if elapsed
+                     else 0.0))
+    if truth is not None:
+        sys.stderr.write('%d of %d match the ground truth\n' % (correct, count))
+
+
+if __name__ == '__main__':
+    main()
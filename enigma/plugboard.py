@@ -8,7 +8,6 @@ component of the Enigma Machine.
 """
 
 import collections
-import copy
 from itertools import chain
 import string
 
@@ -53,13 +52,22 @@ class Plugboard:
         raised.
 
         """
-        # construct wiring mapping table with default 1-1 mappings
-        self.wiring_map = list(range(26))
-
-        # construct backup storage for the wiring map; this is useful when
-        # hill-climbing and is used when the Plugboard is used as a context
-        # manager
-        self._backup_map = list(range(26))
+        # construct wiring mapping table with default 1-1 mappings; it is only
+        # changed through connect(), disconnect() and revert(), so that every
+        # change can be journaled, and is exposed read-only as wiring_map
+        self._map = bytearray(range(26))
+        self._view = memoryview(self._map).toreadonly()
+
+        # journal of (plug, old connection) changes made since the outermost
+        # open checkpoint, the journal length at each open checkpoint and the
+        # set of plugs journaled since each; only the first change of a plug
+        # after a checkpoint is needed to roll it back, so the journal holds at
+        # most 26 entries per open checkpoint however many changes are made.
+        # This is useful when hill-climbing and is used when the Plugboard is
+        # used as a context manager.
+        self._journal = []
+        self._checkpoints = []
+        self._journaled = []
 
         # use settings if provided
         if not wiring_pairs:
@@ -81,8 +89,18 @@ class Plugboard:
             if not (0 <= m < 26) or not (0 <= n < 26):
                 raise PlugboardError('invalid connection: %s' % str(pair))
 
-            self.wiring_map[m] = n
-            self.wiring_map[n] = m
+            self._map[m] = n
+            self._map[n] = m
+
+    @property
+    def wiring_map(self):
+        """A read-only view of the wiring: wiring_map[n] is the plug
+        connected to plug n, or n if it has no cable. Use connect() and
+        disconnect() to change it. Before version 2.0 this was a mutable
+        list.
+
+        """
+        return self._view
 
     @classmethod
     def from_key_sheet(cls, settings=None):
@@ -144,7 +162,7 @@ class Plugboard:
         """Return the connections as a set of tuple pairs."""
         pairs = set()
         for x in range(0, 26):
-            y = self.wiring_map[x]
+            y = self._map[x]
             if x != y and (y, x) not in pairs:
                 pairs.add((x, y))
 
@@ -167,6 +185,19 @@ class Plugboard:
         """Returns a string representation of the settings in army format."""
         return self.army_str()
 
+    def __copy__(self):
+        """Returns an independent plugboard with the same connections."""
+        plugboard = type(self)()
+        plugboard._map[:] = self._map
+        return plugboard
+
+    def __reduce__(self):
+        """Support for pickling. A plugboard pickles as a string of its
+        connected plug pairs, e.g. 'AVBSCG'. Open checkpoints are not saved.
+
+        """
+        return (_restore_plugboard, (''.join(self.army_str().split()), ))
+
     def signal(self, n):
         """Simulate a signal entering the plugboard on wire n, where n must be
         an integer between 0 and 25.
@@ -178,57 +209,149 @@ class Plugboard:
         is coming from.
 
         """
-        return self.wiring_map[n]
+        return self._map[n]
 
     # Support for hill-climbing algorithms:
+    #
+    # connect() and disconnect() return an undo token recording the previous
+    # connections of the (at most 4) plugs they change; revert() restores them.
+    # Tokens must be reverted in the reverse order they were made, like a
+    # stack. Checkpoints record the changes made while they are open, so that
+    # a whole sequence of moves can be rolled back; they may be nested. The
+    # wiring can only be changed through these methods, so a checkpoint (or a
+    # with block) always restores it exactly.
 
     def get_wiring(self):
-        """Returns a deep copy of the internal wiring map."""
-        return copy.deepcopy(self.wiring_map)
+        """Returns an immutable snapshot of the internal wiring map as a
+        tuple. Before version 2.0 this was a deep copy of a list.
+
+        """
+        return tuple(self._map)
 
     def is_wired(self, n):
         """Returns True if connection n has a cable attached; 0 <= n < 26."""
-        return self.wiring_map[n] != n
+        return self._map[n] != n
 
     def is_free(self, n):
         """Returns True if connection n has no cable attached; 0 <= n < 26."""
-        return self.wiring_map[n] == n
+        return self._map[n] == n
+
+    def checkpoint(self):
+        """Opens a checkpoint. Every change made until the matching rollback()
+        or release() is recorded.
+
+        """
+        self._checkpoints.append(len(self._journal))
+        self._journaled.append(set())
+
+    def rollback(self):
+        """Undoes every change made since the most recent open checkpoint and
+        closes it.
+
+        """
+        if not self._checkpoints:
+            raise PlugboardError('no open checkpoint')
+        mark = self._checkpoints.pop()
+        self._journaled.pop()
+        journal = self._journal
+        wiring_map = self._map
+        while len(journal) > mark:
+            n, old = journal.pop()
+            wiring_map[n] = old
+
+    def release(self):
+        """Closes the most recent open checkpoint, keeping the changes made
+        since. The changes can still be rolled back by an enclosing checkpoint.
+
+        """
+        if not self._checkpoints:
+            raise PlugboardError('no open checkpoint')
+        mark = self._checkpoints.pop()
+        self._journaled.pop()
+        if not self._checkpoints:
+            del self._journal[:]
+            return
+
+        # keep only the changes to plugs the enclosing checkpoint has not
+        # already journaled
+        journaled = self._journaled[-1]
+        entries = self._journal[mark:]
+        del self._journal[mark:]
+        for n, old in entries:
+            if n not in journaled:
+                journaled.add(n)
+                self._journal.append((n, old))
 
     def __enter__(self):
-        """Saves the current state of the wiring map."""
-        for n in range(26):
-            self._backup_map[n] = self.wiring_map[n]
+        """Opens a checkpoint."""
+        self.checkpoint()
         return self
 
     def __exit__(self, *exc_info):
-        """Restores the saved state of the wiring map."""
-        for n in range(26):
-            self.wiring_map[n] = self._backup_map[n]
+        """Rolls back all changes made since the matching __enter__."""
+        self.rollback()
 
     def connection(self, n):
         """Returns plug number [0-25] for what is connected to plug n [0-25]."""
-        return self.wiring_map[n]
+        return self._map[n]
+
+    def _change(self, plugs):
+        """Records the current connections of plugs before they are changed.
+        Returns an undo token.
+
+        """
+        wiring_map = self._map
+        token = tuple((n, wiring_map[n]) for n in plugs)
+        if self._checkpoints:
+            journaled = self._journaled[-1]
+            for n, old in token:
+                if n not in journaled:
+                    journaled.add(n)
+                    self._journal.append((n, old))
+        return token
+
+    def revert(self, token):
+        """Undoes the change that returned token.
+
+        If a checkpoint is open, the revert is itself recorded as a change.
+
+        """
+        if self._checkpoints:
+            self._change(n for n, _ in token)
+        wiring_map = self._map
+        for n, old in token:
+            wiring_map[n] = old
 
     def disconnect(self, n):
-        """Removes cable from plug number n [0-25]."""
-        x = self.wiring_map[n]
-        self.wiring_map[x] = x
-        self.wiring_map[n] = n
+        """Removes cable from plug number n [0-25].
+
+        Returns an undo token for revert().
+
+        """
+        x = self._map[n]
+        token = self._change((n, x))
+        self._map[x] = x
+        self._map[n] = n
+        return token
 
     def connect(self, x, y):
         """Connects plug x to plug y, removing any existing connections first.
         
         x and y must be in [0-25].
 
+        Returns an undo token for revert().
+
         """
         # disconnect any existing connections
-        m = self.wiring_map[x]
-        n = self.wiring_map[y]
-        self.wiring_map[m] = m
-        self.wiring_map[n] = n
+        m = self._map[x]
+        n = self._map[y]
+        token = self._change((x, y, m, n))
+        self._map[m] = m
+        self._map[n] = n
 
-        self.wiring_map[x] = y
-        self.wiring_map[y] = x
+        self._map[x] = y
+        self._map[y] = x
+        return token
 
     def is_connected(self, x, y):
         """Returns True if x is connected to y.
@@ -236,5 +359,15 @@ class Plugboard:
         x and y must be in [0-25].
 
         """
-        return self.wiring_map[x] == y and self.wiring_map[y] == x
-
+        return self._map[x] == y and self._map[y] == x
+
+
+def _restore_plugboard(pairs):
+    plugboard = Plugboard()
+    wiring_map = plugboard._map
+    for i in range(0, len(pairs), 2):
+        m = ord(pairs[i]) - ord('A')
+        n = ord(pairs[i + 1]) - ord('A')
+        wiring_map[m] = n
+        wiring_map[n] = m
+    return plugboard
@@ -69,3 +69,9 @@ REFLECTORS = {
     'B-Thin': 'ENKQAUYWJICOPBLMDXZVFTHRGS',
     'C-Thin': 'RDOBJNTKVEHMLFCWZAXGYIPSUQ',
 }
+
+# Rotor and reflector names by role:
+STEPPING_ROTORS = tuple(n for n in ROTORS if ROTORS[n]['stepping'] is not None)
+FOURTH_ROTORS = tuple(n for n in ROTORS if ROTORS[n]['stepping'] is None)
+THIN_REFLECTORS = tuple(n for n in REFLECTORS if n.endswith('-Thin'))
+REFLECTOR_NAMES = tuple(n for n in REFLECTORS if n not in THIN_REFLECTORS)
@@ -6,8 +6,11 @@
 
 import string
 import collections
+import copy
+import functools
 
 from . import RotorError
+from .data import ROTORS, REFLECTORS
 
 
 ALPHA_LABELS = string.ascii_uppercase
@@ -173,6 +176,62 @@ class Rotor:
         """Returns what is currently being displayed in the operator window."""
         return self.display_val
 
+    def __copy__(self):
+        """Returns an independent rotor with the same settings and position.
+
+        The wiring and display tables are never modified after construction,
+        so they are shared with the copy rather than rebuilt.
+
+        """
+        rotor = type(self).__new__(type(self))
+        rotor.__dict__.update(self.__dict__)
+        return rotor
+
+    def __reduce_ex__(self, protocol):
+        """Support for pickling.
+
+        Rotors and reflectors of a standard model pickle as just the model
+        name, ring setting, position and rotation count; the wiring and display
+        tables are rebuilt from the model data on load, and shared between all
+        rotors unpickled with the same settings. Other rotors also include their
+        wiring and notches. Instances of subclasses, and rotors with attributes
+        of their own, pickle their class and every attribute as usual.
+
+        """
+        if not self._is_plain():
+            return super().__reduce_ex__(protocol)
+
+        state = (self.ring_setting, self.pos, self.rotations)
+        if self._is_standard():
+            return (_standard_rotor, (self.name, ) + state)
+
+        stepping = ''.join(sorted(self.step_set)) or None
+        return (_custom_rotor, (self.name, self.wiring_str, stepping) + state)
+
+    def _is_plain(self):
+        return type(self) is Rotor and self.__dict__.keys() == _ATTRIBUTES
+
+    def _is_standard(self):
+        if not self._is_plain():
+            return False
+        if self.name in ROTORS:
+            data = ROTORS[self.name]
+            stepping = data['stepping']
+        elif self.name in REFLECTORS:
+            data = {'wiring': REFLECTORS[self.name]}
+            stepping = None
+        else:
+            return False
+        return (self.wiring_str == data['wiring'] and
+                self.step_set == set(stepping or ''))
+
+    def _restore(self, pos, rotations):
+        rotor = copy.copy(self)
+        rotor.pos = pos
+        rotor.display_val = rotor.pos_map[pos]
+        rotor.rotations = rotations
+        return rotor
+
     def signal_in(self, n):
         """Simulate a signal entering the rotor from the right at a given pin
         position n.
@@ -222,3 +281,34 @@ class Rotor:
         self.pos = (self.pos + 1) % 26
         self.display_val = self.pos_map[self.pos]
         self.rotations += 1
+
+
+# The attributes set by Rotor.__init__; rotors with others are not pickled in
+# the compact form:
+_ATTRIBUTES = frozenset(['name', 'wiring_str', 'ring_setting', 'entry_map',
+                         'exit_map', 'display_map', 'pos_map', 'step_set',
+                         'pos', 'display_val', 'rotations'])
+
+# Unpickling support: a prototype rotor is built once for each distinct setting
+# and copied (see Rotor.__copy__), so unpickled rotors share its tables. The
+# cache is bounded, as custom rotors may have any wiring; it holds every
+# standard model at every ring setting.
+
+@functools.lru_cache(maxsize=1024)
+def _prototype(model_name, wiring, ring_setting, stepping):
+    return Rotor(model_name, wiring, ring_setting, stepping)
+
+
+def _standard_rotor(model_name, ring_setting, pos, rotations):
+    if model_name in ROTORS:
+        data = ROTORS[model_name]
+        wiring, stepping = data['wiring'], data['stepping']
+    else:
+        wiring, stepping = REFLECTORS[model_name], None
+    prototype = _prototype(model_name, wiring, ring_setting, stepping)
+    return prototype._restore(pos, rotations)
+
+
+def _custom_rotor(model_name, wiring, stepping, ring_setting, pos, rotations):
+    prototype = _prototype(model_name, wiring, ring_setting, stepping)
+    return prototype._restore(pos, rotations)
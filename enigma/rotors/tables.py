@@ -0,0 +1,96 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""tables.py - this module contains functions that return precomputed,
+read-only lookup tables describing the signal path through a rotor or reflector
+at each of its 26 positions.
+
+Tables are cached per wiring string, so every machine, atlas or search engine
+in a process shares the same objects.
+
+Each table is a 256 byte bytes object suitable for use with bytes.translate().
+Only the first 26 entries are meaningful; the rest are an identity mapping. So
+for a rotor with wiring w at position pos:
+
+    entry_tables(w)[pos][n] == Rotor.signal_in(n)
+    exit_tables(w)[pos][n] == Rotor.signal_out(n)
+
+A permutation of the 26 wires may be represented as a 26 byte bytes object p.
+The permutation "p followed by the table t" is then simply p.translate(t).
+
+"""
+
+import functools
+
+
+# The identity mapping for the unused entries of a translation table:
+_TABLE_TAIL = bytes(range(26, 256))
+
+IDENTITY = bytes(range(26))
+
+
+def make_table(perm):
+    """Turn a permutation of the 26 wires (any sequence of integers 0-25) into
+    a 256 byte translation table.
+
+    """
+    return bytes(perm) + _TABLE_TAIL
+
+
+def compose(*perms):
+    """Return the 26 byte permutation formed by applying each of perms in turn.
+
+    The first argument is a 26 byte permutation; the remaining arguments may be
+    permutations or translation tables.
+
+    """
+    result = bytes(perms[0][:26])
+    for p in perms[1:]:
+        result = result.translate(p if len(p) == 256 else make_table(p))
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def entry_tables(wiring):
+    """Return a tuple of 26 translation tables, one per rotor position, for a
+    signal entering the rotor from the right.
+
+    """
+    entry_map = [ord(c) - ord('A') for c in wiring.upper()]
+    return tuple(make_table((entry_map[(n + pos) % 26] - pos) % 26
+                            for n in range(26))
+                 for pos in range(26))
+
+
+@functools.lru_cache(maxsize=None)
+def exit_tables(wiring):
+    """Return a tuple of 26 translation tables, one per rotor position, for a
+    signal entering the rotor from the left.
+
+    """
+    exit_map = [0] * 26
+    for i, c in enumerate(wiring.upper()):
+        exit_map[ord(c) - ord('A')] = i
+    return tuple(make_table((exit_map[(n + pos) % 26] - pos) % 26
+                            for n in range(26))
+                 for pos in range(26))
+
+
+@functools.lru_cache(maxsize=None)
+def folded_reflector_tables(reflector_wiring, reflector_pos, rotor_wiring):
+    """Return a tuple of 26 translation tables, one per position of a
+    stationary rotor placed next to a reflector.
+
+    On the Kriegsmarine M4, the leftmost (Beta or Gamma) rotor never steps. For
+    a given position of that rotor, it and the thin reflector therefore act as a
+    single fixed reflector: the signal enters the rotor from the right, is
+    reflected, and passes back out through the rotor. Each table folds those
+    three steps into one lookup.
+
+    """
+    rotor_in = entry_tables(rotor_wiring)
+    rotor_out = exit_tables(rotor_wiring)
+    reflector = entry_tables(reflector_wiring)[reflector_pos]
+    return tuple(make_table(compose(rotor_in[pos], reflector, rotor_out[pos]))
+                 for pos in range(26))
@@ -0,0 +1,564 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains support for key searches: trial decryption of a ciphertext under
+candidate keys, scoring of the results, pruning of hopeless candidates and
+collection of the best scoring ones.
+
+A search is put together from interchangeable parts:
+
+    enumerators - generators of (MachineSpec, start position) pairs, such as
+    start_positions() and key_space(). Keys are produced one at a time, so
+    memory use does not grow with the size of the space searched.
+
+    scorers - objects that score decrypted text: NgramScorer (an n-gram
+    language model), IoCScorer (index of coincidence) and CribScorer (letters
+    matching a known plaintext fragment).
+
+    pruning rules - functions called on a Trial after each chunk of a
+    decryption that return True to abandon it, such as score_bound() and
+    crib_rule().
+
+search() decrypts each enumerated key with the table driven engine and
+generates a Candidate record for each key that enters a bounded TopK
+collection, which at the end holds the best k candidates.
+
+Most trial keys are obviously wrong after a few dozen letters. To avoid paying
+for a full decryption of such keys, the ciphertext is decrypted and scored in
+chunks. After each chunk, score_bound() computes an upper bound on the final
+score by assuming every remaining letter scores at most "bound". If that upper
+bound cannot reach the current threshold (the lowest score in the TopK
+collection once it is full), the candidate is abandoned. score_trial() does the
+same for an EnigmaMachine object.
+
+search_rotor_orders() spreads a search over a pool of worker processes, one
+rotor order per task. The n-gram model is placed in shared memory (see
+shared.py) so the workers do not each keep a copy of it.
+
+"""
+
+import heapq
+import itertools
+import multiprocessing
+
+from .engine import compile_key
+from .machine import KEYBOARD_CHARS
+from .ngram import text_to_indices, indices_to_text
+from .shared import SharedTables
+from .spec import MachineSpec
+from .text import LETTERS_TO_NUMBERS
+
+
+# The number of letters decrypted between checks for early abandonment:
+DEFAULT_CHUNK_SIZE = 16
+
+
+class SearchStats:
+    """Counters describing the work performed by a search."""
+
+    def __init__(self):
+        self.trials = 0
+        self.abandoned = 0
+        self.letters_decrypted = 0
+        self.letters_saved = 0
+
+    def as_dict(self):
+        """Return the counters as a dictionary."""
+        return {
+            'trials': self.trials,
+            'abandoned': self.abandoned,
+            'letters_decrypted': self.letters_decrypted,
+            'letters_saved': self.letters_saved,
+        }
+
+
+class TopK:
+    """A bounded collection of the k highest scoring items seen so far."""
+
+    def __init__(self, k):
+        if k < 1:
+            raise ValueError('k must be at least 1')
+        self.k = k
+        self._heap = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    @property
+    def threshold(self):
+        """The score an item must beat to be kept, or None if the collection
+        is not yet full.
+
+        """
+        if len(self._heap) < self.k:
+            return None
+        return self._heap[0][0]
+
+    def push(self, score, item):
+        """Offer an item with the given score. Returns True if it was kept."""
+        # the counter breaks ties so items themselves are never compared
+        entry = (score, next(self._counter), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def results(self):
+        """Return a list of (score, item) tuples, best first."""
+        return [(e[0], e[2]) for e in sorted(self._heap, reverse=True)]
+
+
+def score_trial(machine, ciphertext, model, threshold=None,
+        chunk_size=DEFAULT_CHUNK_SIZE, bound=None, stats=None):
+    """Decrypt and score ciphertext incrementally, abandoning the trial early
+    when it cannot reach threshold.
+
+    machine - an EnigmaMachine, already set to the trial key and start position
+
+    ciphertext - the ciphertext to decrypt; it should only contain letters A-Z
+
+    model - an NgramModel used to score the decrypted text
+
+    threshold - the score the final result must exceed to be of interest, or
+    None to always decrypt the whole ciphertext
+
+    chunk_size - the number of letters decrypted between abandonment checks
+
+    bound - the largest score any single remaining n-gram is assumed to
+    contribute. The default, the model's max_log_prob, guarantees that no
+    candidate that could exceed threshold is abandoned. Passing a smaller value
+    (e.g. the mean n-gram score of typical plaintext) prunes far more
+    aggressively at the risk of abandoning a good candidate.
+
+    stats - an optional SearchStats object to update
+
+    Returns a tuple (score, plaintext), or None if the trial was abandoned.
+
+    """
+    if bound is None:
+        bound = model.max_log_prob
+
+    n = model.n
+    total = len(ciphertext)
+    score = 0.0
+    tail = b''
+    pieces = []
+    done = 0
+
+    while done < total:
+        chunk = machine.process_text(ciphertext[done:done + chunk_size])
+        pieces.append(chunk)
+        done += len(chunk)
+
+        data = tail + text_to_indices(chunk)
+        score += model.score(data)
+        tail = data[-(n - 1):] if n > 1 else b''
+
+        if (threshold is not None and done < total and
+                score + (total - done) * bound <= threshold):
+            if stats is not None:
+                stats.trials += 1
+                stats.abandoned += 1
+                stats.letters_decrypted += done
+                stats.letters_saved += total - done
+            return None
+
+    if stats is not None:
+        stats.trials += 1
+        stats.letters_decrypted += total
+    return score, ''.join(pieces)
+
+
+class Candidate:
+    """A compact record of one scored key."""
+
+    __slots__ = ('score', 'spec', 'start', 'plaintext')
+
+    def __init__(self, score, spec, start, plaintext):
+        self.score = score
+        self.spec = spec
+        self.start = start
+        self.plaintext = plaintext
+
+    def __repr__(self):
+        return 'Candidate(%r, %r, %r, %r)' % (self.score, self.spec,
+                                              self.start, self.plaintext)
+
+    def __eq__(self, other):
+        if not isinstance(other, Candidate):
+            return NotImplemented
+        return ((self.score, self.spec, self.start, self.plaintext) ==
+                (other.score, other.spec, other.start, other.plaintext))
+
+
+class Trial:
+    """The state of the decryption in progress, as seen by pruning rules.
+
+    spec, start - the key being tried
+
+    plaintext - a bytearray of the letter numbers decrypted so far
+
+    done, total - the number of letters decrypted so far and in all
+
+    score - the score of the letters decrypted so far
+
+    threshold - the score the final result must exceed to enter the top-k, or
+    None if the top-k is not yet full
+
+    A single Trial object is reused for every key of a search.
+
+    """
+    __slots__ = ('spec', 'start', 'plaintext', 'done', 'total', 'score',
+                 'threshold')
+
+    def __init__(self):
+        self.spec = self.start = self.threshold = None
+        self.plaintext = bytearray()
+        self.done = self.total = 0
+        self.score = 0.0
+
+
+# Enumerators
+
+def start_positions(spec, starts=None):
+    """Generate (spec, start) for every start position of one key.
+
+    spec - a MachineSpec, or anything MachineSpec.coerce() accepts
+
+    starts - an iterable of start positions (display strings) to try, or None
+    to try all of them
+
+    """
+    spec = MachineSpec.coerce(spec)
+    if starts is None:
+        starts = (''.join(p) for p in
+                  itertools.product(KEYBOARD_CHARS, repeat=len(spec.rotors)))
+    for start in starts:
+        yield spec, start
+
+
+def key_space(rotor_orders, reflectors=('B', ), ring_settings=None,
+              plugboard_settings=None, starts=None):
+    """Generate (spec, start) for every combination of the given rotor orders,
+    reflectors, ring settings and start positions.
+
+    rotor_orders - an iterable of rotor orders, each a list of rotor names or a
+    string as accepted by EnigmaMachine.from_key_sheet
+
+    reflectors - an iterable of reflector names
+
+    ring_settings - an iterable of ring settings, each as accepted by
+    EnigmaMachine.from_key_sheet; None tries only the default (all A)
+
+    plugboard_settings - a fixed plugboard
+
+    starts - as for start_positions(); the list is reused for every key
+
+    """
+    rings = [None] if ring_settings is None else list(ring_settings)
+    starts = None if starts is None else list(starts)
+    for rotors, reflector, ring in itertools.product(
+            rotor_orders, list(reflectors), rings):
+        spec = MachineSpec.from_key_sheet(rotors=rotors, ring_settings=ring,
+                reflector=reflector, plugboard_settings=plugboard_settings)
+        yield from start_positions(spec, starts)
+
+
+# Scorers
+
+class Scorer:
+    """The base class of scorers. Higher scores are better.
+
+    bound - the most that any one more letter can add to the score, or None if
+    there is no such bound; used by score_bound()
+
+    """
+    bound = None
+
+    def score(self, indices):
+        """Return the score of a sequence of letter numbers (0-25)."""
+        raise NotImplementedError
+
+    def extend(self, score, indices, start):
+        """Return the score of indices, given that score is the score of
+        indices[:start]. Scorers whose score is a sum over letters or n-grams
+        override this to score only the new letters.
+
+        """
+        return self.score(indices)
+
+
+class NgramScorer(Scorer):
+    """Scores text with an n-gram model (see ngram.py)."""
+
+    def __init__(self, model):
+        self.model = model
+        self.bound = model.max_log_prob
+
+    def score(self, indices):
+        return self.model.score(indices)
+
+    def extend(self, score, indices, start):
+        # add the n-grams that end at or after start
+        return score + self.model.score(indices[max(0, start -
+                                                    self.model.n + 1):])
+
+
+class IoCScorer(Scorer):
+    """Scores text by its index of coincidence: the probability that two
+    letters drawn from it are the same. This is about 0.038 for random text
+    and 0.065-0.076 for European languages, whatever the plugboard settings,
+    so it is useful for finding rotor settings before the plugboard is known.
+
+    """
+    def score(self, indices):
+        n = len(indices)
+        if n < 2:
+            return 0.0
+        counts = [0] * 26
+        for c in indices:
+            counts[c] += 1
+        return sum(f * (f - 1) for f in counts) / (n * (n - 1))
+
+
+class CribScorer(Scorer):
+    """Scores text by the number of letters that match a crib, a fragment of
+    known plaintext, at a given offset.
+
+    """
+    bound = 1
+
+    def __init__(self, crib, offset=0):
+        self.crib = text_to_indices(crib)
+        self.offset = offset
+
+    def score(self, indices):
+        return sum(1 for a, b in zip(indices[self.offset:], self.crib)
+                   if a == b)
+
+
+# Pruning rules
+
+def score_bound(bound):
+    """Return a rule that abandons a trial when its score cannot reach the
+    threshold even if every remaining letter adds bound to it.
+
+    """
+    def rule(trial):
+        return (trial.threshold is not None and
+                trial.score + (trial.total - trial.done) * bound <=
+                trial.threshold)
+    return rule
+
+
+def crib_rule(crib, offset=0, max_mismatches=0):
+    """Return a rule that abandons a trial as soon as more than max_mismatches
+    of the decrypted letters differ from a crib at the given offset.
+
+    """
+    crib = text_to_indices(crib)
+
+    def rule(trial):
+        decrypted = trial.plaintext[offset:offset + len(crib)]
+        mismatches = sum(1 for a, b in zip(decrypted, crib) if a != b)
+        return mismatches > max_mismatches
+    return rule
+
+
+def crib_offsets(ciphertext, crib):
+    """Return the offsets at which a crib may lie under a ciphertext. An Enigma
+    never encrypts a letter to itself, so a crib cannot lie where any of its
+    letters is the same as the ciphertext letter above it.
+
+    """
+    cipher = text_to_indices(ciphertext)
+    crib = text_to_indices(crib)
+    return [i for i in range(len(cipher) - len(crib) + 1)
+            if all(a != b for a, b in zip(cipher[i:], crib))]
+
+
+def search(ciphertext, keys, scorer, rules=None, top_k=10, best=None,
+           chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """Decrypt ciphertext with every key from an enumerator, generating a
+    Candidate each time one enters the top-k.
+
+    ciphertext - the ciphertext; non-keyboard characters are dropped
+
+    keys - an iterable of (MachineSpec, start position) pairs
+
+    scorer - a Scorer
+
+    rules - a list of pruning rules; the default is score_bound(scorer.bound)
+    if the scorer has a bound, and no rules otherwise
+
+    top_k - the number of candidates kept
+
+    best - a TopK to collect the candidates in, e.g. to read the final results
+    once the generator is exhausted; by default a new one of size top_k
+
+    chunk_size - the number of letters decrypted between checks of the rules
+
+    stats - an optional SearchStats object to update
+
+    """
+    if rules is None:
+        rules = [] if scorer.bound is None else [score_bound(scorer.bound)]
+    if best is None:
+        best = TopK(top_k)
+
+    data = text_to_indices(ciphertext)
+    total = len(data)
+    step = chunk_size if rules else max(total, 1)
+    trial = Trial()
+    trial.total = total
+    spec = key = None
+
+    for trial_spec, start in keys:
+        if trial_spec is not spec:
+            spec = trial_spec
+            key = compile_key(spec)
+        positions = key.positions(start)
+        trial.spec = spec
+        trial.start = start
+        trial.threshold = best.threshold
+        plaintext = trial.plaintext = bytearray()
+        score = 0.0
+        done = 0
+        abandoned = False
+
+        while done < total:
+            chunk, positions = key.process(positions, data[done:done + step])
+            plaintext += chunk.translate(LETTERS_TO_NUMBERS)
+            score = scorer.extend(score, plaintext, done)
+            done = len(plaintext)
+            if done < total and rules:
+                trial.done = done
+                trial.score = score
+                if any(rule(trial) for rule in rules):
+                    abandoned = True
+                    break
+
+        if stats is not None:
+            stats.trials += 1
+            stats.letters_decrypted += done
+            if abandoned:
+                stats.abandoned += 1
+                stats.letters_saved += total - done
+        if abandoned:
+            continue
+
+        if best.threshold is None or score > best.threshold:
+            candidate = Candidate(score, spec, start,
+                                  indices_to_text(plaintext))
+            best.push(score, candidate)
+            yield candidate
+
+
+def best_candidates(ciphertext, keys, scorer, top_k=10, **kwargs):
+    """Run search() to completion and return a list of the top_k Candidates,
+    best first. Other keyword arguments are passed to search().
+
+    """
+    best = TopK(top_k)
+    for _ in search(ciphertext, keys, scorer, best=best, **kwargs):
+        pass
+    return [candidate for _, candidate in best.results()]
+
+
+def search_start_positions(ciphertext, model, rotors='I II III',
+        ring_settings=None, reflector='B', plugboard_settings=None,
+        top_k=10, starts=None, chunk_size=DEFAULT_CHUNK_SIZE, bound=None,
+        stats=None):
+    """Try every start position for a fixed rotor order, ring setting,
+    reflector and plugboard, returning the best scoring decryptions.
+
+    The key parameters are as for EnigmaMachine.from_key_sheet. The remaining
+    parameters are:
+
+    ciphertext - the ciphertext to attack; non-keyboard characters are dropped
+
+    model - an NgramModel used to score the decryptions
+
+    top_k - the number of results to return
+
+    starts - an iterable of start positions (display strings) to try, or None
+    to try all of them
+
+    chunk_size, bound, stats - see score_trial()
+
+    Returns a list of (score, start, plaintext) tuples, best first.
+
+    """
+    spec = MachineSpec.from_key_sheet(rotors=rotors,
+            ring_settings=ring_settings, reflector=reflector,
+            plugboard_settings=plugboard_settings)
+    if bound is None:
+        bound = model.max_log_prob
+
+    best = TopK(top_k)
+    for _ in search(ciphertext, start_positions(spec, starts),
+                    NgramScorer(model), rules=[score_bound(bound)], best=best,
+                    chunk_size=chunk_size, stats=stats):
+        pass
+    return [(score, c.start, c.plaintext) for score, c in best.results()]
+
+
+# The state of a search_rotor_orders() worker process, set by _init_worker():
+_worker = {}
+
+
+def _init_worker(handle, ciphertext, kwargs):
+    shared = SharedTables.attach(handle)
+    _worker.update(shared=shared, model=shared.ngram_model(),
+                   ciphertext=ciphertext, kwargs=kwargs)
+
+
+def _search_order(rotors):
+    stats = SearchStats()
+    results = search_start_positions(_worker['ciphertext'], _worker['model'],
+                                     rotors=rotors, stats=stats,
+                                     **_worker['kwargs'])
+    return rotors, results, stats.as_dict()
+
+
+def search_rotor_orders(ciphertext, model, rotor_orders, ring_settings=None,
+        reflector='B', plugboard_settings=None, top_k=10, starts=None,
+        processes=None, chunk_size=DEFAULT_CHUNK_SIZE, bound=None, stats=None):
+    """Try every start position of several rotor orders in parallel, using a
+    pool of worker processes.
+
+    rotor_orders - an iterable of rotor orders, each a list of rotor names or a
+    string as accepted by EnigmaMachine.from_key_sheet
+
+    processes - the number of worker processes; None means one per CPU
+
+    The remaining parameters are as for search_start_positions(). If stats is
+    given, the counters of all workers are added to it.
+
+    Returns a list of (score, rotors, start, plaintext) tuples, best first,
+    where rotors is the rotor order as given.
+
+    """
+    kwargs = dict(ring_settings=ring_settings, reflector=reflector,
+                  plugboard_settings=plugboard_settings, top_k=top_k,
+                  starts=None if starts is None else list(starts),
+                  chunk_size=chunk_size, bound=bound)
+    best = TopK(top_k)
+
+    with SharedTables.create(model=model) as shared:
+        with multiprocessing.Pool(processes, initializer=_init_worker,
+                initargs=(shared.handle, ciphertext, kwargs)) as pool:
+            for rotors, results, counts in pool.imap_unordered(
+                    _search_order, rotor_orders):
+                for score, start, text in results:
+                    best.push(score, (rotors, start, text))
+                if stats is not None:
+                    for name, value in counts.items():
+                        setattr(stats, name, getattr(stats, name) + value)
+
+    return [(score,) + item for score, item in best.results()]
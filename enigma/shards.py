@@ -0,0 +1,468 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Splits a key search into numbered shards that can be checkpointed, resumed
+and spread across machines.
+
+A Keyspace covers every combination of reflector, rotor order and ring setting
+of the middle and right rotors; each such combination is one shard, and a shard
+is searched by trying every start position (see search.search_start_positions).
+The ring setting of the leftmost stepping rotor (and of the M4's fourth rotor)
+is not searched: no rotor to its left is stepped by it, so changing its ring
+setting has the same effect as changing its start position.
+
+Shards are numbered in a fixed mixed radix order, reflector first and right ring
+setting last, so the same Keyspace always gives the same shard the same number.
+
+sharded_search() records its progress in a Checkpoint: the completed shard
+numbers and the best results so far. The checkpoint file is replaced atomically
+(written to a temporary file, which is then renamed over the old one), so a
+crash at any moment leaves either the previous or the new checkpoint on disk,
+never a partial one. Running the same search again with the same checkpoint
+file resumes where it stopped.
+
+A search can be limited to a range of shard numbers, so that the work can be
+divided by hand between machines, each with its own checkpoint file:
+
+    $ python -m enigma.shards --model quadgrams.bin --shards 0:1000 \\
+          --checkpoint part1.json CIPHERTEXT
+
+"""
+
+import argparse
+import collections
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from .ngram import NgramModel, text_to_indices, indices_to_text
+from .rotors.data import (STEPPING_ROTORS, FOURTH_ROTORS, THIN_REFLECTORS,
+                          REFLECTOR_NAMES)
+from .search import (search_start_positions, SearchStats, TopK,
+                     DEFAULT_CHUNK_SIZE)
+from .shared import SharedTables
+from .text import keyboard_text
+
+
+class ShardError(Exception):
+    pass
+
+
+# The version of the checkpoint file format:
+CHECKPOINT_VERSION = 1
+
+# Default minimum number of seconds between checkpoint saves:
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+
+# One unit of work: a reflector, rotor order and ring settings:
+Shard = collections.namedtuple('Shard',
+        ['number', 'reflector', 'rotors', 'ring_settings'])
+
+
+class Keyspace:
+    """The set of keys searched, divided into numbered shards."""
+
+    def __init__(self, rotor_count=3, rotors=None, reflectors=None,
+                 fourth_rotors=None, rings=None, plugboard_settings=None,
+                 starts=None):
+        """Define a keyspace. All parameters are optional:
+
+        rotor_count - 3, or 4 for the M4
+
+        rotors - the names of the stepping rotors to choose from; the default
+        is all of them (I to VIII)
+
+        reflectors - the reflector names to try; the default is B and C, or
+        B-Thin and C-Thin for the M4
+
+        fourth_rotors - the M4 fourth rotors to try; the default is Beta and
+        Gamma
+
+        rings - the ring settings (0-25) to try for the middle and right
+        rotors; the default is all 26
+
+        plugboard_settings - a fixed plugboard, as for
+        EnigmaMachine.from_key_sheet
+
+        starts - a list of start positions to try in each shard; the default is
+        all of them
+
+        """
+        if rotor_count not in (3, 4):
+            raise ShardError('rotor_count must be 3 or 4')
+        self.rotor_count = rotor_count
+        self.rotors = tuple(rotors or STEPPING_ROTORS)
+        if reflectors is None:
+            reflectors = REFLECTOR_NAMES if rotor_count == 3 else \
+                         THIN_REFLECTORS
+        self.reflectors = tuple(reflectors)
+        self.fourth_rotors = tuple(fourth_rotors or FOURTH_ROTORS) \
+                             if rotor_count == 4 else ()
+        self.rings = tuple(range(26) if rings is None else rings)
+        self.plugboard_settings = plugboard_settings
+        self.starts = None if starts is None else tuple(starts)
+
+        orders = itertools.permutations(self.rotors, 3)
+        if rotor_count == 4:
+            orders = ((fourth, ) + order for fourth, order in
+                      itertools.product(self.fourth_rotors, orders))
+        self._orders = tuple(orders)
+        if not (self.reflectors and self._orders and self.rings):
+            raise ShardError('empty keyspace')
+
+    def __len__(self):
+        return len(self.reflectors) * len(self._orders) * len(self.rings) ** 2
+
+    def shard(self, number):
+        """Return shard number n (0 <= n < len(self))."""
+        if not 0 <= number < len(self):
+            raise ShardError('no shard %d' % number)
+        rest, right = divmod(number, len(self.rings))
+        rest, middle = divmod(rest, len(self.rings))
+        reflector, order = divmod(rest, len(self._orders))
+        rings = (0, ) * (self.rotor_count - 2) + (self.rings[middle],
+                                                   self.rings[right])
+        return Shard(number, self.reflectors[reflector], self._orders[order],
+                     rings)
+
+    def shards(self, start=0, stop=None):
+        """Generate the shards numbered start up to but not including stop."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for number in range(start, stop):
+            yield self.shard(number)
+
+    @property
+    def trials_per_shard(self):
+        if self.starts is not None:
+            return len(self.starts)
+        return 26 ** self.rotor_count
+
+    def description(self):
+        """Return a dictionary that identifies this keyspace, as stored in a
+        checkpoint.
+
+        """
+        return {
+            'rotor_count': self.rotor_count,
+            'rotors': list(self.rotors),
+            'reflectors': list(self.reflectors),
+            'fourth_rotors': list(self.fourth_rotors),
+            'rings': list(self.rings),
+            'plugboard_settings': self.plugboard_settings,
+            'starts': None if self.starts is None else list(self.starts),
+        }
+
+
+def search_shard(ciphertext, model, keyspace, shard, top_k=10,
+                 chunk_size=DEFAULT_CHUNK_SIZE, bound=None, stats=None):
+    """Try every start position of one shard.
+
+    shard - a Shard or a shard number
+
+    The other parameters are as for search.search_start_positions().
+
+    Returns a list of (score, shard number, start, plaintext) tuples, best
+    first.
+
+    """
+    if not isinstance(shard, Shard):
+        shard = keyspace.shard(shard)
+    results = search_start_positions(ciphertext, model, rotors=shard.rotors,
+            ring_settings=list(shard.ring_settings), reflector=shard.reflector,
+            plugboard_settings=keyspace.plugboard_settings, top_k=top_k,
+            starts=keyspace.starts, chunk_size=chunk_size, bound=bound,
+            stats=stats)
+    return [(score, shard.number, start, text)
+            for score, start, text in results]
+
+
+def _ranges(numbers):
+    """Compress a set of integers into a sorted list of [first, last] runs."""
+    runs = []
+    for number in sorted(numbers):
+        if runs and runs[-1][1] == number - 1:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+    return runs
+
+
+class Checkpoint:
+    """The progress of a sharded search: the completed shards and the best
+    results so far, optionally saved to a file.
+
+    """
+    def __init__(self, keyspace, ciphertext, top_k=10, path=None):
+        """Create an empty checkpoint, or load it from path if that file
+        exists. A loaded checkpoint must be for the same keyspace, ciphertext
+        and top_k, or ShardError is raised. The ciphertext is compared by the
+        digest of its keyboard letters, so it may contain other characters.
+
+        """
+        self.keyspace = keyspace
+        self.path = path
+        self.top_k = top_k
+        self.digest = hashlib.sha256(keyboard_text(ciphertext, None).encode('ascii')).hexdigest()
+        self.completed = set()
+        self.best = TopK(top_k)
+        self.stats = SearchStats()
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def _header(self):
+        return {
+            'version': CHECKPOINT_VERSION,
+            'keyspace': self.keyspace.description(),
+            'ciphertext_sha256': self.digest,
+            'top_k': self.top_k,
+        }
+
+    def _load(self):
+        try:
+            with open(self.path) as fp:
+                data = json.load(fp)
+        except ValueError as ex:
+            raise ShardError('invalid checkpoint %s: %s' % (self.path, ex))
+
+        for name, value in self._header().items():
+            if data.get(name) != value:
+                raise ShardError('checkpoint %s does not match this search '
+                                 '(%s differs)' % (self.path, name))
+
+        for first, last in data['completed']:
+            self.completed.update(range(first, last + 1))
+        for score, number, start, text in data['results']:
+            self.best.push(score, (number, start, text))
+        for name, value in data['stats'].items():
+            setattr(self.stats, name, value)
+
+    def save(self):
+        """Atomically replace the checkpoint file with the current state."""
+        if self.path is None:
+            return
+        data = self._header()
+        data['completed'] = _ranges(self.completed)
+        data['results'] = self.results()
+        data['stats'] = self.stats.as_dict()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(data, fp)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(temp, self.path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def add(self, number, results, counts=None):
+        """Record a completed shard and its results.
+
+        results - a list of (score, shard number, start, plaintext) tuples
+
+        counts - an optional dictionary of SearchStats counters to add
+
+        """
+        self.completed.add(number)
+        for score, shard, start, text in results:
+            self.best.push(score, (shard, start, text))
+        for name, value in (counts or {}).items():
+            setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def results(self):
+        """Return a list of (score, shard number, start, plaintext) lists,
+        best first.
+
+        """
+        return [[score, number, start, text]
+                for score, (number, start, text) in self.best.results()]
+
+
+# The state of a sharded_search() worker process, set by _init_worker():
+_worker = {}
+
+
+def _init_worker(handle, ciphertext, keyspace, kwargs):
+    shared = SharedTables.attach(handle)
+    _worker.update(shared=shared, model=shared.ngram_model(),
+                   ciphertext=ciphertext, keyspace=keyspace, kwargs=kwargs)
+
+
+def _search_shard(number):
+    stats = SearchStats()
+    results = search_shard(_worker['ciphertext'], _worker['model'],
+                           _worker['keyspace'], number, stats=stats,
+                           **_worker['kwargs'])
+    return number, results, stats.as_dict()
+
+
+def sharded_search(ciphertext, model, keyspace, checkpoint=None, start=0,
+        stop=None, top_k=10, processes=0, chunk_size=DEFAULT_CHUNK_SIZE,
+        bound=None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+        progress=None):
+    """Search the shards numbered start up to but not including stop, skipping
+    any already completed in the checkpoint.
+
+    checkpoint - a Checkpoint, or the path of a checkpoint file (created if it
+    does not exist), or None to keep no checkpoint
+
+    processes - the number of worker processes; 0 searches in this process and
+    None means one per CPU
+
+    checkpoint_interval - the minimum number of seconds between checkpoint
+    saves. The checkpoint is also saved when the search finishes or is
+    interrupted.
+
+    progress - an optional function called with the checkpoint after every
+    completed shard
+
+    The remaining parameters are as for search_shard(). Returns the
+    Checkpoint; its results() are the best results over all completed shards.
+
+    """
+    ciphertext = indices_to_text(text_to_indices(ciphertext))
+    if not isinstance(checkpoint, Checkpoint):
+        checkpoint = Checkpoint(keyspace, ciphertext, top_k, checkpoint)
+
+    stop = len(keyspace) if stop is None else min(stop, len(keyspace))
+    todo = [n for n in range(start, stop) if n not in checkpoint.completed]
+    kwargs = dict(top_k=top_k, chunk_size=chunk_size, bound=bound)
+    last_save = time.monotonic()
+
+    def record(number, results, counts):
+        nonlocal last_save
+        checkpoint.add(number, results, counts)
+        if progress is not None:
+            progress(checkpoint)
+        if time.monotonic() - last_save >= checkpoint_interval:
+            checkpoint.save()
+            last_save = time.monotonic()
+
+    try:
+        if processes == 0:
+            for number in todo:
+                stats = SearchStats()
+                results = search_shard(ciphertext, model, keyspace, number,
+                                       stats=stats, **kwargs)
+                record(number, results, stats.as_dict())
+        elif todo:
+            with SharedTables.create(model=model) as shared:
+                with multiprocessing.Pool(processes, initializer=_init_worker,
+                        initargs=(shared.handle, ciphertext, keyspace,
+                                  kwargs)) as pool:
+                    for result in pool.imap_unordered(_search_shard, todo):
+                        record(*result)
+    finally:
+        checkpoint.save()
+
+    return checkpoint
+
+
+def format_result(keyspace, result):
+    """Format a (score, shard number, start, plaintext) result as a line of
+    text giving the full key.
+
+    """
+    score, number, start, text = result
+    shard = keyspace.shard(number)
+    return '%10.2f  %s %s %s  %s  %s' % (score, shard.reflector,
+            ' '.join(shard.rotors),
+            ' '.join('%02d' % (r + 1) for r in shard.ring_settings),
+            start, text)
+
+
+def _parse_range(text):
+    first, sep, last = text.partition(':')
+    try:
+        if not sep:
+            return int(first), int(first) + 1
+        return int(first or 0), int(last) if last else None
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid shard range: %s' % text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('ciphertext', help='the ciphertext to attack')
+    parser.add_argument('-m', '--model', required=True,
+            help='n-gram model file (see ngram.NgramModel.save)')
+    parser.add_argument('-c', '--checkpoint',
+            help='checkpoint file; an existing one is resumed')
+    parser.add_argument('-s', '--shards', type=_parse_range, default=(0, None),
+            metavar='FIRST:STOP',
+            help='search only shards FIRST up to but not including STOP')
+    parser.add_argument('-r', '--rotor-count', type=int, choices=[3, 4],
+            default=3, help='3 or 4 rotors [default: %(default)s]')
+    parser.add_argument('--rotors', help='stepping rotors to choose from, '
+            'e.g. "I II III IV V" [default: all]')
+    parser.add_argument('--reflectors', help='reflectors to try, e.g. "B" '
+            '[default: B C, or B-Thin C-Thin for 4 rotors]')
+    parser.add_argument('-p', '--plugboard', help='fixed plugboard settings')
+    parser.add_argument('-k', '--top-k', type=int, default=10,
+            help='number of results to keep [default: %(default)s]')
+    parser.add_argument('-j', '--processes', type=int, default=0,
+            help='worker processes; 0 searches in this process '
+                 '[default: %(default)s]')
+    parser.add_argument('--interval', type=float,
+            default=DEFAULT_CHECKPOINT_INTERVAL,
+            help='seconds between checkpoint saves [default: %(default)s]')
+    parser.add_argument('--list', action='store_true',
+            help='print the number of shards and exit')
+    args = parser.parse_args(argv)
+
+    try:
+        keyspace = Keyspace(args.rotor_count,
+                rotors=args.rotors.split() if args.rotors else None,
+                reflectors=args.reflectors.split() if args.reflectors else None,
+                plugboard_settings=args.plugboard)
+    except ShardError as ex:
+        parser.error(str(ex))
+    if args.list:
+        print('%d shards of %d trials' % (len(keyspace),
+                                          keyspace.trials_per_shard))
+        return
+
+    start, stop = args.shards
+    stop = len(keyspace) if stop is None else min(stop, len(keyspace))
+    model = NgramModel.load(args.model)
+    try:
+        ciphertext = indices_to_text(text_to_indices(args.ciphertext))
+        checkpoint = Checkpoint(keyspace, ciphertext, args.top_k,
+                                args.checkpoint)
+        # progress before this run
+        done = [sum(1 for n in checkpoint.completed if start <= n < stop)]
+        resumed = checkpoint.stats.trials
+        began = time.monotonic()
+
+        def progress(checkpoint):
+            done[0] += 1
+            elapsed = time.monotonic() - began
+            sys.stderr.write('\r%d/%d shards, %d trials/s' % (
+                             done[0], stop - start,
+                             (checkpoint.stats.trials - resumed) / elapsed
+                             if elapsed else 0))
+
+        sharded_search(ciphertext, model, keyspace, checkpoint, start, stop,
+                       args.top_k, args.processes,
+                       checkpoint_interval=args.interval, progress=progress)
+    except ShardError as ex:
+        parser.error(str(ex))
+    finally:
+        model.close()
+    sys.stderr.write('\n')
+
+    for result in checkpoint.results():
+        print(format_result(keyspace, result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains the SharedTables class, which places large read-only lookup tables
+in a multiprocessing.shared_memory block so that a pool of worker processes can
+use a single copy of them.
+
+An NgramModel built with from_corpus(), or a ScramblerAtlas built with build(),
+lives in the private memory of the process that made it. Every worker of a
+process pool that needs it would otherwise receive and keep its own copy: 1.8 MB
+for a quadgram model, 27 MB for an atlas of the 5 army rotors. With
+SharedTables the parent copies each table into shared memory once, and the
+workers attach to the block and wrap the tables in place without copying.
+
+Typical use:
+
+    with SharedTables.create(model=model) as shared:
+        with multiprocessing.Pool(initializer=init, initargs=(shared.handle,)):
+            ...
+
+    def init(handle):
+        global model
+        model = SharedTables.attach(handle).ngram_model()
+
+The handle is a small picklable tuple: the name of the block and where each
+table lies within it. Only the creating process unlinks the block.
+
+Rotor and reflector tables (see rotors.tables) are about 13 KB per rotor model,
+so they are rebuilt in each worker rather than shared. Models and atlases
+loaded from a file with load() are already memory-mapped and so shared through
+the page cache; they gain nothing from being placed here.
+
+"""
+
+from multiprocessing import resource_tracker, shared_memory
+
+from .atlas import ScramblerAtlas
+from .ngram import NgramModel
+
+
+class SharedTablesError(Exception):
+    pass
+
+
+def _attach(name):
+    """Attach to an existing shared memory block without taking ownership."""
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13, attaching always registers the block with the
+    # resource tracker. Workers share their parent's tracker, which would then
+    # see the block released twice (or unlink it early), so registration is
+    # suppressed while attaching.
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedTables:
+    """A shared memory block holding an n-gram model and/or a scrambler atlas.
+
+    Instances are created with create() in the parent process and attach() in
+    the workers, not by calling the constructor directly.
+
+    """
+    def __init__(self, shm, layout, owner):
+        self._shm = shm
+        self._layout = layout       # key -> (offset, length, metadata)
+        self._owner = owner
+        self._views = []
+
+    @classmethod
+    def create(cls, model=None, atlas=None):
+        """Copy tables into a new shared memory block.
+
+        model - an optional NgramModel
+
+        atlas - an optional ScramblerAtlas
+
+        """
+        parts = []
+        if model is not None:
+            parts.append(('ngram', memoryview(model.table).cast('B'),
+                          (model.n, model.floor)))
+        if atlas is not None:
+            parts.append(('atlas', memoryview(atlas.data),
+                          (atlas.reflector, atlas.rotors)))
+        if not parts:
+            raise SharedTablesError('nothing to share')
+
+        layout = {}
+        offset = 0
+        for key, data, meta in parts:
+            layout[key] = (offset, len(data), meta)
+            offset += (len(data) + 63) & ~63      # keep tables 64 byte aligned
+
+        shm = shared_memory.SharedMemory(create=True, size=offset)
+        for key, data, meta in parts:
+            start = layout[key][0]
+            shm.buf[start:start + len(data)] = data
+            data.release()
+        return cls(shm, layout, owner=True)
+
+    @classmethod
+    def attach(cls, handle):
+        """Attach to the block described by handle (see the handle property).
+        This is normally called in a worker process initializer.
+
+        """
+        name, layout = handle
+        return cls(_attach(name), dict(layout), owner=False)
+
+    @property
+    def handle(self):
+        """A small picklable description of the block, for attach()."""
+        return (self._shm.name, tuple(self._layout.items()))
+
+    @property
+    def size(self):
+        """The size of the shared memory block in bytes."""
+        return self._shm.size
+
+    def _view(self, key):
+        if self._shm is None:
+            raise SharedTablesError('shared tables are closed')
+        if key not in self._layout:
+            raise SharedTablesError('no %s table in shared memory' % key)
+        offset, length, meta = self._layout[key]
+        view = self._shm.buf[offset:offset + length]
+        self._views.append(view)
+        return view, meta
+
+    def ngram_model(self):
+        """Return an NgramModel whose table is the shared copy."""
+        view, (n, floor) = self._view('ngram')
+        table = view.cast('f')
+        self._views.append(table)
+        return NgramModel(n, table, floor)
+
+    def atlas(self):
+        """Return a ScramblerAtlas whose data is the shared copy."""
+        view, (reflector, rotors) = self._view('atlas')
+        return ScramblerAtlas(reflector, rotors, view)
+
+    def close(self):
+        """Detach from the block. Models and atlases returned by this object
+        may not be used afterwards. If this is the creating process, the block
+        is also destroyed.
+
+        """
+        if self._shm is None:
+            return
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,178 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains the MachineSpec class, a normalized and hashable description of an
+Enigma key.
+
+The same key can be written down in many ways: plugboard settings in army
+('AV BS') or navy ('1/22 2/19') format and in any pair order, ring settings as
+letters, 1-based numbers or 0-based integers, and rotors as a list or a string.
+A MachineSpec reduces all of these to a single canonical value, so that it can
+be used as a dictionary or cache key.
+
+"""
+
+import collections
+
+from .machine import EnigmaMachine, EnigmaError, parse_ring_settings
+from .plugboard import Plugboard
+from .rotors import RotorError
+from .rotors.data import ROTORS, REFLECTORS
+
+
+_SpecBase = collections.namedtuple('MachineSpec',
+        ['rotors', 'ring_settings', 'reflector', 'plugboard'])
+
+
+class MachineSpec(_SpecBase):
+    """A frozen, hashable Enigma key. Fields:
+
+    rotors - a tuple of 3 or 4 rotor names, left to right
+
+    ring_settings - a tuple of integers 0-25, one per rotor
+
+    reflector - the reflector name
+
+    plugboard - a sorted tuple of (m, n) plug number pairs (0-25), with m < n
+
+    Instances are normally created with from_key_sheet(), from_settings(),
+    from_machine() or parse() rather than by calling the constructor directly.
+
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_key_sheet(cls, rotors='I II III', ring_settings=None,
+            reflector='B', plugboard_settings=None):
+        """Build a MachineSpec from the same parameters accepted by
+        EnigmaMachine.from_key_sheet.
+
+        """
+        if isinstance(rotors, str):
+            rotors = rotors.split()
+        rotors = tuple(rotors)
+        if len(rotors) not in (3, 4):
+            raise EnigmaError("invalid rotors list size")
+        for name in rotors:
+            if name not in ROTORS:
+                raise RotorError("Unknown rotor type: %s" % name)
+        if reflector not in REFLECTORS:
+            raise RotorError("Unknown reflector type: %s" % reflector)
+
+        rings = tuple(parse_ring_settings(ring_settings, len(rotors)))
+        for ring in rings:
+            if not isinstance(ring, int) or not (0 <= ring < 26):
+                raise RotorError("invalid ring_setting")
+
+        pairs = Plugboard.from_key_sheet(plugboard_settings).get_pairs()
+        return cls(rotors, rings, reflector, tuple(sorted(pairs)))
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build a MachineSpec from a dictionary of keyword arguments for
+        EnigmaMachine.from_key_sheet, e.g. as returned by
+        keyfile.get_daily_settings.
+
+        """
+        return cls.from_key_sheet(**settings)
+
+    @classmethod
+    def from_machine(cls, machine):
+        """Build a MachineSpec describing the key of an EnigmaMachine. The
+        machine must use the standard rotors and reflectors.
+
+        """
+        return cls.from_key_sheet(
+                rotors=[r.name for r in machine.rotors],
+                ring_settings=[r.ring_setting for r in machine.rotors],
+                reflector=machine.reflector.name,
+                plugboard_settings=machine.plugboard.army_str())
+
+    @classmethod
+    def coerce(cls, spec):
+        """Return spec if it is a MachineSpec, otherwise treat it as a
+        dictionary of settings (see from_settings()).
+
+        """
+        if isinstance(spec, cls):
+            return spec
+        return cls.from_settings(spec)
+
+    @classmethod
+    def parse(cls, text):
+        """Parse a key in the key sheet column format produced by army_str()
+        and navy_str(): rotor names, ring settings, plugboard pairs and finally
+        the reflector name, all space separated. For example:
+
+            'II IV V 02 21 12 AV BS CG DL FU HZ IN KM OW RX B'
+            'Beta II IV I A A A V 1/20 2/12 4/6 7/10 B-Thin'
+
+        A key has 4 rotors if the first rotor is one of the stationary M4
+        rotors (Beta or Gamma), otherwise it has 3.
+
+        """
+        cols = text.split()
+        if not cols:
+            raise EnigmaError('empty key specification')
+
+        name = cols[0]
+        count = 4 if name in ROTORS and ROTORS[name]['stepping'] is None else 3
+        if len(cols) < 2 * count + 1:
+            raise EnigmaError('invalid key specification: %s' % text)
+
+        return cls.from_key_sheet(
+                rotors=cols[:count],
+                ring_settings=' '.join(cols[count:2 * count]),
+                reflector=cols[-1],
+                plugboard_settings=' '.join(cols[2 * count:-1]))
+
+    def to_settings(self):
+        """Return a dictionary of keyword arguments for
+        EnigmaMachine.from_key_sheet.
+
+        """
+        return {
+            'rotors': list(self.rotors),
+            'ring_settings': list(self.ring_settings),
+            'reflector': self.reflector,
+            'plugboard_settings': self.plugboard_str(),
+        }
+
+    def create_machine(self, display=None):
+        """Build an EnigmaMachine for this key, optionally setting the rotor
+        display.
+
+        """
+        machine = EnigmaMachine.from_key_sheet(**self.to_settings())
+        if display is not None:
+            machine.set_display(display)
+        return machine
+
+    def plugboard_str(self):
+        """Return the plugboard settings in army format, e.g. 'AV BS CG'."""
+        return ' '.join(chr(m + ord('A')) + chr(n + ord('A'))
+                        for m, n in self.plugboard)
+
+    def army_str(self):
+        """Return the key as on an army key sheet: ring settings as 1-based
+        numbers and plugboard settings as letter pairs.
+
+        """
+        rings = ['%02d' % (r + 1) for r in self.ring_settings]
+        plugs = [chr(m + ord('A')) + chr(n + ord('A'))
+                 for m, n in self.plugboard]
+        return ' '.join(list(self.rotors) + rings + plugs + [self.reflector])
+
+    def navy_str(self):
+        """Return the key as on a navy key sheet: ring settings as letters and
+        plugboard settings as 1-based number pairs.
+
+        """
+        rings = [chr(r + ord('A')) for r in self.ring_settings]
+        plugs = ['%d/%d' % (m + 1, n + 1) for m, n in self.plugboard]
+        return ' '.join(list(self.rotors) + rings + plugs + [self.reflector])
+
+    def __str__(self):
+        """Returns the key in army format."""
+        return self.army_str()
@@ -0,0 +1,183 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains functions to analyze the sequence of rotor positions a machine
+steps through.
+
+Because of the double stepping of the middle rotor (see
+EnigmaMachine._step_rotors), the rotors of a 3 rotor machine do not step
+through all 26 ** 3 positions. With single notch rotors the positions form one
+cycle of 26 * 25 * 26 = 16,900 positions. The remaining 676 positions, such as
+those with the middle rotor showing its notch letter while the right rotor is
+not just past its own notch, can only be set by hand; the machine steps out of
+them and never returns. Rotors with two notches (VI, VII and VIII) give shorter
+periods and split the positions into several independent cycles.
+
+The stepping only depends on the notches of the middle and right rotors, and
+notches are determined by the letters in the operator windows. All positions in
+this module are therefore display values, independent of the ring settings. A
+position (left, middle, right) of letter numbers 0-25 is encoded as the integer
+left * 676 + middle * 26 + right.
+
+On the M4, the leftmost rotor never steps; only the 3 rightmost rotors are
+considered.
+
+"""
+
+import array
+import functools
+
+from .machine import EnigmaError, KEYBOARD_CHARS
+from .rotors import RotorError
+from .rotors.data import ROTORS
+
+
+POSITIONS = 26 ** 3
+
+
+def encode_position(display):
+    """Encode a 3 letter display string (e.g. 'ABC') as an integer."""
+    if len(display) != 3:
+        raise EnigmaError('expecting 3 display values: %s' % display)
+    try:
+        l, m, r = (KEYBOARD_CHARS.index(c) for c in display.upper())
+    except ValueError:
+        raise EnigmaError('bad display value %s' % display)
+    return (l * 26 + m) * 26 + r
+
+
+def decode_position(n):
+    """Decode an integer position into a 3 letter display string."""
+    lm, r = divmod(n, 26)
+    l, m = divmod(lm, 26)
+    return KEYBOARD_CHARS[l] + KEYBOARD_CHARS[m] + KEYBOARD_CHARS[r]
+
+
+class SteppingCycles:
+    """The complete stepping behavior of one combination of middle and right
+    rotor notches.
+
+    Instances are obtained from stepping_cycles() and are shared, so they must
+    be treated as read-only. Attributes:
+
+    cycles - a list of array.array('H') objects, one per cycle. Each holds the
+    encoded positions of a cycle in stepping order.
+
+    next_position - an array.array('H') mapping every encoded position to the
+    position after one key press.
+
+    """
+    def __init__(self, middle_notches, right_notches):
+        nm = set(middle_notches)
+        nr = set(right_notches)
+
+        # compute the successor of every position
+        succ = array.array('H', bytes(2 * POSITIONS))
+        for n in range(POSITIONS):
+            lm, r = divmod(n, 26)
+            l, m = divmod(lm, 26)
+            if m in nm:
+                l = (l + 1) % 26
+                m = (m + 1) % 26
+            elif r in nr:
+                m = (m + 1) % 26
+            succ[n] = (l * 26 + m) * 26 + (r + 1) % 26
+        self.next_position = succ
+
+        # Find the cycles by following positions until we reach one we have
+        # already seen. If it was seen on the current walk, we found a cycle.
+        # cycle_map[n] is the number of the cycle n is on, or -1.
+        self.cycles = []
+        self._cycle_map = array.array('b', [-1]) * POSITIONS
+        self._index_map = array.array('H', bytes(2 * POSITIONS))
+        seen = bytearray(POSITIONS)
+        for start in range(POSITIONS):
+            walk = []
+            n = start
+            while not seen[n]:
+                seen[n] = 1
+                walk.append(n)
+                n = succ[n]
+            if n in walk:
+                cycle = array.array('H', walk[walk.index(n):])
+                number = len(self.cycles)
+                for i, p in enumerate(cycle):
+                    self._cycle_map[p] = number
+                    self._index_map[p] = i
+                self.cycles.append(cycle)
+
+    @property
+    def periods(self):
+        """A list of the length of each cycle."""
+        return [len(c) for c in self.cycles]
+
+    def lookup(self, display):
+        """Return a tuple (cycle number, index) giving the location of a
+        position within the cycles, or None if the machine can never step into
+        that position.
+
+        display - a 3 letter display string or an encoded position
+
+        """
+        n = display if isinstance(display, int) else encode_position(display)
+        number = self._cycle_map[n]
+        if number == -1:
+            return None
+        return number, self._index_map[n]
+
+    def cycle(self, display):
+        """Return the cycle (an array of encoded positions) that a machine
+        started at display will step through.
+
+        """
+        n = display if isinstance(display, int) else encode_position(display)
+        while self._cycle_map[n] == -1:
+            n = self.next_position[n]
+        return self.cycles[self._cycle_map[n]]
+
+    def advance(self, display, count):
+        """Return the display string after count key presses, starting at
+        display. This takes constant time regardless of count.
+
+        """
+        n = display if isinstance(display, int) else encode_position(display)
+        while count > 0 and self._cycle_map[n] == -1:
+            n = self.next_position[n]
+            count -= 1
+
+        if self._cycle_map[n] == -1:
+            return decode_position(n)
+
+        cycle = self.cycles[self._cycle_map[n]]
+        return decode_position(cycle[(self._index_map[n] + count) % len(cycle)])
+
+
+@functools.lru_cache(maxsize=None)
+def _stepping_cycles(middle_notches, right_notches):
+    return SteppingCycles(middle_notches, right_notches)
+
+
+def stepping_cycles(rotors):
+    """Return the SteppingCycles for a rotor order.
+
+    rotors - a list of 3 or 4 rotor names (left to right) or a single string,
+    e.g. 'II IV V'. See rotors.data.ROTORS.
+
+    Results are cached, and shared by all rotor orders with the same middle and
+    right rotor notches.
+
+    """
+    if isinstance(rotors, str):
+        rotors = rotors.split()
+    if len(rotors) not in (3, 4):
+        raise EnigmaError("Must supply 3 or 4 rotors")
+
+    notches = []
+    for name in rotors[-2:]:
+        if name not in ROTORS:
+            raise RotorError("Unknown rotor type: %s" % name)
+        stepping = ROTORS[name]['stepping'] or ''
+        notches.append(tuple(sorted(KEYBOARD_CHARS.index(c) for c in stepping)))
+
+    return _stepping_cycles(*notches)
@@ -0,0 +1,136 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the asyncio streaming API."""
+
+import asyncio
+import concurrent.futures
+import unittest
+
+from ..aio import process_stream, process_text, process_to_writer, AioError
+from ..machine import EnigmaMachine
+
+
+TEXT = 'Grüße aus Köln! The Russians are coming. ' * 50
+
+
+def create_machine():
+    machine = EnigmaMachine.from_key_sheet(rotors='II IV V', reflector='B',
+                                           ring_settings=[1, 20, 11],
+                                           plugboard_settings='AV BS CG DL')
+    machine.set_display('WXC')
+    return machine
+
+
+async def chunks(items, log=None):
+    for item in items:
+        if log is not None:
+            log.append(item)
+        yield item
+
+
+class Writer:
+    """A StreamWriter stand-in that records writes and drains."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+class AioTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.expected = create_machine().process_text(TEXT)
+
+    async def collect(self, machine, source, **kwargs):
+        return ''.join([r async for r in process_stream(machine, source,
+                                                        **kwargs)])
+
+    async def test_chunks(self):
+        for size in (1, 7, 100, len(TEXT)):
+            pieces = [TEXT[i:i + size] for i in range(0, len(TEXT), size)]
+            machine = create_machine()
+            result = await self.collect(machine, chunks(pieces), slice_size=64)
+            self.assertEqual(result, self.expected)
+
+        # the machine keeps its state from call to call
+        machine = create_machine()
+        first = await process_text(machine, TEXT[:100], slice_size=16)
+        second = await process_text(machine, TEXT[100:])
+        self.assertEqual(first + second, self.expected)
+
+        result = await self.collect(create_machine(), chunks([TEXT]),
+                                    replace_char=None)
+        self.assertEqual(result, create_machine().process_text(TEXT, None))
+
+    async def test_stream_reader(self):
+        # multi-byte characters split across reads are decoded whole
+        reader = asyncio.StreamReader()
+        reader.feed_data(TEXT.encode('utf-8'))
+        reader.feed_eof()
+        result = await self.collect(create_machine(), reader, read_size=3)
+        self.assertEqual(result, self.expected)
+
+        data = TEXT.encode('utf-8')
+        result = await self.collect(create_machine(),
+                                    chunks([data[:3], data[3:]]))
+        self.assertEqual(result, self.expected)
+
+        with self.assertRaises(AioError):
+            await self.collect(create_machine(), [TEXT])
+
+    async def test_executor(self):
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            result = await self.collect(create_machine(),
+                                        chunks([TEXT[:10], TEXT[10:]]),
+                                        executor=executor,
+                                        executor_threshold=100)
+        self.assertEqual(result, self.expected)
+
+        machine = create_machine()
+        result = await process_text(machine, TEXT, executor_threshold=0)
+        self.assertEqual(result, self.expected)
+
+    async def test_yields(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        start = ticks
+        await process_text(create_machine(), TEXT, slice_size=100)
+        task.cancel()
+        self.assertGreaterEqual(ticks - start, len(TEXT) // 100)
+
+    async def test_backpressure(self):
+        # no input is read until the previous results are taken
+        log = []
+        stream = process_stream(create_machine(), chunks(['AB', 'CD', 'EF'],
+                                                         log))
+        await stream.__anext__()
+        self.assertEqual(log, ['AB'])
+        await stream.__anext__()
+        self.assertEqual(log, ['AB', 'CD'])
+        await stream.aclose()
+
+    async def test_writer(self):
+        writer = Writer()
+        count = await process_to_writer(create_machine(), chunks([TEXT]),
+                                        writer, groups=5, slice_size=256)
+        self.assertEqual(count, len(self.expected))
+        self.assertEqual(writer.drains, -(-len(TEXT) // 256))
+        groups = writer.data.decode('ascii').split(' ')
+        self.assertEqual(''.join(groups), self.expected)
+        self.assertEqual({len(g) for g in groups[:-1]}, {5})
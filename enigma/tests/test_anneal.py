@@ -0,0 +1,99 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the simulated annealing key solver."""
+
+import random
+import time
+import unittest
+
+from ..anneal import anneal, solve, AnnealError, SolveStats
+from ..machine import EnigmaMachine
+from ..ngram import NgramModel
+from ..spec import MachineSpec
+from .test_search import CORPUS
+
+
+PLAINTEXT = ''.join(c for c in CORPUS if c.isalpha())[:120]
+
+SPEC = MachineSpec.from_key_sheet(rotors='II IV V', ring_settings=[0, 3, 7],
+                                  plugboard_settings='AV BS CG')
+
+
+class AnnealTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = NgramModel.from_corpus(CORPUS, n=4)
+        machine = SPEC.create_machine('QEV')
+        self.ciphertext = machine.process_text(PLAINTEXT)
+        self.orders = [SPEC.rotors]
+
+    def test_true_key(self):
+        # the true key is never replaced by a worse one
+        solution, trials = anneal(self.ciphertext, self.model, self.orders,
+                                  rng=random.Random(1), iterations=300,
+                                  max_pairs=3, start_key=(SPEC, 'QEV'))
+        self.assertEqual(trials, 300)
+        self.assertEqual(solution.plaintext, PLAINTEXT)
+        self.assertEqual(solution.spec, SPEC)
+        self.assertEqual(solution.start, 'QEV')
+        self.assertAlmostEqual(solution.score,
+                               self.model.score_text(PLAINTEXT), places=3)
+
+    def test_missing_plug(self):
+        start = SPEC._replace(plugboard=SPEC.plugboard[:2])
+        solution, _ = anneal(self.ciphertext, self.model, self.orders,
+                             rng=random.Random(2), iterations=2000,
+                             max_pairs=3, start_key=(start, 'QEV'),
+                             target=self.model.score_text(PLAINTEXT) - 1e-3)
+        self.assertEqual(solution.plaintext, PLAINTEXT)
+        self.assertEqual(solution.spec.plugboard, SPEC.plugboard)
+
+    def test_max_pairs(self):
+        solution, _ = anneal(self.ciphertext, self.model, self.orders,
+                             rng=random.Random(3), iterations=500, max_pairs=2)
+        self.assertLessEqual(len(solution.spec.plugboard), 2)
+        self.assertEqual(solution.spec.ring_settings[0], 0)
+        # the solution is a real key for its plaintext
+        machine = solution.spec.create_machine(solution.start)
+        self.assertEqual(machine.process_text(self.ciphertext),
+                         solution.plaintext)
+
+    def test_errors(self):
+        self.assertRaises(AnnealError, anneal, self.ciphertext, self.model,
+                          [('I', 'II', 'III'), ('Beta', 'I', 'II', 'III')])
+        self.assertRaises(AnnealError, anneal, self.ciphertext, self.model,
+                          self.orders, max_pairs=11)
+
+    def test_solve(self):
+        stats = SolveStats()
+        solutions = solve(self.ciphertext, self.model,
+                          rotor_orders=[('II', 'IV', 'V'), ('IV', 'II', 'V')],
+                          reflectors=('B', 'C'), restarts=3, iterations=300,
+                          seed=5, top_k=2, stats=stats, max_pairs=3)
+        self.assertEqual(len(solutions), 2)
+        self.assertGreaterEqual(solutions[0].score, solutions[1].score)
+        self.assertEqual(stats.restarts, 3)
+        self.assertEqual(stats.trials, 900)
+        self.assertTrue(1 <= stats.converged <= 3)
+        self.assertGreater(stats.trials_per_second, 0)
+
+        # restarts are reproducible
+        again = solve(self.ciphertext, self.model,
+                      rotor_orders=[('II', 'IV', 'V'), ('IV', 'II', 'V')],
+                      reflectors=('B', 'C'), restarts=3, iterations=300,
+                      seed=5, top_k=2, max_pairs=3)
+        self.assertEqual(again, solutions)
+
+    def test_parallel(self):
+        stats = SolveStats()
+        began = time.monotonic()
+        solutions = solve(self.ciphertext, self.model,
+                          rotor_orders=self.orders, restarts=4,
+                          iterations=10 ** 6, time_budget=1.0, processes=2,
+                          stats=stats, max_pairs=3)
+        self.assertLess(time.monotonic() - began, 20)
+        self.assertEqual(stats.restarts, 4)
+        self.assertLess(stats.trials, 4 * 10 ** 6)
+        self.assertTrue(solutions)
@@ -0,0 +1,84 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the ScramblerAtlas class."""
+
+import os
+import random
+import tempfile
+import unittest
+
+from ..atlas import ScramblerAtlas, AtlasError
+from ..machine import EnigmaMachine
+from ..rotors import RotorError
+
+
+class ScramblerAtlasTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.atlas = ScramblerAtlas.build('C', rotors=('I', 'II', 'III'))
+
+    def check(self, atlas, rotors, display, ring_settings):
+
+        machine = EnigmaMachine.from_key_sheet(rotors=rotors,
+                ring_settings=ring_settings, reflector=atlas.reflector)
+        machine.set_display(display)
+
+        perm = atlas.scrambler_at(rotors, display, ring_settings)
+        expected = bytes(machine._electric_signal(n) for n in range(26))
+        self.assertEqual(perm, expected)
+
+    def test_against_machine(self):
+
+        rng = random.Random(28)
+        for order in self.atlas.orders:
+            for _ in range(10):
+                display = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                                  for _ in range(3))
+                rings = [rng.randrange(26) for _ in range(3)]
+                self.check(self.atlas, order, display, rings)
+
+    def test_wikipedia(self):
+
+        # AAAAA encrypts to BDZGO on I II III starting at AAA
+        atlas = ScramblerAtlas.build('B', rotors=('I', 'II', 'III'))
+        positions = [(0, 0, 1), (0, 0, 2), (0, 0, 3), (0, 0, 4), (0, 0, 5)]
+        result = ''.join(chr(atlas.scrambler(('I', 'II', 'III'), p)[0] + 65)
+                         for p in positions)
+        self.assertEqual(result, 'BDZGO')
+
+    def test_size(self):
+
+        self.assertEqual(len(self.atlas.orders), 6)
+        self.assertEqual(len(self.atlas.data), 6 * 26 ** 4)
+
+    def test_errors(self):
+
+        self.assertRaises(RotorError, ScramblerAtlas.build, 'X')
+        self.assertRaises(RotorError, ScramblerAtlas.build, 'B', ('I', 'X'))
+        self.assertRaises(AtlasError, ScramblerAtlas.build, 'B', ('I', 'II'))
+        self.assertRaises(AtlasError, self.atlas.scrambler, ('I', 'II', 'IV'),
+                          (0, 0, 0))
+        self.assertRaises(AtlasError, self.atlas.scrambler_at,
+                          ('I', 'II', 'III'), 'AB')
+
+    def test_save_load(self):
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.atlas.save(path)
+            loaded = ScramblerAtlas.load(path)
+            self.assertEqual(loaded.reflector, 'C')
+            self.assertEqual(loaded.rotors, ('I', 'II', 'III'))
+            self.assertEqual(loaded.data, self.atlas.data)
+            self.check(loaded, ('III', 'I', 'II'), 'QEV', [3, 14, 15])
+            loaded.close()
+
+            with open(path, 'r+b') as fp:
+                fp.truncate(1000)
+            self.assertRaises(AtlasError, ScramblerAtlas.load, path)
+        finally:
+            os.remove(path)
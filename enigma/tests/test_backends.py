@@ -0,0 +1,106 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the process_text backends. The EnigmaMachine test vectors in
+test_enigma.py are run again under every available backend other than python.
+
+"""
+
+import unittest
+import warnings
+
+from . import test_enigma
+from ..backends import (available_backends, get_backend, set_backend,
+                        BackendError, BACKENDS)
+from ..machine import EnigmaMachine, EnigmaError
+
+
+class BackendMixin:
+
+    backend = None
+
+    def run(self, result=None):
+        previous = get_backend()
+        set_backend(self.backend, strict=True)
+        try:
+            return super().run(result)
+        finally:
+            set_backend(previous)
+
+
+# create a test case class per backend for every test case class in
+# test_enigma, e.g. ActualDecryptTestCase_tables
+for _backend in available_backends():
+    if _backend == 'python':
+        continue
+    for _name in dir(test_enigma):
+        _cls = getattr(test_enigma, _name)
+        if isinstance(_cls, type) and issubclass(_cls, unittest.TestCase):
+            _new = '%s_%s' % (_name, _backend)
+            globals()[_new] = type(_new, (BackendMixin, _cls),
+                                   {'backend': _backend})
+
+
+class SetBackendTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        set_backend('python')
+
+    def test_set_backend(self):
+        self.assertEqual(get_backend(), 'python')
+        self.assertIn('tables', available_backends())
+        self.assertEqual(set_backend('tables'), 'tables')
+        self.assertEqual(get_backend(), 'tables')
+        self.assertRaises(BackendError, set_backend, 'cuda')
+
+    def test_fallback(self):
+        if 'numba' in BACKENDS:
+            self.skipTest('numba is installed')
+        self.assertRaises(BackendError, set_backend, 'numba', strict=True)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(set_backend('numba'), 'python')
+        self.assertEqual(len(caught), 1)
+
+    def test_state(self):
+        text = 'Rotor state must match the reference after every call! ' * 30
+        for backend in available_backends():
+            machines = []
+            for name in ('python', backend):
+                set_backend(name)
+                machine = EnigmaMachine.from_key_sheet(
+                        rotors='Beta VI VIII VII', ring_settings='A B C Z',
+                        reflector='C-Thin', plugboard_settings='AZ BY')
+                machine.set_display('AZDY')
+                output = [machine.process_text(text, replace_char)
+                          for replace_char in ('X', None, 'X')]
+                machines.append((output, machine.get_display(),
+                                 machine.get_rotor_counts()))
+            self.assertEqual(machines[0], machines[1])
+
+            set_backend(backend)
+            self.assertRaises(EnigmaError, machine.process_text, 'A!', '?')
+
+    def test_plain_machines_only(self):
+        # the fast backends do not call key_press, so machines that customize
+        # it fall back to the python backend
+        presses = []
+
+        class Counting(EnigmaMachine):
+            def key_press(self, key):
+                presses.append(key)
+                return super().key_press(key)
+
+        set_backend('tables')
+        machine = Counting.from_key_sheet(rotors='II IV V')
+        machine.process_text('HELLO')
+        self.assertEqual(len(presses), 5)
+
+        machine = EnigmaMachine.from_key_sheet(rotors='II IV V')
+        key_press = machine.key_press
+        machine.key_press = lambda key: presses.append(key) or key_press(key)
+        machine.process_text('WORLD')
+        self.assertEqual(len(presses), 10)
+        self.assertFalse(machine._is_plain())
+        self.assertTrue(EnigmaMachine.from_key_sheet()._is_plain())
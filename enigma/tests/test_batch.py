@@ -0,0 +1,92 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the MachineBatch class."""
+
+import random
+import unittest
+
+from ..batch import MachineBatch
+from ..machine import EnigmaMachine, EnigmaError, KEYBOARD_CHARS
+
+
+SETTINGS = [
+    dict(rotors='II IV V', ring_settings='B U L',
+         plugboard_settings='AV BS CG DL FU HZ IN KM OW RX'),
+    dict(rotors='III VI VIII', ring_settings='A H M', reflector='B',
+         plugboard_settings='AN EZ HK IJ LR MQ OT PV SW UX'),
+    dict(rotors='Beta II IV I', ring_settings='A A A V', reflector='B-Thin',
+         plugboard_settings='1/20 2/12 4/6 7/10 8/13 14/23 15/16 17/25 18/26'),
+    dict(rotors='Gamma VII V VIII', ring_settings='Z Q D G',
+         reflector='C-Thin'),
+    dict(rotors='I II III'),
+]
+
+DISPLAYS = ['WXC', 'UZV', 'VJNA', 'MDVZ', 'KDO']
+
+
+class MachineBatchTestCase(unittest.TestCase):
+
+    def machines(self):
+        machines = [EnigmaMachine.from_key_sheet(**s) for s in SETTINGS]
+        for m, d in zip(machines, DISPLAYS):
+            m.set_display(d)
+        return machines
+
+    def test_process_text(self):
+
+        batch = MachineBatch.from_key_sheets(SETTINGS, DISPLAYS)
+        self.assertEqual(len(batch), len(SETTINGS))
+
+        text = 'The quick brown fox, jumps over the lazy dog! ' * 20
+        machines = self.machines()
+        self.assertEqual(batch.process_text(text),
+                         [m.process_text(text) for m in machines])
+        self.assertEqual(batch.process_text(text, replace_char=None),
+                         [m.process_text(text, None) for m in machines])
+
+        for i, m in enumerate(machines):
+            self.assertEqual(batch.get_display(i), m.get_display())
+
+    def test_different_texts(self):
+
+        rng = random.Random(31)
+        texts = [''.join(rng.choice(KEYBOARD_CHARS) for _ in range(n))
+                 for n in [0, 1, 700, 50, 9]]
+        batch = MachineBatch(self.machines())
+        expected = [m.process_text(t) for m, t in zip(self.machines(), texts)]
+        self.assertEqual(batch.process_text(texts), expected)
+
+    def test_lockstep(self):
+
+        batch = MachineBatch(self.machines())
+        machines = self.machines()
+        for keys in ['AAAAA', 'QWERT', 'ZZZZZ'] * 50:
+            expected = ''.join(m.key_press(k) for m, k in zip(machines, keys))
+            self.assertEqual(batch.key_press(keys), expected)
+
+        for _ in range(700):
+            batch.step()
+            for m in machines:
+                m._step_rotors()
+        self.assertEqual([batch.get_display(i) for i in range(len(batch))],
+                         [m.get_display() for m in machines])
+
+    def test_set_display(self):
+
+        batch = MachineBatch(self.machines())
+        batch.set_display(2, 'abcd')
+        self.assertEqual(batch.get_display(2), 'ABCD')
+        self.assertRaises(EnigmaError, batch.set_display, 0, 'ABCD')
+        self.assertRaises(EnigmaError, batch.set_display, 0, 'A1C')
+
+    def test_errors(self):
+
+        batch = MachineBatch(self.machines())
+        self.assertRaises(EnigmaError, batch.process_text, ['A', 'B'])
+        self.assertRaises(EnigmaError, batch.process_text, '1', '?')
+        self.assertRaises(EnigmaError, batch.key_press, 'AB')
+        self.assertRaises(EnigmaError, batch.key_press, 'AB1DE')
+        self.assertRaises(EnigmaError, MachineBatch.from_key_sheets,
+                          SETTINGS, ['AAA'])
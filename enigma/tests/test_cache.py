@@ -0,0 +1,113 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the machine cache."""
+
+import copy
+import unittest
+
+from ..cache import MachineCache, estimate_size
+from ..machine import EnigmaMachine
+from ..spec import MachineSpec
+
+
+SETTINGS = dict(rotors='II IV V', ring_settings='B U L',
+                plugboard_settings='AV BS CG DL FU HZ IN KM OW RX')
+
+
+class CopyTestCase(unittest.TestCase):
+
+    def test_copy_is_independent(self):
+        machine = EnigmaMachine.from_key_sheet(**SETTINGS)
+        machine.set_display('WXC')
+        clone = copy.copy(machine)
+
+        self.assertEqual(clone.process_text('KFRRTSQ'),
+                         machine.process_text('KFRRTSQ'))
+        clone.process_text('ABC')
+        clone.plugboard.disconnect(0)
+        self.assertEqual(machine.get_display(), 'WXJ')
+        self.assertEqual(clone.get_display(), 'WXM')
+        self.assertEqual(machine.plugboard.wiring_map[0], 21)
+
+    def test_copy_m4(self):
+        machine = EnigmaMachine.from_key_sheet(
+                rotors='Beta II IV I', ring_settings='A A A V',
+                reflector='B-Thin')
+        machine.set_display('VJNA')
+        clone = copy.copy(machine)
+        self.assertEqual(clone.process_text('NCZW' * 5),
+                         machine.process_text('NCZW' * 5))
+
+
+class MachineCacheTestCase(unittest.TestCase):
+
+    def test_get(self):
+        cache = MachineCache()
+        machine = cache.get(SETTINGS, 'WXC')
+        expected = EnigmaMachine.from_key_sheet(**SETTINGS)
+        expected.set_display('WXC')
+        self.assertEqual(machine.process_text('KFRRTSQ'),
+                         expected.process_text('KFRRTSQ'))
+
+        # the returned machine is a reset copy, not the prototype
+        machine = cache.get(SETTINGS, 'WXC')
+        self.assertEqual(machine.get_display(), 'WXC')
+        self.assertEqual(cache.get(SETTINGS).get_display(), 'AAA')
+
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+
+    def test_normalized_key(self):
+        cache = MachineCache()
+        cache.get(SETTINGS)
+        cache.get(dict(rotors=['II', 'IV', 'V'], ring_settings=[1, 20, 11],
+                       plugboard_settings='XR WO MK NI ZH UF LD GC SB VA'))
+        cache.get(MachineSpec.from_settings(SETTINGS))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.hits, 2)
+
+    def test_compiled(self):
+        cache = MachineCache()
+        key = cache.get_compiled(SETTINGS)
+        self.assertIs(cache.get_compiled(SETTINGS), key)
+        self.assertEqual(len(cache), 1)
+
+    def test_evict_by_count(self):
+        cache = MachineCache(max_entries=2)
+        cache.get(dict(rotors='I II III'))
+        cache.get(dict(rotors='I II IV'))
+        cache.get(dict(rotors='I II III'))     # now most recently used
+        cache.get(dict(rotors='I II V'))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+
+        cache.get(dict(rotors='I II III'))
+        self.assertEqual(cache.misses, 3)
+        cache.get(dict(rotors='I II IV'))
+        self.assertEqual(cache.misses, 4)
+
+    def test_evict_by_bytes(self):
+        size = estimate_size(EnigmaMachine.from_key_sheet())
+        cache = MachineCache(max_entries=100, max_bytes=int(size * 2.5))
+        for rotors in ('I II III', 'I II IV', 'I II V', 'I IV V'):
+            cache.get(dict(rotors=rotors))
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.stats()['bytes'], cache.max_bytes)
+
+        # a single oversized entry is still cached
+        cache = MachineCache(max_bytes=1)
+        cache.get(SETTINGS)
+        cache.get(SETTINGS)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.hits, 1)
+
+    def test_clear(self):
+        cache = MachineCache()
+        cache.get(SETTINGS)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()['bytes'], 0)
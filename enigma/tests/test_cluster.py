@@ -0,0 +1,189 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the multi-node search coordinator."""
+
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from .. import cluster
+from ..cluster import (ClusterError, Coordinator, model_digest, run_worker,
+                       run_workers, serve)
+from ..machine import EnigmaMachine
+from ..ngram import NgramModel
+from ..shards import Keyspace, search_shard, sharded_search
+from .test_search import CORPUS, PLAINTEXT
+
+
+def keyspace():
+    return Keyspace(rotors=['II', 'IV', 'V'], reflectors=['B'], rings=[0, 5],
+                    starts=['ABC', 'QEV', 'ZZZ'])
+
+
+class CoordinatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.coordinator = Coordinator('ABCDEF', keyspace(), batch_size=4,
+                                       start=0, stop=10)
+
+    def test_stealing(self):
+        c = self.coordinator
+        a = c.register('a')
+        b = c.register('b')
+        self.assertEqual(c.next_unit(a), 0)     # a reserves 0-3
+        self.assertEqual(c.next_unit(b), 4)     # b reserves 4-7
+        self.assertRaises(ClusterError, c.next_unit, a)
+        c.complete(b, 4, [], {'trials': 3})
+        self.assertEqual(c.next_unit(b), 5)
+        for unit in (5, 6, 7):
+            c.complete(b, unit, [], {'trials': 3})
+            if unit < 7:
+                self.assertEqual(c.next_unit(b), unit + 1)
+        self.assertEqual(c.next_unit(b), 8)     # b reserves 8-9
+        c.complete(b, 8, [], {})
+        self.assertEqual(c.next_unit(b), 9)
+        c.complete(b, 9, [], {})
+
+        # the shared queue is empty: b steals the newer half of a's shards
+        self.assertEqual(c.next_unit(b), 2)
+        self.assertEqual(c.steals, 1)
+        status = c.status()
+        self.assertEqual(status['workers'][0]['reserved'], 1)   # shard 1
+        self.assertEqual(status['workers'][1]['reserved'], 1)   # shard 3
+        self.assertEqual(status['remaining'], 10 - 6)
+        self.assertEqual(status['workers'][1]['trials'], 12)
+
+        c.complete(b, 2, [], {})
+        self.assertEqual(c.next_unit(b), 3)
+        c.complete(b, 3, [], {})
+        self.assertEqual(c.next_unit(b), 1)     # a's last reserved shard
+        self.assertEqual(c.steals, 2)
+
+        # nothing left to steal; a waits for b to finish
+        c.complete(a, 0, [], {})
+        self.assertIsNone(c.next_unit(a))
+        self.assertFalse(c.done)
+        c.complete(b, 1, [], {})
+        self.assertTrue(c.done)
+
+    def test_lost(self):
+        c = self.coordinator
+        a = c.register('a')
+        self.assertEqual(c.next_unit(a), 0)
+        c.lost(a)
+        self.assertEqual(c.requeued, 4)
+        self.assertEqual(list(c.queue), list(range(10)))
+        b = c.register('b')
+        self.assertEqual(c.next_unit(b), 0)
+        self.assertRaises(ClusterError, c.complete, b, 3, [], {})
+
+    def test_model_digest(self):
+        model = NgramModel.from_corpus(CORPUS, n=3)
+        c = Coordinator('ABC', keyspace(),
+                        expected_digest=model_digest(model))
+        c.register('a', digest=model_digest(model))
+        other = NgramModel.from_corpus(CORPUS[:100], n=3)
+        self.assertRaises(ClusterError, c.register, 'b',
+                          digest=model_digest(other))
+
+
+class ClusterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = NgramModel.from_corpus(CORPUS, n=4)
+        machine = EnigmaMachine.from_key_sheet(rotors='IV V II',
+                                               ring_settings=[0, 5, 0])
+        machine.set_display('QEV')
+        self.ciphertext = machine.process_text(PLAINTEXT)
+        self.directory = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.directory.name, 'model.bin')
+        self.model.save(self.model_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def start(self, coordinator, worker_timeout=cluster.DEFAULT_TIMEOUT):
+        """Serve coordinator in a thread; return its address and a queue that
+        receives the results.
+
+        """
+        addresses = queue.Queue()
+        results = queue.Queue()
+        thread = threading.Thread(target=lambda: results.put(serve(
+                coordinator, 'localhost', 0, worker_timeout=worker_timeout,
+                report_interval=0.1, ready=addresses.put)), daemon=True)
+        thread.start()
+        return addresses.get(timeout=10), results
+
+    def test_workers(self):
+        checkpoint = os.path.join(self.directory.name, 'search.json')
+        statuses = []
+        coordinator = Coordinator(self.ciphertext, keyspace(), top_k=3,
+                                  checkpoint=checkpoint, batch_size=2,
+                                  expected_digest=model_digest(self.model))
+        address, results = self.start(coordinator)
+
+        # a worker that takes a shard and dies; its shards are searched by
+        # the others
+        sock = socket.create_connection(address)
+        fp = sock.makefile('rwb')
+        for request in ({'op': 'hello', 'name': 'doomed',
+                         'model': model_digest(self.model)}, {'op': 'next'}):
+            fp.write(json.dumps(request).encode('ascii') + b'\n')
+            fp.flush()
+            reply = json.loads(fp.readline())
+        self.assertEqual(reply, {'unit': 0})
+        fp.close()
+        sock.close()
+
+        run_workers(address, self.model_path, processes=2, name='test')
+        merged = results.get(timeout=60)
+        self.assertEqual(coordinator.status()['requeued'], 2)
+
+        expected = sharded_search(self.ciphertext, self.model, keyspace(),
+                                  top_k=3).results()
+        self.assertEqual([r[0] for r in merged], [r[0] for r in expected])
+        self.assertEqual(merged[0][2:], ['QEV', PLAINTEXT])
+        with open(checkpoint) as fp:
+            self.assertEqual(json.load(fp)['completed'],
+                             [[0, len(keyspace()) - 1]])
+
+    def test_wrong_model(self):
+        coordinator = Coordinator(self.ciphertext, keyspace(),
+                                  expected_digest=model_digest(self.model))
+        address, results = self.start(coordinator)
+        other = NgramModel.from_corpus(CORPUS, n=3)
+        self.assertRaises(ClusterError, run_worker, address, other)
+        self.assertEqual(run_worker(address, self.model), len(keyspace()))
+        results.get(timeout=60)
+
+    def test_reconnect(self):
+        # the first shard takes longer than the worker timeout: the
+        # coordinator drops the worker and requeues its shards, and the worker
+        # reconnects and searches them again
+        coordinator = Coordinator(self.ciphertext, keyspace(), top_k=3,
+                                  batch_size=2)
+        address, results = self.start(coordinator, worker_timeout=0.2)
+        calls = []
+
+        def slow_search_shard(*args, **kwargs):
+            if not calls:
+                time.sleep(0.6)
+            calls.append(args[3])
+            return search_shard(*args, **kwargs)
+
+        with mock.patch.object(cluster, 'search_shard', slow_search_shard):
+            units = run_worker(address, self.model)
+        merged = results.get(timeout=60)
+        self.assertEqual(units, len(keyspace()))
+        self.assertEqual(calls.count(0), 2)
+        self.assertEqual(coordinator.status()['requeued'], 2)
+        self.assertEqual(merged[0][2:], ['QEV', PLAINTEXT])
@@ -0,0 +1,83 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the stateless engine."""
+
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+
+from ..engine import encrypt, compile_key, normalize
+from ..machine import EnigmaMachine, EnigmaError
+from ..spec import MachineSpec
+
+
+SETTINGS = [
+    dict(rotors='II IV V', ring_settings='B U L',
+         plugboard_settings='AV BS CG DL FU HZ IN KM OW RX'),
+    dict(rotors=['III', 'VI', 'VIII'], ring_settings=[0, 7, 12],
+         reflector='B', plugboard_settings='AN EZ HK IJ LR MQ OT PV SW UX'),
+    dict(rotors='Beta II IV I', ring_settings='A A A V', reflector='B-Thin',
+         plugboard_settings='1/20 2/12 4/6 7/10 8/13 14/23 15/16 17/25 18/26'),
+    dict(rotors='Gamma VII V VIII', ring_settings='Z Q D G',
+         reflector='C-Thin'),
+]
+
+STARTS = ['WXC', 'UZV', 'VJNA', 'MDVZ']
+
+TEXT = 'Feind liest mit! Keine Funkstille, 0800 Uhr. ' * 30
+
+
+def reference(spec, start, text, replace_char='X'):
+    machine = EnigmaMachine.from_key_sheet(**spec)
+    machine.set_display(start)
+    return machine.process_text(text, replace_char)
+
+
+class EncryptTestCase(unittest.TestCase):
+
+    def test_encrypt(self):
+
+        for spec, start in zip(SETTINGS, STARTS):
+            for replace_char in ['X', None]:
+                self.assertEqual(encrypt(spec, start, TEXT, replace_char),
+                                 reference(spec, start, TEXT, replace_char))
+
+    def test_reciprocal(self):
+
+        plaintext = bytes(c + 65 for c in normalize(TEXT, None)).decode()
+        for spec, start in zip(SETTINGS, STARTS):
+            ciphertext = encrypt(spec, start, TEXT, None)
+            self.assertEqual(encrypt(spec, start, ciphertext), plaintext)
+
+    def test_threads(self):
+
+        jobs = [(spec, start) for spec, start in zip(SETTINGS, STARTS)] * 25
+        expected = [reference(spec, start, TEXT) for spec, start in jobs]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda job: encrypt(job[0], job[1], TEXT),
+                                    jobs))
+        self.assertEqual(results, expected)
+
+    def test_compile_cache(self):
+
+        spec = dict(rotors=['I', 'II', 'III'], reflector='C')
+        self.assertIs(compile_key(spec), compile_key(dict(spec)))
+
+        # different spellings of the same key share a compiled key
+        self.assertIs(compile_key(SETTINGS[0]), compile_key(MachineSpec.parse(
+            'II IV V 02 21 12 1/22 2/19 3/7 4/12 6/21 8/26 9/14 11/13 15/23 '
+            '18/24 B')))
+
+    def test_positions(self):
+
+        key = compile_key(SETTINGS[0])
+        positions = key.positions('WXC')
+        self.assertEqual(key.display(positions), 'WXC')
+        self.assertRaises(EnigmaError, key.positions, 'WXCD')
+        self.assertRaises(EnigmaError, key.positions, 'W?C')
+
+    def test_errors(self):
+
+        self.assertRaises(EnigmaError, encrypt, SETTINGS[0], 'AAA', 'A1', '2')
@@ -4,9 +4,14 @@
 
 """Tests for the EnigmaMachine class."""
 
+import copy
+import pickle
 import unittest
 
 from ..machine import EnigmaMachine
+from ..plugboard import Plugboard
+from ..rotors.factory import create_rotor, create_reflector
+from ..rotors.rotor import Rotor
 
 
 class SteppingTestCase(unittest.TestCase):
@@ -28,6 +33,71 @@ class SteppingTestCase(unittest.TestCase):
             self.assertEqual(m.get_display(), expected)
 
 
+class FoldedReflectorTestCase(unittest.TestCase):
+    """The M4 folds the thin reflector & leftmost rotor into one table."""
+
+    def test_folded_signal(self):
+
+        m = EnigmaMachine.from_key_sheet(rotors='Gamma VI I III',
+                ring_settings='C Z D G', reflector='C-Thin')
+
+        for display in ['AAAA', 'MQEV', 'ZZZZ']:
+            m.set_display(display)
+            for _ in range(30):
+                m._step_rotors()
+                for n in range(26):
+                    # run the signal through every rotor individually
+                    pos = n
+                    for rotor in reversed(m.rotors):
+                        pos = rotor.signal_in(pos)
+                    pos = m.reflector.signal_in(pos)
+                    for rotor in m.rotors:
+                        pos = rotor.signal_out(pos)
+
+                    self.assertEqual(m._electric_signal(n), pos)
+
+    def test_shared_tables(self):
+
+        m1 = EnigmaMachine.from_key_sheet(rotors='Beta II IV I',
+                reflector='B-Thin')
+        m2 = EnigmaMachine.from_key_sheet(rotors='Beta V VI VII',
+                ring_settings='B C D E', reflector='B-Thin')
+        self.assertIs(m1._folded_reflector, m2._folded_reflector)
+
+    def reference_signal(self, m, n):
+        pos = n
+        for rotor in reversed(m.rotors):
+            pos = rotor.signal_in(pos)
+        pos = m.reflector.signal_in(pos)
+        for rotor in m.rotors:
+            pos = rotor.signal_out(pos)
+        return pos
+
+    def test_reflector_position(self):
+        # the folded tables follow changes to the reflector's position
+        m = EnigmaMachine.from_key_sheet(rotors='Beta II IV I',
+                                         reflector='B-Thin')
+        m.set_display('AAAA')
+        m.reflector.set_display('C')
+        for n in range(26):
+            self.assertEqual(m._electric_signal(n), self.reference_signal(m, n))
+
+        clone = copy.deepcopy(m)
+        self.assertEqual(m.process_text('A' * 10), clone.process_text('A' * 10))
+
+    def test_replaced_rotor(self):
+        # ... and to the leftmost rotor being replaced
+        m = EnigmaMachine.from_key_sheet(rotors='Beta II IV I',
+                                         reflector='B-Thin')
+        m.rotors[0] = create_rotor('Gamma')
+        expected = EnigmaMachine.from_key_sheet(rotors='Gamma II IV I',
+                                                reflector='B-Thin')
+        m.set_display('AAAA')
+        expected.set_display('AAAA')
+        self.assertEqual(m.process_text('A' * 10),
+                         expected.process_text('A' * 10))
+
+
 class SimpleCipherTestCase(unittest.TestCase):
     """This example taken from Wikipedia"""
 
@@ -270,3 +340,55 @@ class HmsHurricaneInterceptTestCase(unittest.TestCase):
             'HAEFERJXNNTWWWFUNFYEINSFUNFMBSTEIGENDYGUTESIWXDVVVJRASCH')
 
         self.assertEqual(plaintext, truth_data)
+
+
+class PickleTestCase(unittest.TestCase):
+
+    def check_round_trip(self, machine, display, max_size=None):
+        machine.set_display(display)
+        machine.process_text('ABCDEF')
+        data = pickle.dumps(machine, pickle.HIGHEST_PROTOCOL)
+        if max_size is not None:
+            self.assertLess(len(data), max_size)
+
+        copy = pickle.loads(data)
+        self.assertEqual(copy.get_display(), machine.get_display())
+        self.assertEqual(copy.get_rotor_counts(), machine.get_rotor_counts())
+        self.assertEqual(copy.process_text('THEQUICKBROWNFOX' * 20),
+                         machine.process_text('THEQUICKBROWNFOX' * 20))
+
+    def test_army(self):
+        machine = EnigmaMachine.from_key_sheet(
+                rotors='II IV V', ring_settings='B U L',
+                plugboard_settings='AV BS CG DL FU HZ IN KM OW RX')
+        self.check_round_trip(machine, 'WXC', max_size=128)
+
+    def test_m4(self):
+        machine = EnigmaMachine.from_key_sheet(
+                rotors='Beta II IV I', ring_settings='A A A V',
+                reflector='B-Thin', plugboard_settings='AT BL DF GJ')
+        self.check_round_trip(machine, 'VJNA', max_size=128)
+
+    def test_custom_rotor(self):
+        rotors = [create_rotor('I'), create_rotor('II'),
+                  Rotor('X', 'BADCFEHGJILKNMPORQTSVUXWZY', stepping='A')]
+        machine = EnigmaMachine(rotors, create_reflector('C'),
+                                Plugboard.from_key_sheet('QW ER'))
+        self.check_round_trip(machine, 'ABZ')
+
+    def test_faithful(self):
+        # subclasses and extra attributes survive pickling
+        machine = TaggedMachine.from_key_sheet(rotors='II IV V')
+        machine.tag = 5
+        self.check_round_trip(machine, 'WXC')
+        copy = pickle.loads(pickle.dumps(machine))
+        self.assertIs(type(copy), TaggedMachine)
+        self.assertEqual(copy.tag, 5)
+
+        machine = EnigmaMachine.from_key_sheet(rotors='II IV V')
+        machine.tag = 5
+        self.assertEqual(pickle.loads(pickle.dumps(machine)).tag, 5)
+
+
+class TaggedMachine(EnigmaMachine):
+    pass
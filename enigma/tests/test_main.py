@@ -0,0 +1,80 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the command-line app."""
+
+import contextlib
+import io
+import os
+import pstats
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from ..machine import EnigmaMachine
+from ..main import main
+
+
+ARGS = ['-r', 'II', 'IV', 'V', '-i', '2', '21', '12', '-u', 'B',
+        '-p', 'AV', 'BS', 'CG', '-s', 'WXC', '-t', 'Hello, world']
+
+
+def run_main(argv):
+    out, err = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        main(argv)
+    return out.getvalue(), err.getvalue()
+
+
+class MainTestCase(unittest.TestCase):
+
+    def test_stats(self):
+        plain, err = run_main(ARGS)
+        self.assertEqual(err, '')
+
+        out, err = run_main(ARGS + ['--stats'])
+        self.assertEqual(out, plain)
+        for phase in ('machine construction', 'normalization', 'encryption',
+                      'chars/sec', 'Peak traced memory'):
+            self.assertIn(phase, err)
+
+        # the timed pass runs without tracemalloc, the memory pass with it
+        tracing = []
+        process_text = EnigmaMachine.process_text
+
+        def traced(machine, *args):
+            tracing.append(tracemalloc.is_tracing())
+            return process_text(machine, *args)
+
+        with mock.patch.object(EnigmaMachine, 'process_text', traced):
+            out, err = run_main(ARGS + ['--stats'])
+        self.assertEqual(out, plain)
+        self.assertEqual(tracing, [False, True])
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_profile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'run.prof')
+            out, _ = run_main(ARGS + ['--profile', path])
+            self.assertEqual(out, run_main(ARGS)[0])
+            stats = pstats.Stats(path)
+            self.assertTrue(any(func[2] == 'process_text'
+                                for func in stats.stats))
+
+    def test_formats(self):
+        plain = run_main(ARGS)[0].strip()
+        self.assertEqual(len(plain), 12)       # 'HELLOXXWORLD'
+
+        out, _ = run_main(ARGS + ['--groups'])
+        self.assertEqual(out, '%s %s %s\n' % (plain[:5], plain[5:10],
+                                             plain[10:]))
+
+        out, _ = run_main(ARGS + ['-z', '-g', '4', '--groups-per-line', '2'])
+        dropped = run_main(ARGS + ['-z'])[0].strip()
+        self.assertEqual(out, '%s %s\n%s\n' % (dropped[:4], dropped[4:8],
+                                              dropped[8:]))
+
+        out, _ = run_main(ARGS + ['--preserve'])
+        self.assertEqual(out, '%s, %s\n' % (dropped[:5], dropped[5:]))
@@ -0,0 +1,99 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for machine instrumentation."""
+
+import copy
+import unittest
+
+from ..backends import set_backend
+from ..machine import EnigmaMachine
+from ..metrics import (Metrics, Histogram, instrument, uninstrument,
+                       is_instrumented)
+
+
+class InstrumentTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.machine = EnigmaMachine.from_key_sheet(rotors=['III', 'II', 'I'])
+        self.machine.set_display('KDO')
+
+    def test_counters(self):
+        metrics = instrument(self.machine)
+        self.assertTrue(is_instrumented(self.machine))
+
+        # KDO -> KDP KDQ KER LFS LFT LFU: one double step (see test_enigma.py)
+        self.assertEqual(len(self.machine.process_text('ab c!d', 'X')), 6)
+        self.machine.process_text('1 2', None)
+        self.machine.key_press('A')
+
+        data = metrics.as_dict()
+        self.assertEqual(data['key_presses'], 7)
+        self.assertEqual(data['double_steps'], 1)
+        self.assertEqual(data['chars_replaced'], 2)
+        self.assertEqual(data['chars_dropped'], 3)
+        self.assertEqual(data['process_text_calls'], 2)
+        self.assertEqual(data['process_text_seconds']['count'], 2)
+
+    def test_backend(self):
+        # a fast backend does not hide the key presses from the metrics
+        metrics = instrument(self.machine)
+        set_backend('tables')
+        try:
+            self.machine.process_text('A' * 100)
+        finally:
+            set_backend('python')
+        data = metrics.as_dict()
+        self.assertEqual(data['key_presses'], 100)
+        self.assertEqual(data['double_steps'], 1)     # at KDO -> KER
+
+    def test_same_output(self):
+        plain = EnigmaMachine.from_key_sheet(rotors=['III', 'II', 'I'])
+        plain.set_display('KDO')
+        instrument(self.machine)
+        text = 'THE QUICK BROWN FOX' * 10
+        self.assertEqual(self.machine.process_text(text),
+                         plain.process_text(text))
+
+    def test_uninstrument(self):
+        metrics = instrument(self.machine)
+        self.assertFalse(is_instrumented(copy.copy(self.machine)))
+        uninstrument(self.machine)
+        self.assertFalse(is_instrumented(self.machine))
+        self.assertNotIn('process_text', vars(self.machine))
+        self.machine.process_text('ABC')
+        self.assertEqual(metrics.counters['key_presses'], 0)
+
+    def test_shared_metrics(self):
+        metrics = Metrics()
+        other = EnigmaMachine.from_key_sheet()
+        instrument(self.machine, metrics)
+        instrument(other, metrics)
+        self.machine.process_text('AB')
+        other.process_text('CDE')
+        self.assertEqual(metrics.counters['key_presses'], 5)
+
+
+class OutputTestCase(unittest.TestCase):
+
+    def test_histogram(self):
+        hist = Histogram([1, 10])
+        for value in [0.5, 1, 5, 50]:
+            hist.observe(value)
+        data = hist.as_dict()
+        self.assertEqual(list(data['buckets'].values()), [2, 3, 4])
+        self.assertEqual(data['sum'], 56.5)
+        self.assertEqual(data['count'], 4)
+
+    def test_prometheus(self):
+        metrics = Metrics(buckets=[0.5])
+        metrics.inc('key_presses', 3)
+        metrics.observe(0.25)
+        text = metrics.prometheus()
+        self.assertIn('# TYPE enigma_key_presses_total counter\n'
+                      'enigma_key_presses_total 3\n', text)
+        self.assertIn('enigma_process_text_seconds_bucket{le="0.5"} 1\n', text)
+        self.assertIn('enigma_process_text_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn('enigma_process_text_seconds_sum 0.25\n', text)
+        self.assertTrue(metrics.prometheus('x').startswith('# HELP x_'))
@@ -0,0 +1,100 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the NgramModel class."""
+
+import math
+import os
+import tempfile
+import unittest
+
+from ..ngram import (NgramModel, NgramError, text_to_indices, indices_to_text,
+        HEADER)
+
+
+CORPUS = (
+    'THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG. '
+    'THERE IS NOTHING EITHER GOOD OR BAD BUT THINKING MAKES IT SO. '
+    'THE ENEMY FLEET WAS SIGHTED NORTH OF THE ISLAND AT DAWN. '
+) * 10
+
+
+class TextConversionTestCase(unittest.TestCase):
+
+    def test_text_to_indices(self):
+
+        self.assertEqual(text_to_indices('Ab, z!'), bytes([0, 1, 25]))
+        self.assertEqual(text_to_indices('é123'), b'')
+
+    def test_round_trip(self):
+
+        self.assertEqual(indices_to_text(text_to_indices('hello world')),
+                         'HELLOWORLD')
+
+
+class NgramModelTestCase(unittest.TestCase):
+
+    def test_bad_n(self):
+
+        self.assertRaises(NgramError, NgramModel.from_corpus, CORPUS, n=0)
+        self.assertRaises(NgramError, NgramModel.from_corpus, CORPUS, n=5)
+        self.assertRaises(NgramError, NgramModel.from_corpus, '123', n=2)
+
+    def test_probabilities(self):
+
+        model = NgramModel.from_corpus(CORPUS, n=1)
+        total = len(text_to_indices(CORPUS))
+        expected = math.log10(CORPUS.count('E') / total)
+        self.assertAlmostEqual(model.table[4], expected, places=5)
+
+    def test_chunk_boundaries(self):
+
+        # n-grams spanning chunks must be counted the same as in one string
+        whole = NgramModel.from_corpus(CORPUS, n=3)
+        chunks = [CORPUS[i:i + 7] for i in range(0, len(CORPUS), 7)]
+        parts = NgramModel.from_corpus(chunks, n=3)
+        self.assertEqual(list(whole.table), list(parts.table))
+
+    def test_score(self):
+
+        model = NgramModel.from_corpus(CORPUS, n=4)
+        good = model.score_text('THE ENEMY FLEET')
+        bad = model.score_text('QXZJV WKQPZ MMXQ')
+        self.assertGreater(good, bad)
+
+        self.assertAlmostEqual(model.score(b''), 0.0)
+        self.assertAlmostEqual(model.score(text_to_indices('TH')), 0.0)
+        self.assertAlmostEqual(model.score(text_to_indices('QQQQ')),
+                               model.floor, places=5)
+
+    def test_save_load(self):
+
+        model = NgramModel.from_corpus(CORPUS, n=3)
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            model.save(path)
+            self.assertEqual(os.path.getsize(path),
+                             HEADER.size + 4 * 26 ** 3)
+
+            for use_mmap in (True, False):
+                loaded = NgramModel.load(path, use_mmap=use_mmap)
+                self.assertEqual(loaded.n, 3)
+                self.assertAlmostEqual(loaded.floor, model.floor, places=5)
+                self.assertEqual(list(loaded.table), list(model.table))
+                self.assertEqual(loaded.score_text(CORPUS),
+                                 model.score_text(CORPUS))
+                loaded.close()
+        finally:
+            os.remove(path)
+
+    def test_bad_file(self):
+
+        fd, path = tempfile.mkstemp()
+        os.write(fd, b'not a model file at all')
+        os.close(fd)
+        try:
+            self.assertRaises(NgramError, NgramModel.load, path)
+        finally:
+            os.remove(path)
@@ -0,0 +1,119 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the permutation module."""
+
+import pickle
+import unittest
+
+from ..machine import EnigmaMachine
+from ..perm import (Permutation, PermError, compose, compose_batch, pack,
+                    unpack)
+from ..plugboard import Plugboard
+from ..rotors.factory import create_rotor
+
+
+SHIFT = Permutation('BCDEFGHIJKLMNOPQRSTUVWXYZA')
+
+
+class PermutationTestCase(unittest.TestCase):
+
+    def test_construction(self):
+        p = Permutation(range(25, -1, -1))
+        self.assertEqual(str(p), 'ZYXWVUTSRQPONMLKJIHGFEDCBA')
+        self.assertEqual(Permutation(str(p)), p)
+        self.assertEqual(p[0], 25)
+        self.assertEqual(len(p), 26)
+        self.assertEqual(hash(p), hash(Permutation(list(p))))
+
+        for bad in ('ABC', 'A' * 26, [0] * 26, list(range(1, 27)), [None]):
+            self.assertRaises(PermError, Permutation, bad)
+
+    def test_compose_and_inverse(self):
+        self.assertEqual(SHIFT.then(SHIFT)[0], 2)
+        self.assertEqual(compose(SHIFT, SHIFT, SHIFT)[25], 2)
+        self.assertEqual(compose(), Permutation.identity())
+        self.assertEqual(SHIFT.then(SHIFT.inverse()), Permutation.identity())
+        self.assertIs(SHIFT.inverse().inverse(), SHIFT)
+        self.assertEqual(SHIFT.apply(bytes([0, 25])), bytes([1, 0]))
+
+    def test_cycles(self):
+        p = Permutation.from_cycles(['AB', 'CDE'])
+        self.assertEqual(p.cycle_str(), '(AB)(CDE)')
+        self.assertEqual(p.cycle_type()[:3], (3, 2, 1))
+        self.assertEqual(len(p.fixed_points()), 21)
+        self.assertEqual(p.order(), 6)
+        self.assertFalse(p.is_involution())
+        self.assertEqual(SHIFT.cycle_type(), (26, ))
+        self.assertRaises(PermError, Permutation.from_cycles, ['AB', 'BC'])
+
+    def test_conjugate(self):
+        p = Permutation.from_cycles(['AB', 'CDE'])
+        q = p.conjugate(SHIFT)
+        self.assertEqual(q.cycle_str(), '(BC)(DEF)')
+        self.assertEqual(q.cycle_type(), p.cycle_type())
+
+    def test_pickle(self):
+        p = pickle.loads(pickle.dumps(SHIFT))
+        self.assertEqual(p, SHIFT)
+
+
+class ComponentTestCase(unittest.TestCase):
+
+    def test_rotor(self):
+        rotor = create_rotor('II', ring_setting=3)
+        rotor.set_display('Q')
+        fwd = Permutation.from_rotor(rotor)
+        rev = Permutation.from_rotor(rotor, reverse=True)
+        for n in range(26):
+            self.assertEqual(fwd[n], rotor.signal_in(n))
+            self.assertEqual(rev[n], rotor.signal_out(n))
+        self.assertEqual(fwd.inverse(), rev)
+
+    def test_plugboard(self):
+        p = Permutation.from_plugboard(Plugboard.from_key_sheet('AB CD'))
+        self.assertEqual(p.cycle_str(), '(AB)(CD)')
+        self.assertTrue(p.is_involution())
+
+    def test_machine(self):
+        for settings, display in [
+                (dict(rotors='II IV V', ring_settings='B U L',
+                      plugboard_settings='AV BS CG DL FU HZ IN KM OW RX'),
+                 'WXC'),
+                (dict(rotors='Beta II IV I', ring_settings='A A A V',
+                      reflector='B-Thin', plugboard_settings='AT BL DF GJ'),
+                 'VJNA')]:
+            machine = EnigmaMachine.from_key_sheet(**settings)
+            machine.set_display(display)
+            text = machine.process_text('A' * 5)
+
+            # key press steps first, so take the permutation after stepping
+            machine.set_display(display)
+            machine.key_press('A')
+            p = Permutation.from_machine(machine)
+            self.assertTrue(p.is_involution())
+            self.assertFalse(p.fixed_points())
+            self.assertEqual(str(p)[0], text[0])
+
+            # at another display, without changing the machine
+            after = machine.get_display()
+            machine.set_display(display)
+            self.assertEqual(Permutation.from_machine(machine, after), p)
+            self.assertEqual(machine.get_display(), display)
+
+
+class BatchTestCase(unittest.TestCase):
+
+    def test_compose_batch(self):
+        perms = [SHIFT, SHIFT.inverse(), Permutation.from_cycles(['AZ'])]
+        packed = pack(perms)
+        self.assertEqual(len(packed), 78)
+        self.assertEqual(unpack(packed), perms)
+
+        result = unpack(compose_batch(packed, SHIFT, SHIFT))
+        self.assertEqual(result, [p.then(SHIFT, SHIFT) for p in perms])
+        self.assertEqual(compose_batch(perms, SHIFT), compose_batch(packed,
+                                                                    SHIFT))
+        self.assertRaises(PermError, unpack, b'abc')
+        self.assertRaises(PermError, compose_batch, b'abc', SHIFT)
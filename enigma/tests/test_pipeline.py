@@ -0,0 +1,94 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the traffic decryption pipeline."""
+
+import contextlib
+import datetime
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from ..pipeline import (DailyKey, key_sheets, main, process_traffic,
+                        PipelineError)
+from ..spec import MachineSpec
+from ..traffic import daily_spec, generate, write_corpus
+
+
+START = datetime.date(1942, 3, 30)
+
+
+def intercepts(messages):
+    for msg in messages:
+        yield {'id': msg.id, 'date': msg.date.isoformat(),
+               'ground': msg.ground, 'indicator': msg.indicator,
+               'ciphertext': msg.ciphertext}
+
+
+class PipelineTestCase(unittest.TestCase):
+
+    def test_example1(self):
+        daily = DailyKey({'rotors': 'II IV V', 'reflector': 'B',
+                          'ring_settings': '2 21 12',
+                          'plugboard_settings': 'AV BS CG DL FU HZ IN KM OW RX'})
+        keys = daily.message_keys(['WXC', 'WXC'], ['KCH', 'KCH'])
+        self.assertEqual(keys, ['BLA', 'BLA'])
+        self.assertEqual(daily.decrypt(keys[:1],
+                                       ['NIBLFMYMLLUFWCASCSSNVHAZ']),
+                         ['THEXRUSSIANSXAREXCOMINGX'])
+        self.assertRaises(PipelineError, daily.message_keys, ['WXC'], [])
+
+    def check(self, processes, **kwargs):
+        messages = list(generate(4, START, days=4, messages=30,
+                                 rotor_count=kwargs.pop('rotor_count', 3)))
+        rotor_count = len(messages[0].ground)
+        results = list(process_traffic(
+                intercepts(messages),
+                lambda date: daily_spec(4, datetime.date.fromisoformat(date),
+                                        rotor_count),
+                processes=processes, **kwargs))
+        self.assertEqual([r.id for r in results], list(range(30)))
+        for msg, result in zip(messages, results):
+            self.assertEqual(result.message_key, msg.message_key)
+            self.assertEqual(result.plaintext, msg.plaintext)
+            self.assertEqual(result.date, msg.date.isoformat())
+
+    def test_serial(self):
+        self.check(0, chunk_size=4)
+        self.check(0, rotor_count=4)
+
+    def test_parallel(self):
+        self.check(2, chunk_size=3, max_pending=2)
+
+    def test_key_sheets(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_corpus(directory, seed=2, start=START, days=3, messages=1)
+            lookup = key_sheets(os.path.join(directory, 'keys'))
+            for n in range(3):
+                date = START + datetime.timedelta(days=n)
+                self.assertEqual(MachineSpec.coerce(lookup(date)),
+                                 daily_spec(2, date))
+            self.assertEqual(MachineSpec.coerce(lookup('1942-03-31')),
+                             daily_spec(2, datetime.date(1942, 3, 31)))
+            self.assertRaises(PipelineError, lookup, 'March 31')
+
+            # a single key file is used for every month
+            single = key_sheets(os.path.join(directory, 'keys',
+                                             '1942-04.keys'))
+            self.assertEqual(MachineSpec.coerce(single('1943-07-01')),
+                             daily_spec(2, datetime.date(1942, 4, 1)))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_corpus(directory, seed=3, start=START, days=2, messages=6)
+            output = os.path.join(directory, 'decrypts.jsonl')
+            err = io.StringIO()
+            with contextlib.redirect_stderr(err):
+                main([directory, '--processes', '0', '--output', output])
+            self.assertIn('6 of 6 match', err.getvalue())
+            with open(output) as fp:
+                self.assertEqual([json.loads(line)['id'] for line in fp],
+                                 list(range(6)))
@@ -4,6 +4,7 @@
 
 """Tests for the Plugboard class."""
 
+import pickle
 import unittest
 
 from ..plugboard import Plugboard, PlugboardError
@@ -123,3 +124,103 @@ class PlugboardTestCase(unittest.TestCase):
 
         navy = '1/2 3/4 5/6 7/8 9/10 11/12 13/14 15/16 17/18 19/20'
         self.assertEqual(navy, p.navy_str())
+
+
+class TransactionTestCase(unittest.TestCase):
+
+    STECKER = 'AB CD EF GH'
+
+    def setUp(self):
+        self.p = Plugboard.from_key_sheet(self.STECKER)
+        self.original = self.p.get_wiring()
+
+    def test_get_wiring(self):
+        wiring = self.p.get_wiring()
+        self.assertIsInstance(wiring, tuple)
+        self.p.connect(0, 25)
+        self.assertEqual(wiring, self.original)
+        self.assertNotEqual(self.p.get_wiring(), self.original)
+
+    def test_revert(self):
+        p = self.p
+        t1 = p.connect(0, 2)        # breaks AB and CD
+        self.assertTrue(p.is_connected(0, 2))
+        self.assertTrue(p.is_free(1))
+        self.assertTrue(p.is_free(3))
+        t2 = p.disconnect(4)
+        t3 = p.connect(25, 24)
+        self.assertTrue(p.is_connected(24, 25))
+
+        p.revert(t3)
+        p.revert(t2)
+        self.assertTrue(p.is_connected(4, 5))
+        p.revert(t1)
+        self.assertEqual(p.get_wiring(), self.original)
+
+    def test_context_manager(self):
+        p = self.p
+        with p:
+            p.connect(0, 2)
+            p.disconnect(6)
+        self.assertEqual(p.get_wiring(), self.original)
+
+    def test_read_only_wiring(self):
+        # the wiring can only change through the journaled methods, so a with
+        # block always restores it
+        p = self.p
+        with p:
+            with self.assertRaises(TypeError):
+                p.wiring_map[0] = 0
+            p.disconnect(0)
+            self.assertEqual(p.wiring_map[0], 0)
+        self.assertEqual(p.army_str(), self.STECKER)
+        self.assertEqual(bytes(p.wiring_map), bytes(self.original))
+
+    def test_long_run(self):
+        # a long hill climb inside one checkpoint journals each plug at most
+        # once per open checkpoint
+        p = self.p
+        with p:
+            for i in range(10000):
+                p.connect(i % 26, (i * 7 + 3) % 26)
+                p.checkpoint()
+                p.connect((i * 5) % 26, (i * 11 + 1) % 26)
+                if i % 2:
+                    p.release()
+                else:
+                    p.rollback()
+                self.assertLessEqual(len(p._journal), 26)
+        self.assertEqual(p.get_wiring(), self.original)
+
+    def test_nested_checkpoints(self):
+        p = self.p
+        p.checkpoint()
+        p.connect(0, 2)
+        after_first = p.get_wiring()
+
+        p.checkpoint()
+        p.connect(10, 11)
+        p.disconnect(4)
+        p.rollback()
+        self.assertEqual(p.get_wiring(), after_first)
+
+        p.checkpoint()
+        token = p.connect(12, 13)
+        p.revert(token)
+        p.connect(14, 15)
+        p.release()                 # keep the inner changes ...
+        self.assertTrue(p.is_connected(14, 15))
+
+        p.rollback()                # ... until the outer rollback
+        self.assertEqual(p.get_wiring(), self.original)
+
+    def test_no_checkpoint(self):
+        self.assertRaises(PlugboardError, self.p.rollback)
+        self.assertRaises(PlugboardError, self.p.release)
+
+    def test_pickle(self):
+        self.p.connect(24, 25)
+        self.p.checkpoint()
+        copy = pickle.loads(pickle.dumps(self.p))
+        self.assertEqual(copy.get_wiring(), self.p.get_wiring())
+        self.assertRaises(PlugboardError, copy.rollback)
@@ -6,12 +6,14 @@
 
 import unittest
 import collections
+import pickle
 import string
 
 from ..rotors.rotor import Rotor, ALPHA_LABELS
 from ..rotors import RotorError
 from ..rotors.data import ROTORS
 from ..rotors.factory import create_rotor
+from ..rotors.tables import entry_tables, exit_tables, compose, IDENTITY
 
 
 WIRING = 'EKMFLGDQVZNTOWYHXUSPAIBRCJ'
@@ -109,3 +111,73 @@ class SimpleRotorTestCase(unittest.TestCase):
                 rotor1.set_display(d)
                 self.assertEqual(rotor1.get_display(), rotor2.get_display())
                 rotor2.rotate()
+
+
+class RotorTablesTestCase(unittest.TestCase):
+    """Verify the precomputed tables against the Rotor class."""
+
+    def test_tables(self):
+
+        for name in ROTORS:
+            wiring = ROTORS[name]['wiring']
+            rotor = Rotor(name, wiring)
+            entry = entry_tables(wiring)
+            exit = exit_tables(wiring)
+
+            for pos in range(26):
+                rotor.set_display(ALPHA_LABELS[pos])
+                for n in range(26):
+                    self.assertEqual(entry[pos][n], rotor.signal_in(n))
+                    self.assertEqual(exit[pos][n], rotor.signal_out(n))
+
+                self.assertEqual(compose(IDENTITY, entry[pos], exit[pos]),
+                                 IDENTITY)
+
+    def test_cached(self):
+
+        self.assertIs(entry_tables(WIRING), entry_tables(WIRING))
+
+
+class TaggedRotor(Rotor):
+    pass
+
+
+class RotorPickleTestCase(unittest.TestCase):
+
+    def test_standard_rotor(self):
+        rotor = create_rotor('VI', ring_setting=5)
+        rotor.set_display('M')
+        rotor.rotate()
+
+        copy1 = pickle.loads(pickle.dumps(rotor))
+        copy2 = pickle.loads(pickle.dumps(rotor))
+        self.assertLess(len(pickle.dumps(rotor)), 80)
+        for attr in ('name', 'wiring_str', 'ring_setting', 'pos',
+                     'display_val', 'rotations', 'step_set'):
+            self.assertEqual(getattr(copy1, attr), getattr(rotor, attr))
+
+        # tables are shared between unpickled rotors, state is not
+        self.assertIs(copy1.display_map, copy2.display_map)
+        copy1.rotate()
+        self.assertEqual(copy2.get_display(), 'N')
+
+    def test_faithful(self):
+        # subclasses and extra attributes survive pickling
+        rotor = TaggedRotor('II', ROTORS['II']['wiring'], ring_setting=3)
+        rotor.set_display('Q')
+        copy = pickle.loads(pickle.dumps(rotor))
+        self.assertIs(type(copy), TaggedRotor)
+        self.assertEqual(copy.get_display(), 'Q')
+
+        rotor = create_rotor('III')
+        rotor.tag = 5
+        copy = pickle.loads(pickle.dumps(rotor))
+        self.assertEqual(copy.tag, 5)
+
+    def test_custom_rotor(self):
+        rotor = Rotor('X', ALPHA_LABELS[::-1], ring_setting=2, stepping='AM')
+        rotor.set_display('C')
+        copy = pickle.loads(pickle.dumps(rotor))
+        self.assertEqual(copy.wiring_str, rotor.wiring_str)
+        self.assertEqual(copy.step_set, {'A', 'M'})
+        self.assertEqual(copy.pos, rotor.pos)
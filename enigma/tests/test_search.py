@@ -0,0 +1,220 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the search module."""
+
+import itertools
+import unittest
+
+from ..machine import EnigmaMachine
+from ..ngram import NgramModel
+from ..search import (TopK, SearchStats, score_trial, search_start_positions,
+                      search_rotor_orders, Candidate, CribScorer, IoCScorer,
+                      NgramScorer, best_candidates, crib_offsets, crib_rule,
+                      key_space, search, start_positions)
+from ..spec import MachineSpec
+
+
+CORPUS = (
+    'THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG. '
+    'THERE IS NOTHING EITHER GOOD OR BAD BUT THINKING MAKES IT SO. '
+    'THE ENEMY FLEET WAS SIGHTED NORTH OF THE ISLAND AT DAWN. '
+) * 10
+
+PLAINTEXT = 'THEENEMYFLEETWASSIGHTEDNORTHOFTHEISLANDATDAWN'
+
+
+class TopKTestCase(unittest.TestCase):
+
+    def test_bounded(self):
+
+        best = TopK(3)
+        self.assertIsNone(best.threshold)
+        for score in [5, 1, 7, 3, 9, 2]:
+            best.push(score, str(score))
+
+        self.assertEqual(len(best), 3)
+        self.assertEqual(best.threshold, 5)
+        self.assertEqual(best.results(), [(9, '9'), (7, '7'), (5, '5')])
+        self.assertFalse(best.push(4, 'x'))
+
+    def test_ties(self):
+
+        # items are never compared, even if they are not orderable
+        best = TopK(2)
+        for n in range(4):
+            best.push(1.0, {'n': n})
+        self.assertEqual(len(best), 2)
+
+
+class ScoreTrialTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = NgramModel.from_corpus(CORPUS, n=4)
+        self.machine = EnigmaMachine.from_key_sheet(rotors='II IV V')
+        self.machine.set_display('ABC')
+        self.ciphertext = self.machine.process_text(PLAINTEXT)
+
+    def test_full_score(self):
+
+        for chunk_size in [1, 3, 16, 100]:
+            self.machine.set_display('ABC')
+            score, text = score_trial(self.machine, self.ciphertext,
+                                      self.model, chunk_size=chunk_size)
+            self.assertEqual(text, PLAINTEXT)
+            self.assertAlmostEqual(score, self.model.score_text(PLAINTEXT),
+                                   places=3)
+
+    def test_abandon(self):
+
+        stats = SearchStats()
+        self.machine.set_display('ZZZ')
+        result = score_trial(self.machine, self.ciphertext, self.model,
+                             threshold=0.0, chunk_size=8, stats=stats)
+        self.assertIsNone(result)
+        self.assertEqual(stats.trials, 1)
+        self.assertEqual(stats.abandoned, 1)
+        self.assertEqual(stats.letters_decrypted, 8)
+        self.assertEqual(stats.letters_saved, len(self.ciphertext) - 8)
+
+    def test_no_false_abandon(self):
+
+        # the correct key must survive a threshold just below its score
+        score = self.model.score_text(PLAINTEXT)
+        self.machine.set_display('ABC')
+        result = score_trial(self.machine, self.ciphertext, self.model,
+                             threshold=score - 0.01, chunk_size=4)
+        self.assertEqual(result[1], PLAINTEXT)
+
+
+class SearchStartPositionsTestCase(unittest.TestCase):
+
+    def test_search(self):
+
+        model = NgramModel.from_corpus(CORPUS, n=4)
+        machine = EnigmaMachine.from_key_sheet(rotors='II IV V',
+                ring_settings='B U L', plugboard_settings='AV BS CG DL')
+        machine.set_display('KFQ')
+        ciphertext = machine.process_text(PLAINTEXT)
+
+        starts = ['K%s%s' % (m, r) for m in 'DEFG' for r in 'ABCDEFGHIJKLMNOPQ']
+        # a heuristic bound well under the model's max_log_prob, so that the
+        # wrong keys are abandoned early
+        bound = 0.5 * model.score_text(PLAINTEXT) / len(PLAINTEXT)
+        stats = SearchStats()
+        results = search_start_positions(ciphertext, model, rotors='II IV V',
+                ring_settings='B U L', plugboard_settings='AV BS CG DL',
+                top_k=1, starts=starts, chunk_size=4, bound=bound,
+                stats=stats)
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][1:], ('KFQ', PLAINTEXT))
+        self.assertEqual(stats.trials, len(starts))
+        self.assertGreater(stats.letters_saved, 0)
+
+
+class SearchRotorOrdersTestCase(unittest.TestCase):
+
+    def test_search(self):
+
+        model = NgramModel.from_corpus(CORPUS, n=3)
+        machine = EnigmaMachine.from_key_sheet(rotors='II IV V')
+        machine.set_display('KFQ')
+        ciphertext = machine.process_text(PLAINTEXT)
+
+        orders = ['I II III', 'II IV V', 'V IV II']
+        starts = ['K%s%s' % (m, r) for m in 'EFG' for r in 'OPQR']
+        stats = SearchStats()
+        results = search_rotor_orders(ciphertext, model, orders, top_k=3,
+                starts=starts, processes=2, stats=stats)
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][1:], ('II IV V', 'KFQ', PLAINTEXT))
+        self.assertEqual(stats.trials, len(orders) * len(starts))
+        serial = sorted((score for order in orders
+                         for score, _, _ in search_start_positions(
+                             ciphertext, model, rotors=order, top_k=3,
+                             starts=starts)), reverse=True)
+        self.assertEqual([r[0] for r in results], serial[:3])
+
+
+class FrameworkTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = NgramModel.from_corpus(CORPUS, n=4)
+        self.spec = MachineSpec.from_key_sheet(rotors='II IV V',
+                                               ring_settings='B U L')
+        machine = self.spec.create_machine('KFQ')
+        self.ciphertext = machine.process_text(PLAINTEXT)
+        self.starts = ['K%s%s' % (m, r) for m in 'DEFG' for r in 'OPQR']
+
+    def test_enumerators(self):
+        keys = start_positions(self.spec)
+        self.assertEqual(next(keys), (self.spec, 'AAA'))
+        self.assertEqual(sum(1 for _ in keys), 26 ** 3 - 1)
+
+        keys = list(key_space(['I II III', 'II IV V'], ['B', 'C'],
+                              ['A A A', 'A B C'], starts=['AAA', 'ZZZ']))
+        self.assertEqual(len(keys), 2 * 2 * 2 * 2)
+        self.assertEqual(keys[-1], (MachineSpec.from_key_sheet(
+                rotors='II IV V', reflector='C', ring_settings='A B C'),
+                'ZZZ'))
+
+        # enumeration is lazy
+        space = key_space(itertools.permutations(['I', 'II', 'III', 'IV'], 3))
+        self.assertEqual(len(list(itertools.islice(space, 5))), 5)
+
+    def test_candidate(self):
+        candidate = Candidate(-1.5, self.spec, 'ABC', 'TEXT')
+        self.assertFalse(hasattr(candidate, '__dict__'))
+        self.assertEqual(candidate, Candidate(-1.5, self.spec, 'ABC', 'TEXT'))
+
+    def test_ngram_search(self):
+        stats = SearchStats()
+        best = TopK(2)
+        entrants = list(search(self.ciphertext,
+                               start_positions(self.spec, self.starts),
+                               NgramScorer(self.model), best=best, stats=stats,
+                               chunk_size=4))
+        self.assertEqual(stats.trials, len(self.starts))
+        results = [c for _, c in best.results()]
+        self.assertEqual(results[0].start, 'KFQ')
+        self.assertEqual(results[0].plaintext, PLAINTEXT)
+        self.assertAlmostEqual(results[0].score,
+                               self.model.score_text(PLAINTEXT), places=3)
+        self.assertIn(results[0], entrants)
+
+        # the same as search_start_positions
+        expected = search_start_positions(self.ciphertext, self.model,
+                rotors='II IV V', ring_settings='B U L', top_k=2,
+                starts=self.starts, chunk_size=4)
+        self.assertEqual([(c.score, c.start, c.plaintext) for c in results],
+                         expected)
+
+    def test_ioc(self):
+        scorer = IoCScorer()
+        self.assertAlmostEqual(scorer.score(b'\x00\x00\x01'), 1 / 3)
+        self.assertEqual(scorer.score(b''), 0.0)
+        results = best_candidates(self.ciphertext,
+                                  start_positions(self.spec, self.starts),
+                                  scorer, top_k=1)
+        self.assertEqual(results[0].plaintext, PLAINTEXT)
+
+    def test_crib(self):
+        crib = 'ENEMYFLEET'
+        offset = PLAINTEXT.index(crib)
+        self.assertIn(offset, crib_offsets(self.ciphertext, crib))
+        for i in crib_offsets(self.ciphertext, crib):
+            for a, b in zip(self.ciphertext[i:], crib):
+                self.assertNotEqual(a, b)
+
+        stats = SearchStats()
+        results = best_candidates(self.ciphertext,
+                                  start_positions(self.spec, self.starts),
+                                  CribScorer(crib, offset), top_k=1,
+                                  rules=[crib_rule(crib, offset)],
+                                  chunk_size=4, stats=stats)
+        self.assertEqual(results[0].plaintext, PLAINTEXT)
+        self.assertEqual(results[0].score, len(crib))
+        self.assertEqual(stats.abandoned, len(self.starts) - 1)
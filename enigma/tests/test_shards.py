@@ -0,0 +1,142 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the sharded key search module."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from ..machine import EnigmaMachine
+from ..ngram import NgramModel
+from ..shards import (Checkpoint, Keyspace, Shard, ShardError, search_shard,
+                      sharded_search)
+from .test_search import CORPUS, PLAINTEXT
+
+
+STARTS = ['ABC', 'QEV', 'ZZZ', 'MAX']
+
+
+def keyspace(**kwargs):
+    return Keyspace(rotors=['II', 'IV', 'V'], reflectors=['B'], rings=[0, 5],
+                    starts=STARTS, **kwargs)
+
+
+class KeyspaceTestCase(unittest.TestCase):
+
+    def test_numbering(self):
+        space = Keyspace()
+        self.assertEqual(len(space), 2 * 336 * 26 * 26)
+        self.assertEqual(space.shard(0), Shard(0, 'B', ('I', 'II', 'III'),
+                                               (0, 0, 0)))
+        self.assertEqual(space.shard(27), Shard(27, 'B', ('I', 'II', 'III'),
+                                                (0, 1, 1)))
+        last = space.shard(len(space) - 1)
+        self.assertEqual(last.reflector, 'C')
+        self.assertEqual(last.ring_settings, (0, 25, 25))
+        self.assertRaises(ShardError, space.shard, len(space))
+
+        # every shard is distinct
+        small = keyspace()
+        shards = list(small.shards())
+        self.assertEqual(len(shards), 6 * 4)
+        self.assertEqual(len({s[1:] for s in shards}), len(shards))
+        self.assertEqual(list(small.shards(3, 5)), shards[3:5])
+
+    def test_m4(self):
+        space = Keyspace(4)
+        self.assertEqual(len(space), 2 * 2 * 336 * 26 * 26)
+        shard = space.shard(0)
+        self.assertEqual(shard.reflector, 'B-Thin')
+        self.assertEqual(shard.rotors, ('Beta', 'I', 'II', 'III'))
+        self.assertEqual(shard.ring_settings, (0, 0, 0, 0))
+        self.assertEqual(space.trials_per_shard, 26 ** 4)
+        self.assertRaises(ShardError, Keyspace, 5)
+
+
+class ShardedSearchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = NgramModel.from_corpus(CORPUS, n=4)
+        machine = EnigmaMachine.from_key_sheet(rotors='IV V II',
+                                               ring_settings=[0, 5, 0])
+        machine.set_display('QEV')
+        self.ciphertext = machine.process_text(PLAINTEXT)
+        self.space = keyspace()
+        self.shard = [s for s in self.space.shards()
+                      if s.rotors == ('IV', 'V', 'II') and
+                      s.ring_settings == (0, 5, 0)][0]
+
+    def test_search_shard(self):
+        results = search_shard(self.ciphertext, self.model, self.space,
+                               self.shard.number, top_k=2)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0][1:], (self.shard.number, 'QEV', PLAINTEXT))
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'search.json')
+
+            # search part of the keyspace, then the rest
+            first = sharded_search(self.ciphertext, self.model, self.space,
+                                   path, stop=10, top_k=3)
+            self.assertEqual(first.completed, set(range(10)))
+            with open(path) as fp:
+                self.assertEqual(json.load(fp)['completed'], [[0, 9]])
+
+            seen = []
+            done = sharded_search(self.ciphertext, self.model, self.space,
+                    path, top_k=3,
+                    progress=lambda c: seen.append(len(c.completed)))
+            self.assertEqual(seen, list(range(11, len(self.space) + 1)))
+            self.assertEqual(done.results()[0][1:],
+                             [self.shard.number, 'QEV', PLAINTEXT])
+            self.assertEqual(done.stats.trials, len(self.space) * len(STARTS))
+
+            # the same as an uninterrupted search (up to the order of equal
+            # scores)
+            whole = sharded_search(self.ciphertext, self.model, self.space,
+                                   top_k=3)
+            self.assertEqual([r[0] for r in whole.results()],
+                             [r[0] for r in done.results()])
+            self.assertEqual(whole.results()[0], done.results()[0])
+
+            # nothing left to do
+            again = sharded_search(self.ciphertext, self.model, self.space,
+                                   path, top_k=3, progress=seen.append)
+            self.assertEqual(again.results(), done.results())
+            self.assertEqual(len(seen), len(self.space) - 10)
+            self.assertEqual([n for n in os.listdir(directory)],
+                             ['search.json'])
+
+    def test_mismatch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'search.json')
+            sharded_search(self.ciphertext, self.model, self.space, path,
+                           stop=1)
+            self.assertRaises(ShardError, Checkpoint, self.space, 'OTHER',
+                              10, path)
+            self.assertRaises(ShardError, Checkpoint, keyspace(rotor_count=3,
+                              plugboard_settings='AB'), self.ciphertext, 10,
+                              path)
+            with open(path, 'w') as fp:
+                fp.write('{')
+            self.assertRaises(ShardError, Checkpoint, self.space,
+                              self.ciphertext, 10, path)
+
+    def test_non_ascii(self):
+        # only the keyboard letters of the ciphertext are compared
+        self.assertEqual(Checkpoint(self.space, 'Grüße aus Köln!').digest,
+                         Checkpoint(self.space, 'GREAUSKLN').digest)
+
+    def test_parallel(self):
+        serial = sharded_search(self.ciphertext, self.model, self.space,
+                                start=4, stop=20, top_k=3)
+        parallel = sharded_search(self.ciphertext, self.model, self.space,
+                                  start=4, stop=20, top_k=3, processes=2)
+        self.assertEqual(parallel.completed, set(range(4, 20)))
+        self.assertEqual([r[0] for r in parallel.results()],
+                         [r[0] for r in serial.results()])
+        self.assertEqual(parallel.results()[0], serial.results()[0])
@@ -0,0 +1,48 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the shared memory tables."""
+
+import pickle
+import unittest
+
+from ..atlas import ScramblerAtlas
+from ..ngram import NgramModel
+from ..shared import SharedTables, SharedTablesError
+
+
+CORPUS = 'THE ENEMY FLEET WAS SIGHTED NORTH OF THE ISLAND AT DAWN. ' * 5
+
+
+class SharedTablesTestCase(unittest.TestCase):
+
+    def test_model_and_atlas(self):
+        model = NgramModel.from_corpus(CORPUS, n=3)
+        atlas = ScramblerAtlas.build(rotors=['I', 'II', 'III'])
+
+        with SharedTables.create(model=model, atlas=atlas) as shared:
+            self.assertGreaterEqual(shared.size,
+                                    len(atlas.data) + 4 * len(model.table))
+            handle = pickle.loads(pickle.dumps(shared.handle))
+
+            other = SharedTables.attach(handle)
+            shared_model = other.ngram_model()
+            self.assertEqual(shared_model.n, 3)
+            self.assertEqual(shared_model.floor, model.floor)
+            self.assertEqual(shared_model.score_text(CORPUS),
+                             model.score_text(CORPUS))
+
+            shared_atlas = other.atlas()
+            self.assertEqual(shared_atlas.orders, atlas.orders)
+            self.assertEqual(shared_atlas.scrambler_at(['II', 'I', 'III'], 'QEV'),
+                             atlas.scrambler_at(['II', 'I', 'III'], 'QEV'))
+            other.close()
+            other.close()
+            self.assertRaises(SharedTablesError, other.ngram_model)
+
+    def test_missing_table(self):
+        model = NgramModel.from_corpus(CORPUS, n=2)
+        with SharedTables.create(model=model) as shared:
+            self.assertRaises(SharedTablesError, shared.atlas)
+        self.assertRaises(SharedTablesError, SharedTables.create)
@@ -0,0 +1,100 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the MachineSpec class."""
+
+import io
+import unittest
+
+from ..keyfile import get_daily_settings
+from ..machine import EnigmaMachine, EnigmaError
+from ..plugboard import PlugboardError
+from ..rotors import RotorError
+from ..spec import MachineSpec
+
+
+class MachineSpecTestCase(unittest.TestCase):
+
+    def test_spellings(self):
+
+        specs = [
+            MachineSpec.from_key_sheet(rotors='II IV V',
+                    ring_settings='B U L',
+                    plugboard_settings='AV BS CG DL FU HZ IN KM OW RX'),
+            MachineSpec.from_key_sheet(rotors=['II', 'IV', 'V'],
+                    ring_settings='2 21 12', reflector='B',
+                    plugboard_settings='XR WO MK NI ZH UF LD GC SB VA'),
+            MachineSpec.from_key_sheet(rotors=('II', 'IV', 'V'),
+                    ring_settings=[1, 20, 11],
+                    plugboard_settings='1/22 2/19 3/7 4/12 6/21 8/26 9/14 '
+                                       '11/13 15/23 18/24'),
+            MachineSpec.parse('II IV V 02 21 12 AV BS CG DL FU HZ IN KM OW RX B'),
+        ]
+        for spec in specs[1:]:
+            self.assertEqual(spec, specs[0])
+            self.assertEqual(hash(spec), hash(specs[0]))
+        self.assertEqual(len(set(specs)), 1)
+
+        self.assertNotEqual(specs[0],
+                MachineSpec.from_key_sheet(rotors='II IV V'))
+
+    def test_round_trip(self):
+
+        for text in ['II IV V 02 21 12 AV BS CG DL FU HZ IN KM OW RX B',
+                     'Beta II IV I A A A V 1/20 2/12 4/6 7/10 B-Thin',
+                     'I II III A A A C']:
+            spec = MachineSpec.parse(text)
+            self.assertEqual(MachineSpec.parse(spec.army_str()), spec)
+            self.assertEqual(MachineSpec.parse(spec.navy_str()), spec)
+            self.assertEqual(MachineSpec.parse(str(spec)), spec)
+            self.assertEqual(MachineSpec.from_settings(spec.to_settings()),
+                             spec)
+
+        spec = MachineSpec.parse('Beta II IV I A A A V 1/20 2/12 B-Thin')
+        self.assertEqual(spec.rotors, ('Beta', 'II', 'IV', 'I'))
+        self.assertEqual(spec.ring_settings, (0, 0, 0, 21))
+        self.assertEqual(spec.plugboard, ((0, 19), (1, 11)))
+        self.assertEqual(spec.navy_str(),
+                         'Beta II IV I A A A V 1/20 2/12 B-Thin')
+        self.assertEqual(spec.army_str(),
+                         'Beta II IV I 01 01 01 22 AT BL B-Thin')
+
+    def test_key_file(self):
+
+        line = '1 II IV V 02 21 12 AV BS CG DL FU HZ IN KM OW RX B\n'
+        settings = get_daily_settings(io.StringIO(line), 1)
+        self.assertEqual(MachineSpec.from_settings(settings),
+                         MachineSpec.parse(line[2:]))
+
+    def test_machine(self):
+
+        spec = MachineSpec.parse('III VI VIII A H M AN EZ HK IJ LR B')
+        machine = spec.create_machine('UZV')
+        self.assertEqual(machine.get_display(), 'UZV')
+        self.assertEqual(MachineSpec.from_machine(machine), spec)
+
+        reference = EnigmaMachine.from_key_sheet(rotors='III VI VIII',
+                ring_settings='A H M', plugboard_settings='AN EZ HK IJ LR')
+        reference.set_display('UZV')
+        self.assertEqual(machine.process_text('HELLOWORLD'),
+                         reference.process_text('HELLOWORLD'))
+
+    def test_coerce(self):
+
+        spec = MachineSpec.parse('I II III A A A B')
+        self.assertIs(MachineSpec.coerce(spec), spec)
+        self.assertEqual(MachineSpec.coerce({'rotors': 'I II III'}), spec)
+
+    def test_errors(self):
+
+        self.assertRaises(EnigmaError, MachineSpec.parse, '')
+        self.assertRaises(EnigmaError, MachineSpec.parse, 'I II III A B')
+        self.assertRaises(EnigmaError, MachineSpec.from_key_sheet, 'I II')
+        self.assertRaises(RotorError, MachineSpec.parse, 'I II X A A A B')
+        self.assertRaises(RotorError, MachineSpec.parse, 'I II III A A A D')
+        self.assertRaises(RotorError, MachineSpec.from_key_sheet,
+                          ring_settings=[0, 0, 26])
+        self.assertRaises(EnigmaError, MachineSpec.parse, 'I II III A * A B')
+        self.assertRaises(PlugboardError, MachineSpec.parse,
+                          'I II III A A A AB AC B')
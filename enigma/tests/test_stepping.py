@@ -0,0 +1,91 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the stepping module."""
+
+import unittest
+
+from ..machine import EnigmaMachine, EnigmaError
+from ..rotors import RotorError
+from ..stepping import (stepping_cycles, encode_position, decode_position,
+        POSITIONS)
+
+
+class PositionEncodingTestCase(unittest.TestCase):
+
+    def test_round_trip(self):
+
+        for n in [0, 1, 27, 12345, POSITIONS - 1]:
+            self.assertEqual(encode_position(decode_position(n)), n)
+        self.assertEqual(encode_position('aab'), 1)
+        self.assertRaises(EnigmaError, encode_position, 'AB')
+        self.assertRaises(EnigmaError, encode_position, 'A1B')
+
+
+class SteppingCyclesTestCase(unittest.TestCase):
+
+    def test_single_notch_period(self):
+
+        cycles = stepping_cycles('I II III')
+        self.assertEqual(cycles.periods, [26 * 25 * 26])
+
+        # the middle rotor can be set to its notch (E) with the right rotor
+        # anywhere, but the machine only steps there with the right rotor just
+        # past its notch (V)
+        self.assertIsNone(cycles.lookup('AEA'))
+        self.assertIsNotNone(cycles.lookup('AEW'))
+
+    def test_against_machine(self):
+        for rotors in ['III II I', 'Beta VI VII VIII', 'I VIII V']:
+            cycles = stepping_cycles(rotors)
+            for start in ['KDO', 'AFA', 'ZMZ', 'QEV']:
+                machine = EnigmaMachine.from_key_sheet(rotors=rotors,
+                        reflector='B-Thin' if rotors.split()[0] in
+                                  ('Beta', 'Gamma') else 'B')
+                machine.set_display('A' * (machine.rotor_count - 3) + start)
+
+                displays = []
+                for _ in range(1000):
+                    machine.key_press('A')
+                    displays.append(machine.get_display()[-3:])
+
+                # after at most a couple of steps we are on the cycle
+                cycle = cycles.cycle(start)
+                number, index = cycles.lookup(displays[5])
+                self.assertIs(cycles.cycles[number], cycle)
+                for i, display in enumerate(displays[5:]):
+                    expected = decode_position(cycle[(index + i) % len(cycle)])
+                    self.assertEqual(display, expected)
+
+                for count in [1, 2, 3, 500, 1000]:
+                    self.assertEqual(cycles.advance(start, count),
+                                     displays[count - 1])
+
+    def test_full_period(self):
+
+        cycles = stepping_cycles(['I', 'IV', 'V'])
+        machine = EnigmaMachine.from_key_sheet(rotors='I IV V')
+        machine.set_display('ABC')
+        period = len(cycles.cycle('ABC'))
+        machine.process_text('A' * period)
+        self.assertEqual(machine.get_display(), 'ABC')
+        self.assertEqual(cycles.advance('ABC', period), 'ABC')
+
+    def test_two_notches(self):
+
+        cycles = stepping_cycles('I VI VIII')
+        self.assertGreater(len(cycles.cycles), 1)
+        self.assertLess(sum(cycles.periods), POSITIONS)
+
+    def test_cached(self):
+
+        # only the notches of the middle & right rotors matter
+        self.assertIs(stepping_cycles('I II III'), stepping_cycles('V II III'))
+        self.assertIsNot(stepping_cycles('I II III'),
+                         stepping_cycles('I III II'))
+
+    def test_errors(self):
+
+        self.assertRaises(EnigmaError, stepping_cycles, 'I II')
+        self.assertRaises(RotorError, stepping_cycles, 'I II X')
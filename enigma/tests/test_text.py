@@ -0,0 +1,115 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for text normalization and formatting."""
+
+import unittest
+
+from ..machine import EnigmaMachine, EnigmaError
+from ..text import (count_invalid, format_groups, groups, keyboard_text,
+                    normalize, process_passthrough, translation_table,
+                    GroupFormatter, TextError, DROP, PASSTHROUGH,
+                    LETTERS_TO_NUMBERS, NUMBERS_TO_LETTERS)
+
+
+TEXT = 'Grüße aus Köln, 1941! ıi'
+
+
+def reference(text, replace_char):
+    # the original EnigmaMachine.process_text loop
+    result = []
+    for key in text:
+        c = key.upper()
+        if c not in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+            if replace_char:
+                c = replace_char
+            else:
+                continue
+        result.append(c)
+    return ''.join(result)
+
+
+def create_machine():
+    return EnigmaMachine.from_key_sheet(rotors='II IV V', reflector='B',
+                                        ring_settings=[1, 20, 11],
+                                        plugboard_settings='AV BS CG DL FU HZ')
+
+
+class TextTestCase(unittest.TestCase):
+
+    def test_policies(self):
+        for replace_char in ('X', 'Q', None):
+            self.assertEqual(keyboard_text(TEXT, replace_char),
+                             reference(TEXT, replace_char))
+        self.assertEqual(normalize(TEXT), 'GRXXEXAUSXKXLNXXXXXXXXII')
+        self.assertEqual(normalize(TEXT, DROP), 'GREAUSKLNII')
+        self.assertEqual(normalize(TEXT, PASSTHROUGH),
+                         'GRüßE AUS KöLN, 1941! II')
+        self.assertEqual(count_invalid(TEXT), 13)
+        self.assertIs(translation_table(DROP), translation_table(DROP))
+        self.assertRaises(TextError, normalize, TEXT, 'upper')
+        self.assertRaises(TextError, normalize, TEXT, 'replace', None)
+
+    def test_table_size(self):
+        # only Latin-1 translations are kept, however varied the input
+        table = translation_table(DROP)
+        text = ''.join(map(chr, range(0x100, 0x3000))) + 'ıſ'
+        self.assertEqual(normalize(text, DROP), reference(text, None))
+        self.assertEqual(normalize(text, DROP), reference(text, None))
+        self.assertEqual(normalize('äÿ', DROP), '')
+        self.assertLessEqual(max(table), 255)
+
+    def test_letter_tables(self):
+        numbers = b'HELLO'.translate(LETTERS_TO_NUMBERS)
+        self.assertEqual(list(numbers), [7, 4, 11, 11, 14])
+        self.assertEqual(numbers.translate(NUMBERS_TO_LETTERS), b'HELLO')
+
+    def test_process_text(self):
+        for replace_char in ('X', None):
+            m1, m2 = create_machine(), create_machine()
+            m1.set_display('WXC')
+            m2.set_display('WXC')
+            expected = ''.join(m2.key_press(c)
+                               for c in reference(TEXT, replace_char))
+            self.assertEqual(m1.process_text(TEXT, replace_char), expected)
+
+        # the replacement is only pressed if it is needed
+        self.assertRaises(EnigmaError, create_machine().process_text, 'A B',
+                          '?')
+        self.assertEqual(create_machine().process_text('AB', '?'),
+                         create_machine().process_text('AB'))
+
+    def test_passthrough(self):
+        m1, m2 = create_machine(), create_machine()
+        result = process_passthrough(m1, 'Attack at dawn, 0600!')
+        letters = m2.process_text('ATTACKATDAWN')
+        self.assertEqual(result, '%s %s %s, 0600!' % (letters[:6],
+                                                      letters[6:8],
+                                                      letters[8:]))
+        self.assertEqual(m1.get_display(), m2.get_display())
+        self.assertEqual(process_passthrough(m1, '... '), '... ')
+
+    def test_groups(self):
+        letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        self.assertEqual(format_groups(letters),
+                         'ABCDE FGHIJ KLMNO PQRST UVWXY Z')
+        self.assertEqual(format_groups(letters[:10]), 'ABCDE FGHIJ')
+        self.assertEqual(format_groups(letters, 4, 3),
+                         'ABCD EFGH IJKL\nMNOP QRST UVWX\nYZ')
+        self.assertEqual(format_groups(''), '')
+
+        # chunk boundaries do not affect the result
+        for size in (1, 3, 5, 7, 26):
+            chunks = [letters[i:i + size] for i in range(0, 26, size)]
+            self.assertEqual(''.join(groups(chunks, 4, 3)),
+                             format_groups(letters, 4, 3))
+
+        formatter = GroupFormatter(2)
+        self.assertEqual(formatter.format('ABC'), 'AB C')
+        self.assertEqual(formatter.format('D'), 'D')
+        self.assertEqual(formatter.format('E'), ' E')
+        formatter.reset()
+        self.assertEqual(formatter.format('FG'), 'FG')
+        self.assertRaises(TextError, GroupFormatter, 0)
+        self.assertRaises(TextError, GroupFormatter, 5, 0)
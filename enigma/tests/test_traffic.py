@@ -0,0 +1,108 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the synthetic traffic generator."""
+
+import contextlib
+import datetime
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from ..keyfile import get_daily_settings
+from ..machine import EnigmaMachine
+from ..spec import MachineSpec
+from ..traffic import (daily_messages, daily_spec, generate, key_sheet_lines,
+                       main, write_corpus, TrafficError)
+
+
+DATE = datetime.date(1941, 6, 3)
+
+
+class TrafficTestCase(unittest.TestCase):
+
+    def test_daily_spec(self):
+        for rotor_count in (3, 4):
+            spec = daily_spec(5, DATE, rotor_count)
+            self.assertEqual(len(spec.rotors), rotor_count)
+            self.assertEqual(len(spec.plugboard), 10)
+            self.assertEqual(spec, daily_spec(5, DATE, rotor_count))
+        self.assertNotEqual(daily_spec(5, DATE), daily_spec(6, DATE))
+        self.assertRaises(TrafficError, daily_spec, 5, DATE, 2)
+
+    def test_key_sheet(self):
+        for rotor_count in (3, 4):
+            lines = list(key_sheet_lines(5, 1941, 6, rotor_count))
+            self.assertEqual(len(lines), 31)     # comment + 30 days
+            fp = io.StringIO(''.join(lines))
+            settings = get_daily_settings(fp, day=DATE.day)
+            self.assertEqual(MachineSpec.from_settings(settings),
+                             daily_spec(5, DATE, rotor_count))
+
+    def test_messages(self):
+        for rotor_count in (3, 4):
+            spec = daily_spec(9, DATE, rotor_count)
+            for msg in daily_messages(9, DATE, 5, rotor_count):
+                # the indicator procedure of examples/example1.py
+                machine = spec.create_machine(msg.ground)
+                self.assertEqual(machine.process_text(msg.indicator),
+                                 msg.message_key)
+                machine.set_display(msg.message_key)
+                self.assertEqual(machine.process_text(msg.ciphertext),
+                                 msg.plaintext)
+
+    def test_reproducible(self):
+        first = list(generate(3, DATE, days=4, messages=10))
+        self.assertEqual(first, list(generate(3, DATE, days=4, messages=10)))
+        self.assertEqual([m.id for m in first], list(range(10)))
+        self.assertEqual([m.date.day for m in first],
+                         [3, 3, 3, 4, 4, 4, 5, 5, 6, 6])
+
+        # a day's messages do not depend on the days before it
+        self.assertEqual([m[1:] for m in first[3:6]],
+                         [m[1:] for m in daily_messages(3, DATE.replace(day=4),
+                                                        3)])
+
+    def test_write_corpus(self):
+        with tempfile.TemporaryDirectory() as directory:
+            summary = write_corpus(directory, seed=1,
+                                   start=datetime.date(1941, 1, 30), days=3,
+                                   messages=7)
+            self.assertEqual(summary['messages'], 7)
+            self.assertEqual(summary['key_sheets'], 2)
+            self.assertEqual(sorted(os.listdir(os.path.join(directory, 'keys'))),
+                             ['1941-01.keys', '1941-02.keys'])
+
+            with open(os.path.join(directory, 'intercepts.jsonl')) as fp:
+                intercepts = [json.loads(line) for line in fp]
+            with open(os.path.join(directory, 'truth.jsonl')) as fp:
+                truth = [json.loads(line) for line in fp]
+            self.assertEqual(len(intercepts), 7)
+
+            # decrypt the last message from the key sheet
+            msg, answer = intercepts[-1], truth[-1]
+            self.assertEqual(msg['date'], '1941-02-01')
+            with open(os.path.join(directory, 'keys', '1941-02.keys')) as fp:
+                settings = get_daily_settings(fp, day=1)
+            machine = EnigmaMachine.from_key_sheet(**settings)
+            machine.set_display(msg['ground'])
+            message_key = machine.process_text(msg['indicator'])
+            self.assertEqual(message_key, answer['message_key'])
+            machine.set_display(message_key)
+            self.assertEqual(machine.process_text(msg['ciphertext']),
+                             answer['plaintext'])
+            self.assertEqual(summary['letters'],
+                             sum(len(m['ciphertext']) for m in intercepts))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                main(['--days', '2', '--messages', '3', '--rotors', '4',
+                      directory])
+            self.assertEqual(json.loads(out.getvalue())['messages'], 3)
+            with open(os.path.join(directory, 'truth.jsonl')) as fp:
+                self.assertEqual(len(fp.readlines()), 3)
@@ -0,0 +1,95 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Tests for the differential verification module."""
+
+import random
+import unittest
+
+from .. import backends
+from ..atlas import ScramblerAtlas
+from ..spec import MachineSpec
+from ..verify import (check, default_engines, random_spec, sweep_period,
+                      turnover_start, verify_random)
+
+
+SPEC = MachineSpec.parse('II IV V 02 21 12 AV BS CG DL FU HZ IN KM OW RX B')
+
+
+def no_double_step(spec, start, text):
+    """A deliberately broken engine: the reference machine with the middle
+    rotor's double step removed.
+
+    """
+    machine = spec.create_machine(start)
+    middle = machine.rotors[-2]
+    output = []
+    for c in text:
+        skip = middle.notch_over_pawl() and not \
+                machine.rotors[-1].notch_over_pawl()
+        if skip:
+            saved = middle.step_set
+            middle.step_set = set()
+            machine.rotors[-3].rotate()
+        output.append(machine.key_press(c))
+        if skip:
+            middle.step_set = saved
+    return ''.join(output), machine.get_display()
+
+
+class VerifyTestCase(unittest.TestCase):
+
+    def test_random(self):
+        self.assertEqual(verify_random(trials=20, seed=42, length=100), [])
+
+    def test_random_keys(self):
+        rng = random.Random(1)
+        for count in (3, 4):
+            spec = random_spec(rng, count)
+            self.assertEqual(len(spec.rotors), count)
+            start = turnover_start(spec, rng)
+            self.assertEqual(len(start), count)
+
+    def test_atlas(self):
+        atlas = ScramblerAtlas.build(rotors=['II', 'IV', 'V'])
+        engines = default_engines(atlas)
+        self.assertEqual(check(SPEC, 'ADU', 'HELLO WORLD' * 10, engines), [])
+        # keys the atlas does not cover are skipped
+        other = MachineSpec.parse('I II III A A A C')
+        self.assertEqual(check(other, 'AAA', 'ABC', engines), [])
+
+    def test_divergence(self):
+        # V's notch is Z and IV's is J: the middle rotor reaches J at the
+        # 3rd key press and double steps at the 4th
+        engines = {'broken': no_double_step}
+        found = check(SPEC, 'AIX', 'A' * 10, engines)
+        self.assertEqual(len(found), 1)
+        divergence = found[0]
+        self.assertEqual(divergence.engine, 'broken')
+        self.assertEqual(divergence.index, 3)
+        self.assertEqual(divergence.display_before, 'AJA')
+        self.assertEqual(divergence.display_after, 'BKB')
+        self.assertIn('key press:     #4, A', str(divergence))
+
+    def test_backend_selected(self):
+        # the reference is key_press even when process_text uses a backend,
+        # so a broken backend is caught while it is selected
+        def broken(machine, text, replace_char='X'):
+            result = tables(machine, text, replace_char)
+            return result[:-1] + ('B' if result[-1] == 'A' else 'A')
+
+        tables = backends.BACKENDS['tables']
+        backends.BACKENDS['tables'] = broken
+        try:
+            backends.set_backend('tables')
+            found = check(SPEC, 'ADU', 'HELLO WORLD')
+        finally:
+            backends.BACKENDS['tables'] = tables
+            backends.set_backend('python')
+        self.assertEqual([d.engine for d in found], ['backend:tables'])
+        self.assertEqual(found[0].index, 10)
+
+    def test_sweep(self):
+        spec = MachineSpec.parse('I II VI A A A B')
+        self.assertEqual(sweep_period(spec, start='ADU'), [])
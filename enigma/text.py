@@ -0,0 +1,229 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Contains fast text normalization and output formatting.
+
+Characters are upper cased and checked against the keyboard with precomputed
+str.translate() tables rather than one character at a time. A table applies one
+of three policies to characters that are not on the keyboard:
+
+    REPLACE     - replace them with a keyboard letter (X by default)
+    DROP        - delete them
+    PASSTHROUGH - leave them unchanged; only the letters are encrypted, which
+                  preserves the spaces and punctuation of the input
+
+A character is on the keyboard if str.upper() turns it into a single letter A-Z,
+exactly as EnigmaMachine.process_text has always decided it. Tables fill in
+their Latin-1 entries as new characters are seen, so each of those is looked up
+once however long the input is.
+
+On output, GroupFormatter writes ciphertext in the traditional groups of five
+letters, a chunk at a time, so arbitrarily long streams may be formatted
+without holding them in memory:
+
+    formatter = GroupFormatter(5, groups_per_line=10)
+    for chunk in chunks:
+        out.write(formatter.format(machine.process_text(chunk)))
+
+"""
+
+import functools
+import re
+import string
+
+
+class TextError(Exception):
+    pass
+
+
+# Policies for characters that are not on the keyboard:
+REPLACE = 'replace'
+DROP = 'drop'
+PASSTHROUGH = 'passthrough'
+POLICIES = (REPLACE, DROP, PASSTHROUGH)
+
+# machine.KEYBOARD_CHARS; repeated here as machine.py imports this module.
+LETTERS = string.ascii_uppercase
+_LETTERS_SET = frozenset(LETTERS)
+
+# Translate between uppercase ASCII letters and letter numbers (0-25):
+LETTERS_TO_NUMBERS = bytes.maketrans(LETTERS.encode('ascii'), bytes(range(26)))
+NUMBERS_TO_LETTERS = bytes.maketrans(bytes(range(26)), LETTERS.encode('ascii'))
+
+_RUNS = re.compile('([A-Z]+)')
+
+
+# Tables remember the translations of code points below this (Latin-1), so they
+# cannot grow without bound; other characters are translated every time:
+_STORED = 256
+
+
+class _Table(dict):
+    """A str.translate() table that computes the translation of each character
+    the first time it is seen, and remembers it if its code point is below
+    _STORED.
+
+    """
+    def __init__(self, policy, replace_char):
+        super().__init__()
+        self.policy = policy
+        self.replace_char = replace_char
+        for c in string.printable:
+            self[ord(c)] = self._translate(c)
+
+    def _translate(self, c):
+        upper = c.upper()
+        if upper in _LETTERS_SET:
+            return upper
+        if self.policy == REPLACE:
+            return self.replace_char
+        if self.policy == DROP:
+            return None
+        return c
+
+    def __missing__(self, code):
+        value = self._translate(chr(code))
+        if code < _STORED:
+            self[code] = value
+        return value
+
+
+@functools.lru_cache(maxsize=32)
+def translation_table(policy=REPLACE, replace_char='X'):
+    """Return the str.translate() table for a policy. Tables are cached and
+    shared.
+
+    policy - one of REPLACE, DROP or PASSTHROUGH
+
+    replace_char - the replacement for characters not on the keyboard under the
+    REPLACE policy. It is used as given: callers that need a keyboard letter
+    must check it.
+
+    """
+    if policy not in POLICIES:
+        raise TextError('unknown policy %r' % (policy, ))
+    if policy == REPLACE and not replace_char:
+        raise TextError('the replace policy needs a replace_char')
+    return _Table(policy, replace_char if policy == REPLACE else None)
+
+
+def normalize(text, policy=REPLACE, replace_char='X'):
+    """Return text upper cased, with characters that are not on the keyboard
+    replaced, dropped or passed through according to policy.
+
+    """
+    return text.translate(translation_table(policy, replace_char))
+
+
+def keyboard_text(text, replace_char='X'):
+    """Normalize text as EnigmaMachine.process_text does: characters not on the
+    keyboard are replaced with replace_char, or dropped if replace_char is None
+    or empty.
+
+    """
+    if replace_char:
+        return text.translate(translation_table(REPLACE, replace_char))
+    return text.translate(translation_table(DROP))
+
+
+def count_invalid(text):
+    """Return the number of characters in text that are not on the keyboard."""
+    return len(text) - len(keyboard_text(text, None))
+
+
+def process_passthrough(machine, text):
+    """Encrypt the letters of text with machine, leaving every other character
+    where it is. Letters are upper cased first.
+
+    machine - any object with a process_text(text) method, such as an
+    EnigmaMachine; its letters are processed in a single call
+
+    """
+    pieces = _RUNS.split(normalize(text, PASSTHROUGH))
+    result = machine.process_text(''.join(pieces[1::2]))
+    start = 0
+    for i in range(1, len(pieces), 2):
+        end = start + len(pieces[i])
+        pieces[i] = result[start:end]
+        start = end
+    return ''.join(pieces)
+
+
+class GroupFormatter:
+    """Formats a stream of letters into fixed size groups, separated by spaces
+    and optionally broken into lines, one chunk at a time. Groups and lines
+    continue across chunks.
+
+    """
+    def __init__(self, size=5, groups_per_line=None, separator=' ',
+                 newline='\n'):
+        """size - the number of letters per group
+
+        groups_per_line - the number of groups per line, or None to write a
+        single line
+
+        separator, newline - the strings written between groups and between
+        lines
+
+        """
+        if size < 1:
+            raise TextError('group size must be at least 1')
+        if groups_per_line is not None and groups_per_line < 1:
+            raise TextError('groups per line must be at least 1')
+        self.size = size
+        self.groups_per_line = groups_per_line
+        self.separator = separator
+        self.newline = newline
+        self.count = 0      # letters formatted so far
+
+    def format(self, chunk):
+        """Return the formatted chunk, including the separator that precedes
+        its first letter if it continues an earlier chunk.
+
+        """
+        size, count = self.size, self.count
+        self.count = count + len(chunk)
+
+        # letters that complete the current group, then whole groups:
+        head = -count % size
+        parts = [chunk[:head]] if head else []
+        groups = [chunk[i:i + size] for i in range(head, len(chunk), size)]
+        if not groups:
+            return ''.join(parts)
+
+        first = (count + head) // size      # the number of the first group
+        per_line = self.groups_per_line
+        if first:
+            parts.append(self.newline if per_line and not first % per_line
+                         else self.separator)
+        if per_line:
+            rest = -first % per_line        # groups that complete the line
+            lines = [groups[:rest]] if rest else []
+            lines.extend(groups[i:i + per_line]
+                         for i in range(rest, len(groups), per_line))
+            parts.append(self.newline.join(map(self.separator.join, lines)))
+        else:
+            parts.append(self.separator.join(groups))
+        return ''.join(parts)
+
+    def reset(self):
+        """Start a new stream."""
+        self.count = 0
+
+
+def groups(chunks, size=5, groups_per_line=None):
+    """Generate the formatted chunks of an iterable of letter chunks; see
+    GroupFormatter.
+
+    """
+    formatter = GroupFormatter(size, groups_per_line)
+    for chunk in chunks:
+        result = formatter.format(chunk)
+        if result:
+            yield result
+
+
+def format_groups(text, size=5, groups_per_line=None):
+    """Return text formatted into groups; see GroupFormatter."""
+    return GroupFormatter(size, groups_per_line).format(text)
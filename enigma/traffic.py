@@ -0,0 +1,268 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Generates reproducible synthetic Enigma traffic: monthly key sheets,
+message keys and enciphered messages with their plaintexts.
+
+Everything is derived from a seed and the calendar date, so the same seed always
+produces the same corpus, on any machine, and any single day can be regenerated
+on its own. Each day has its own key (see daily_spec()); each message has a
+random ground setting (Grundstellung) and message key. As in
+examples/example1.py, the indicator sent with a message is the message key
+enciphered at the ground setting, and the body is enciphered starting at the
+message key.
+
+write_corpus() streams a corpus to a directory:
+
+    keys/YYYY-MM.keys - one key sheet per month in the keyfile.py format
+
+    intercepts.jsonl - one JSON object per message, as an interceptor sees it:
+    id, date, ground, indicator and ciphertext
+
+    truth.jsonl - the ground truth for the same messages, in the same order:
+    id, message_key and plaintext
+
+Messages are generated and written one at a time, so memory use does not
+depend on the size of the corpus. It may also be run from the command line:
+
+    $ python -m enigma.traffic --days 365 --messages 1000000 --seed 7 corpus/
+
+"""
+
+import argparse
+import calendar
+import collections
+import datetime
+import json
+import os
+import random
+import sys
+
+from .engine import compile_key
+from .machine import KEYBOARD_CHARS
+from .spec import MachineSpec
+
+
+class TrafficError(Exception):
+    pass
+
+
+# The rotors and reflectors used for army (3 rotor) and navy M4 (4 rotor) keys:
+ARMY_ROTORS = ('I', 'II', 'III', 'IV', 'V')
+ARMY_REFLECTORS = ('B', 'C')
+NAVY_ROTORS = ('I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII')
+NAVY_FOURTH_ROTORS = ('Beta', 'Gamma')
+NAVY_REFLECTORS = ('B-Thin', 'C-Thin')
+
+# The number of plugboard cables used on a key sheet (see keyfile.py):
+KEY_SHEET_PAIRS = 10
+
+# Plaintext vocabulary. Words are run together with X as a separator, as
+# operators did.
+WORDS = (
+    'AN', 'VON', 'BEI', 'UND', 'MIT', 'NACH', 'AUF', 'IN', 'DER', 'DIE', 'DAS',
+    'KOMMANDO', 'OBERKOMMANDO', 'DIVISION', 'REGIMENT', 'BATAILLON', 'KOMPANIE',
+    'ARMEE', 'KORPS', 'STAB', 'FLOTTE', 'GESCHWADER', 'STAFFEL', 'BOOT',
+    'FEIND', 'ANGRIFF', 'VERTEIDIGUNG', 'STELLUNG', 'VORMARSCH', 'RUECKZUG',
+    'NORD', 'SUED', 'OST', 'WEST', 'NORDWEST', 'SUEDOST', 'RICHTUNG', 'RAUM',
+    'BRUECKE', 'STRASSE', 'BAHNHOF', 'HAFEN', 'HOEHE', 'WALD', 'DORF', 'FLUSS',
+    'WETTER', 'WIND', 'REGEN', 'NEBEL', 'SICHT', 'GUT', 'SCHLECHT', 'KLAR',
+    'MELDUNG', 'BEFEHL', 'LAGE', 'ERBITTE', 'ANTWORT', 'SOFORT', 'DRINGEND',
+    'MUNITION', 'TREIBSTOFF', 'VERPFLEGUNG', 'NACHSCHUB', 'VERLUSTE', 'KEINE',
+    'PANZER', 'ARTILLERIE', 'INFANTERIE', 'FLAK', 'FLUGZEUGE', 'KONVOI',
+    'EINS', 'ZWO', 'DREI', 'VIER', 'FUENF', 'SECHS', 'SIEBEN', 'ACHT', 'NEUN',
+    'NULL', 'UHR', 'MORGEN', 'ABEND', 'NACHT', 'HEUTE', 'GEMELDET', 'ERREICHT',
+    'BESETZT', 'GESICHTET', 'VERSTAERKUNG', 'EINGETROFFEN', 'ENDE',
+)
+
+# Message lengths in letters; the Wehrmacht limit was 250 letters per part:
+MIN_LENGTH = 40
+MAX_LENGTH = 250
+
+
+Message = collections.namedtuple('Message',
+        ['id', 'date', 'ground', 'indicator', 'message_key', 'plaintext',
+         'ciphertext'])
+
+
+def _rng(seed, kind, date):
+    # seeding with a string is deterministic across runs and platforms
+    return random.Random('%s/%s/%s' % (seed, kind, date.isoformat()))
+
+
+def daily_spec(seed, date, rotor_count=3):
+    """Return the MachineSpec of the daily key for a date.
+
+    rotor_count - 3 for army keys, 4 for navy M4 keys
+
+    """
+    rng = _rng(seed, 'key', date)
+    if rotor_count == 3:
+        rotors = rng.sample(ARMY_ROTORS, 3)
+        reflector = rng.choice(ARMY_REFLECTORS)
+    elif rotor_count == 4:
+        rotors = [rng.choice(NAVY_FOURTH_ROTORS)] + rng.sample(NAVY_ROTORS, 3)
+        reflector = rng.choice(NAVY_REFLECTORS)
+    else:
+        raise TrafficError('rotor_count must be 3 or 4')
+
+    letters = rng.sample(KEYBOARD_CHARS, 2 * KEY_SHEET_PAIRS)
+    return MachineSpec.from_key_sheet(
+            rotors=rotors,
+            ring_settings=[rng.randrange(26) for _ in rotors],
+            reflector=reflector,
+            plugboard_settings=' '.join(a + b for a, b in
+                                        zip(letters[::2], letters[1::2])))
+
+
+def key_sheet_lines(seed, year, month, rotor_count=3):
+    """Generate the lines of the key sheet for a month, in the keyfile.py
+    format, with the days in descending order as on the real sheets.
+
+    """
+    yield '# Key sheet for %04d-%02d, seed %s\n' % (year, month, seed)
+    for day in range(calendar.monthrange(year, month)[1], 0, -1):
+        spec = daily_spec(seed, datetime.date(year, month, day), rotor_count)
+        yield '%d %s\n' % (day, spec.army_str())
+
+
+def random_plaintext(rng, length):
+    """Return a plaintext of exactly length letters made of WORDS separated by
+    X.
+
+    """
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return 'X'.join(words)[:length]
+
+
+def daily_messages(seed, date, count, rotor_count=3, first_id=0):
+    """Generate count Message objects for a date.
+
+    first_id - the id of the first message; ids are consecutive
+
+    The messages of a day depend only on the seed, date and count.
+
+    """
+    spec = daily_spec(seed, date, rotor_count)
+    key = compile_key(spec)
+    rng = _rng(seed, 'messages', date)
+
+    def letters(n):
+        return ''.join(rng.choice(KEYBOARD_CHARS) for _ in range(n))
+
+    def encipher(start, text):
+        data = bytes(ord(c) - ord('A') for c in text)
+        result, _ = key.process(key.positions(start), data)
+        return result.decode('ascii')
+
+    for i in range(count):
+        ground = letters(rotor_count)
+        message_key = letters(rotor_count)
+        plaintext = random_plaintext(rng, rng.randint(MIN_LENGTH, MAX_LENGTH))
+        yield Message(first_id + i, date, ground, encipher(ground, message_key),
+                      message_key, plaintext, encipher(message_key, plaintext))
+
+
+def _split(total, parts):
+    """Split total into parts nearly equal integers."""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def generate(seed=0, start=datetime.date(1941, 1, 1), days=365, messages=1000,
+             rotor_count=3):
+    """Generate messages spread evenly over a run of days, in date order."""
+
+    if days < 1:
+        raise TrafficError('days must be at least 1')
+
+    next_id = 0
+    for offset, count in enumerate(_split(messages, days)):
+        date = start + datetime.timedelta(days=offset)
+        yield from daily_messages(seed, date, count, rotor_count, next_id)
+        next_id += count
+
+
+def write_corpus(directory, seed=0, start=datetime.date(1941, 1, 1), days=365,
+                 messages=1000, rotor_count=3):
+    """Write a corpus to directory, as described in the module documentation.
+    The directory is created if needed; existing files are overwritten.
+
+    Returns a dictionary summarizing what was written.
+
+    """
+    key_dir = os.path.join(directory, 'keys')
+    os.makedirs(key_dir, exist_ok=True)
+
+    end = start + datetime.timedelta(days=days - 1)
+    months = sorted({(d.year, d.month) for d in
+                     (start + datetime.timedelta(days=n) for n in range(days))})
+    for year, month in months:
+        path = os.path.join(key_dir, '%04d-%02d.keys' % (year, month))
+        with open(path, 'w') as fp:
+            fp.writelines(key_sheet_lines(seed, year, month, rotor_count))
+
+    letters = 0
+    count = 0
+    with open(os.path.join(directory, 'intercepts.jsonl'), 'w') as intercepts, \
+         open(os.path.join(directory, 'truth.jsonl'), 'w') as truth:
+        for msg in generate(seed, start, days, messages, rotor_count):
+            intercepts.write(json.dumps({
+                'id': msg.id,
+                'date': msg.date.isoformat(),
+                'ground': msg.ground,
+                'indicator': msg.indicator,
+                'ciphertext': msg.ciphertext,
+            }) + '\n')
+            truth.write(json.dumps({
+                'id': msg.id,
+                'message_key': msg.message_key,
+                'plaintext': msg.plaintext,
+            }) + '\n')
+            letters += len(msg.ciphertext)
+            count += 1
+
+    return {
+        'seed': seed,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'key_sheets': len(months),
+        'messages': count,
+        'letters': letters,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('directory', help='output directory')
+    parser.add_argument('--seed', default='0',
+            help='random seed; any string [default: %(default)s]')
+    parser.add_argument('--start', default='1941-01-01',
+            help='first date, YYYY-MM-DD [default: %(default)s]')
+    parser.add_argument('--days', type=int, default=365,
+            help='number of days [default: %(default)s]')
+    parser.add_argument('--messages', type=int, default=1000,
+            help='total number of messages [default: %(default)s]')
+    parser.add_argument('--rotors', type=int, choices=[3, 4], default=3,
+            help='3 for army keys, 4 for navy M4 keys [default: %(default)s]')
+    args = parser.parse_args(argv)
+
+    try:
+        start = datetime.datetime.strptime(args.start, '%Y-%m-%d').date()
+    except ValueError:
+        parser.error('invalid start date: %s' % args.start)
+
+    summary = write_corpus(args.directory, args.seed, start, args.days,
+                           args.messages, args.rotors)
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+# Copyright (C) 2012 - 2025 by Brian Neal.
+# This file is part of Py-Enigma, the Enigma Machine simulation.
+# Py-Enigma is released under the MIT License (see License.txt).
+
+"""Differential verification of the alternative Enigma engines against the
+reference implementation, EnigmaMachine.key_press.
+
+The package contains several independent implementations of the same machine:
+the stateless engine, MachineBatch, the process_text backends, the scrambler
+atlas combined with the stepping module, and the stepping module on its own.
+Stepping bugs, such as a wrong double step, only show up at rare rotor
+positions, so ordinary test vectors can easily miss them. This module runs
+each implementation side by side with the reference on:
+
+    - random keys drawn from rotors.data.ROTORS and REFLECTORS, in both 3 rotor
+      and 4 rotor (M4) layouts;
+    - "turnover heavy" start positions, with the middle and right rotors at or
+      just before their notches;
+    - optionally, a complete stepping period of a key (sweep_period()).
+
+Every disagreement is reported as a Divergence giving the key, the start
+position and the full reference machine state at the first differing key
+press.
+
+Run from the command line with:
+
+    $ python -m enigma.verify [--trials N] [--seed N] [--atlas] [--sweep KEY]
+
+"""
+
+import argparse
+import collections
+import random
+import sys
+
+from . import backends
+from .batch import MachineBatch
+from .engine import compile_key, normalize
+from .machine import KEYBOARD_CHARS
+from .rotors.data import (ROTORS, STEPPING_ROTORS, FOURTH_ROTORS,
+                          THIN_REFLECTORS, REFLECTOR_NAMES)
+from .spec import MachineSpec
+from .stepping import decode_position, encode_position, stepping_cycles
+from .text import keyboard_text
+
+
+_DivergenceBase = collections.namedtuple('Divergence',
+        ['engine', 'spec', 'start', 'index', 'key', 'expected', 'actual',
+         'display_before', 'display_after', 'rotor_counts'])
+
+
+class Divergence(_DivergenceBase):
+    """The first disagreement between an engine and the reference. Fields:
+
+    engine - the engine name
+
+    spec - the MachineSpec of the key
+
+    start - the start position
+
+    index - the number of key presses before the divergence; for a final
+    position mismatch this is the length of the text
+
+    key - the key pressed, or None for a final position mismatch
+
+    expected, actual - the reference and engine output letter (or the final
+    display for a position mismatch)
+
+    display_before, display_after - the reference display before and after
+    the key press
+
+    rotor_counts - the reference rotor rotation counts after the key press
+
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        lines = [
+            '%s diverges from the reference' % self.engine,
+            '  key:           %s' % self.spec.army_str(),
+            '  start:         %s' % self.start,
+        ]
+        if self.key is None:
+            lines.append('  final display: expected %s, got %s' %
+                         (self.expected, self.actual))
+        else:
+            lines.extend([
+                '  key press:     #%d, %s' % (self.index + 1, self.key),
+                '  output:        expected %s, got %s' %
+                        (self.expected, self.actual),
+            ])
+        lines.extend([
+            '  display:       %s -> %s' % (self.display_before,
+                                           self.display_after),
+            '  rotor counts:  %s' % (self.rotor_counts, ),
+        ])
+        return '\n'.join(lines)
+
+
+# Engines. Each is called as engine(spec, start, text) with text consisting of
+# the letters A-Z only, and returns a tuple (output, final display), or None if
+# the engine does not support the key.
+
+def _engine(spec, start, text):
+    key = compile_key(spec)
+    result, positions = key.process(key.positions(start), normalize(text))
+    return result.decode('ascii'), key.display(positions)
+
+
+def _batch(spec, start, text):
+    batch = MachineBatch([spec.create_machine(start)])
+    return batch.process_text([text])[0], batch.get_display(0)
+
+
+def _backend(name):
+    def run(spec, start, text):
+        machine = spec.create_machine(start)
+        output = backends.BACKENDS[name](machine, text, 'X')
+        return output, machine.get_display()
+    return run
+
+
+def _atlas(atlas):
+    def run(spec, start, text):
+        if (len(spec.rotors) != 3 or spec.reflector != atlas.reflector or
+                not all(r in atlas.rotors for r in spec.rotors) or
+                len(set(spec.rotors)) != 3):
+            return None
+
+        plug = list(range(26))
+        for m, n in spec.plugboard:
+            plug[m], plug[n] = n, m
+        succ = stepping_cycles(spec.rotors).next_position
+        rings = spec.ring_settings
+
+        n = encode_position(start)
+        output = []
+        for c in text:
+            n = succ[n]
+            display = decode_position(n)
+            positions = [(ord(d) - ord('A') - r) % 26
+                         for d, r in zip(display, rings)]
+            perm = atlas.scrambler(spec.rotors, positions)
+            output.append(KEYBOARD_CHARS[plug[perm[plug[ord(c) - 65]]]])
+        return ''.join(output), decode_position(n)
+    return run
+
+
+def default_engines(atlas=None):
+    """Return a dictionary of engine name -> engine function for every
+    alternative engine available, including the scrambler atlas if one is
+    given.
+
+    """
+    engines = {
+        'engine': _engine,
+        'batch': _batch,
+    }
+    for name in backends.available_backends():
+        if name != 'python':
+            engines['backend:%s' % name] = _backend(name)
+    if atlas is not None:
+        engines['atlas'] = _atlas(atlas)
+    return engines
+
+
+def random_spec(rng, rotor_count=3):
+    """Return a random MachineSpec with 3 or 4 rotors, using the random.Random
+    instance rng.
+
+    """
+    rotors = rng.sample(STEPPING_ROTORS, 3)
+    if rotor_count == 4:
+        rotors.insert(0, rng.choice(FOURTH_ROTORS))
+        reflector = rng.choice(THIN_REFLECTORS)
+    else:
+        reflector = rng.choice(REFLECTOR_NAMES)
+
+    letters = rng.sample(range(26), 2 * rng.randint(0, 10))
+    plugs = [(letters[i], letters[i + 1]) for i in range(0, len(letters), 2)]
+    return MachineSpec.from_key_sheet(
+            rotors=rotors,
+            ring_settings=[rng.randrange(26) for _ in rotors],
+            reflector=reflector,
+            plugboard_settings=' '.join('%d/%d' % (m + 1, n + 1)
+                                        for m, n in plugs))
+
+
+def turnover_start(spec, rng):
+    """Return a random start position with the middle rotor at or just before
+    one of its notches, and the right rotor shortly before one of its notches,
+    so that the first few key presses include a turnover and a double step.
+
+    """
+    middle = rng.choice(ROTORS[spec.rotors[-2]]['stepping'])
+    right = rng.choice(ROTORS[spec.rotors[-1]]['stepping'])
+    display = [rng.choice(KEYBOARD_CHARS),
+               KEYBOARD_CHARS[(ord(middle) - 65 - rng.randint(0, 1)) % 26],
+               KEYBOARD_CHARS[(ord(right) - 65 - rng.randint(0, 3)) % 26]]
+    if len(spec.rotors) == 4:
+        display.insert(0, rng.choice(KEYBOARD_CHARS))
+    return ''.join(display)
+
+
+def _divergence(name, spec, start, text, output, display):
+    """Find the first difference between an engine's results and the
+    reference, returning a Divergence or None.
+
+    """
+    machine = spec.create_machine(start)
+    for i, c in enumerate(text):
+        before = machine.get_display()
+        expected = machine.key_press(c)
+        if i >= len(output) or output[i] != expected:
+            actual = output[i] if i < len(output) else None
+            return Divergence(name, spec, start, i, c, expected, actual,
+                              before, machine.get_display(),
+                              machine.get_rotor_counts())
+
+    if len(output) > len(text) or display != machine.get_display():
+        return Divergence(name, spec, start, len(text), None,
+                          machine.get_display(), display, start,
+                          machine.get_display(), machine.get_rotor_counts())
+    return None
+
+
+def check(spec, start, text, engines=None):
+    """Run text through every engine and the reference, starting at start.
+
+    spec - a MachineSpec or settings dictionary
+
+    text - the text to process; it is normalized as by process_text first
+
+    engines - a dictionary of engines as returned by default_engines(); the
+    default is default_engines()
+
+    Returns a list of Divergence objects, one for each engine that disagrees.
+
+    """
+    spec = MachineSpec.coerce(spec)
+    text = keyboard_text(text)
+    if engines is None:
+        engines = default_engines()
+
+    # key_press directly, as process_text goes through the selected backend
+    reference = spec.create_machine(start)
+    expected = (''.join(map(reference.key_press, text)),
+                reference.get_display())
+
+    divergences = []
+    for name, engine in engines.items():
+        result = engine(spec, start, text)
+        if result is not None and result != expected:
+            divergences.append(_divergence(name, spec, start, text, *result))
+    return divergences
+
+
+def check_stepping(spec, start, count):
+    """Compare the stepping module with the reference for count key presses
+    from start. Returns a Divergence or None.
+
+    The M4's leftmost rotor never steps, so only the 3 rightmost windows are
+    compared.
+
+    """
+    spec = MachineSpec.coerce(spec)
+    machine = spec.create_machine(start)
+    succ = stepping_cycles(spec.rotors).next_position
+    n = encode_position(start[-3:])
+    for i in range(count):
+        before = machine.get_display()
+        machine.key_press('A')
+        n = succ[n]
+        if decode_position(n) != machine.get_display()[-3:]:
+            return Divergence('stepping', spec, start, i, 'A',
+                              machine.get_display()[-3:], decode_position(n),
+                              before, machine.get_display(),
+                              machine.get_rotor_counts())
+    return None
+
+
+def verify_random(trials=100, seed=0, length=300, engines=None):
+    """Check every engine on random keys and start positions.
+
+    Trials alternate between 3 and 4 rotor keys; every other trial uses a
+    turnover heavy start position. Each trial also checks the stepping module.
+
+    Returns a list of Divergence objects, empty if all engines agree.
+
+    """
+    rng = random.Random(seed)
+    if engines is None:
+        engines = default_engines()
+
+    divergences = []
+    for trial in range(trials):
+        spec = random_spec(rng, 4 if trial % 2 else 3)
+        if trial % 4 < 2:
+            start = turnover_start(spec, rng)
+        else:
+            start = ''.join(rng.choice(KEYBOARD_CHARS) for _ in spec.rotors)
+        text = ''.join(rng.choice(KEYBOARD_CHARS) for _ in range(length))
+
+        divergences.extend(check(spec, start, text, engines))
+        divergence = check_stepping(spec, start, length)
+        if divergence is not None:
+            divergences.append(divergence)
+    return divergences
+
+
+def sweep_period(spec, start=None, engines=None, seed=0):
+    """Check every engine exhaustively over a complete stepping period.
+
+    The text is long enough to step from start through every position of the
+    cycle it leads into and back to where the cycle was entered; for single
+    notch rotors that is 16,900 key presses or more. The default start is all
+    'A's.
+
+    Returns a list of Divergence objects, empty if all engines agree.
+
+    """
+    spec = MachineSpec.coerce(spec)
+    if start is None:
+        start = 'A' * len(spec.rotors)
+
+    cycles = stepping_cycles(spec.rotors)
+    n = encode_position(start[-3:])
+    transient = 0
+    while cycles.lookup(n) is None:
+        n = cycles.next_position[n]
+        transient += 1
+    count = transient + len(cycles.cycle(n)) + 1
+
+    rng = random.Random(seed)
+    text = ''.join(rng.choice(KEYBOARD_CHARS) for _ in range(count))
+    divergences = check(spec, start, text, engines)
+    divergence = check_stepping(spec, start, count)
+    if divergence is not None:
+        divergences.append(divergence)
+    return divergences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--trials', type=int, default=200,
+            help='number of random keys to try [default: %(default)s]')
+    parser.add_argument('--seed', type=int, default=0,
+            help='random seed [default: %(default)s]')
+    parser.add_argument('--length', type=int, default=300,
+            help='message length per trial [default: %(default)s]')
+    parser.add_argument('--atlas', action='store_true', default=False,
+            help='also check a scrambler atlas (takes about a second to build)')
+    parser.add_argument('--sweep', metavar='KEY', action='append', default=[],
+            help=('sweep a full stepping period of KEY, e.g. '
+                  '"II IV V 02 21 12 AV BS B"; may be repeated'))
+    args = parser.parse_args(argv)
+
+    atlas = None
+    if args.atlas:
+        from .atlas import ScramblerAtlas
+        atlas = ScramblerAtlas.build()
+    engines = default_engines(atlas)
+    print('Engines: %s' % ', '.join(sorted(engines)))
+
+    divergences = verify_random(args.trials, args.seed, args.length, engines)
+    print('%d random trials: %d divergences' % (args.trials, len(divergences)))
+    for key in args.sweep:
+        found = sweep_period(MachineSpec.parse(key), engines=engines)
+        print('Sweep of %s: %d divergences' % (key, len(found)))
+        divergences.extend(found)
+
+    for divergence in divergences:
+        print()
+        print(divergence)
+    return 1 if divergences else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())